@@ -0,0 +1,150 @@
+# Load generator for the order gateway: open-loop message rate, round-trip latency percentiles.
+#
+#   python -m benchmarks.gateway_load --rate 100000 --messages 500000
+#   python -m benchmarks.gateway_load --unix /tmp/gw.sock --rate 50000
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Optional, Tuple, Union
+import numpy as np
+
+# Dynamically add project root to sys.path for portable imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from lob.gateway import OrderGateway, GatewayClient, pack_orders, ER_ACK, ER_CANCELLED, ER_REJECT
+from lob.matcher import Matcher
+from sim.event_stream import SyntheticEventStream
+from sim.latency import SampleBuffer
+from sim.sweep import BACKENDS
+
+Address = Union[str, Tuple[str, int]]  # Unix socket path or (host, port)
+
+
+def _serve(address: Address, backend: str, ready) -> None:
+    """Gateway process: serve until terminated."""
+    async def main():
+        gateway = OrderGateway(Matcher(BACKENDS[backend]()))
+        if isinstance(address, str):
+            await gateway.serve_unix(address)
+        else:
+            await gateway.serve_tcp(*address)
+        ready.set()
+        await asyncio.get_running_loop().create_future()
+    asyncio.run(main())
+
+
+def workload(n_messages: int, seed: int = 1) -> np.ndarray:
+    """Synthetic order flow as ORDER_DTYPE messages (stream order ids become client ids)."""
+    stream = SyntheticEventStream(n_events=n_messages, seed=seed)
+    return np.concatenate([pack_orders(block) for block in stream.blocks(block_size=65536)])
+
+
+async def run_load(address: Address, messages: np.ndarray, rate: float, tick: float = 0.001,
+                   timeout: float = 60.0) -> dict:
+    """
+    Send `messages` at `rate` msgs/sec, open loop: every `tick` the client
+    sends whatever is due, stamping each message with its *scheduled* send
+    time, so latency includes any time the sender fell behind (no
+    coordinated omission). Round-trip latency is measured from that stamp
+    to the arrival of the message's response (ACK/CANCELLED/REJECT).
+    """
+    n = len(messages)
+    latencies = SampleBuffer(n)
+    clock = time.perf_counter_ns
+    done = asyncio.get_running_loop().create_future()
+    responses = 0
+    last = 0
+
+    def on_reports(reports):
+        nonlocal responses, last
+        now = clock()
+        stamps = reports['ts'][np.isin(reports['kind'], (ER_ACK, ER_CANCELLED, ER_REJECT))]
+        if len(stamps):
+            latencies.extend(now - stamps.astype(np.int64))
+            responses += len(stamps)
+            last = now
+            if responses >= n and not done.done():
+                done.set_result(None)
+
+    if isinstance(address, str):
+        client = await GatewayClient.connect_unix(address, on_reports=on_reports)
+    else:
+        client = await GatewayClient.connect_tcp(*address, on_reports=on_reports)
+    interval = 1e9 / rate
+    start = clock()
+    sent = 0
+    while sent < n:
+        due = min(n, int((clock() - start) / interval) + 1)
+        if due > sent:
+            chunk = messages[sent:due].copy()
+            chunk['ts'] = start + np.arange(sent, due) * interval
+            client.send_messages(chunk)
+            sent = due
+        await asyncio.sleep(tick)
+    send_elapsed = (clock() - start) / 1e9
+    try:
+        await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        pass
+    client.close()
+    elapsed = (last - start) / 1e9 if last else float('nan')
+    return {
+        'messages': n,
+        'responses': responses,
+        'target_rate': rate,
+        'send_rate': n / send_elapsed,
+        'throughput': responses / elapsed if last else 0.0,
+        'latency_ns': latencies.summary(),
+    }
+
+
+def run(rate: float, n_messages: int, backend: str = 'CustomOrderBook', address: Optional[Address] = None,
+        seed: int = 1) -> dict:
+    """Run one load test; without `address` a local gateway process is started on a Unix socket."""
+    messages = workload(n_messages, seed)
+    if address is not None:
+        return asyncio.run(run_load(address, messages, rate))
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, 'gateway.sock')
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(target=_serve, args=(address, backend, ready), daemon=True)
+        server.start()
+        try:
+            if not ready.wait(30):
+                raise RuntimeError("gateway process did not start")
+            return asyncio.run(run_load(address, messages, rate))
+        finally:
+            server.terminate()
+            server.join()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Drive the order gateway at a fixed message rate and report round-trip latency.")
+    parser.add_argument('--rate', type=float, default=100000, help="target messages/sec")
+    parser.add_argument('--messages', type=int, default=500000)
+    parser.add_argument('--backend', choices=list(BACKENDS), default='CustomOrderBook',
+                        help="book for the local gateway")
+    parser.add_argument('--unix', help="connect to a running gateway on this Unix socket")
+    parser.add_argument('--host', help="connect to a running gateway over TCP")
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    address = args.unix or ((args.host, args.port) if args.host else None)
+    result = run(args.rate, args.messages, args.backend, address, args.seed)
+    lat = result['latency_ns']
+    print(f"{result['messages']:,} messages at {result['target_rate']:,.0f}/s target: "
+          f"sent {result['send_rate']:,.0f}/s, answered {result['throughput']:,.0f}/s "
+          f"({result['responses']:,} responses)")
+    if lat:
+        print("round trip (us): " + ", ".join(f"{k} {lat[k] / 1e3:,.1f}" for k in ('p50', 'p90', 'p99', 'p99.9', 'max')))
+    return 0 if result['responses'] == result['messages'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
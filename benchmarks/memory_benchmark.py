@@ -0,0 +1,77 @@
+# Memory per resting order: slotted Order vs the previous dataclass layout
+import gc
+import sys
+import os
+import tracemalloc
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Optional
+# Dynamically add project root to sys.path for portable imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from order_book.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+
+NUM_ORDERS = 1000000
+NUM_LEVELS = 200
+
+
+# Previous representation, kept here only as the comparison baseline
+class LegacySide(Enum):
+    BUY = auto()
+    SELL = auto()
+
+class LegacyOrderType(Enum):
+    LIMIT = auto()
+    MARKET = auto()
+
+@dataclass
+class LegacyOrder:
+    id: int
+    ts: float
+    side: LegacySide
+    type: LegacyOrderType
+    price: Optional[int]
+    qty: int
+    owner: Optional[str] = None
+    flags: Optional[str] = None
+    prev: Optional['LegacyOrder'] = field(default=None, init=False, repr=False, compare=False)
+    next: Optional['LegacyOrder'] = field(default=None, init=False, repr=False, compare=False)
+
+
+def bytes_per_resting_order(make_order, num_orders=NUM_ORDERS):
+    """Traced bytes held by a HeapOrderBook per resting order (orders + levels + order_map)."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    book = HeapOrderBook()
+    for i in range(num_orders):
+        book.add_order(make_order(i))
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del book
+    return used / num_orders
+
+
+def benchmark_order_memory(num_orders=NUM_ORDERS):
+    def legacy(i):
+        order = LegacyOrder(i, float(i), LegacySide.BUY, LegacyOrderType.LIMIT, 10000 - i % NUM_LEVELS, 1)
+        # The books compare against order_book's Side/OrderType codes
+        order.side, order.type = Side.BUY, OrderType.LIMIT
+        return order
+
+    def slotted(i):
+        return Order(i, float(i), Side.BUY, OrderType.LIMIT, 10000 - i % NUM_LEVELS, 1)
+
+    results = {}
+    for name, make_order in (('dataclass', legacy), ('slots', slotted)):
+        results[name] = bytes_per_resting_order(make_order, num_orders)
+        print(f"{name}: {results[name]:.1f} bytes/resting order ({num_orders} orders)")
+    print(f"Saved {results['dataclass'] - results['slots']:.1f} bytes/order "
+          f"({1 - results['slots'] / results['dataclass']:.0%})")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_order_memory()
@@ -1,9 +1,11 @@
+import argparse
 import time
 import sys
 import os
-import heapq
 import random
-from sortedcontainers import SortedDict
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are written to files, never shown
 import matplotlib.pyplot as plt
 from trader_strategies import MarketMaker, MomentumTrader, RandomTrader
 from sim.event_stream import SyntheticEventStream
@@ -13,7 +15,17 @@ from sim.latency import LatencyBench
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
-from order_book.order import LimitOrderBook, Order
+from order_book.order import LimitOrderBook, Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+import lob.order
+from lob.book_custom import CustomOrderBook
+from lob.matcher import Matcher
+from lob.events import EventBlock
+from lob.engine import MultiSymbolEngine, ShardedEngine, pack_messages
+from lob.snapshot import save_snapshot, load_snapshot
+from sim.depth_recorder import DepthRecorder
+from sim.event_stream import MultiSymbolEventStream
 
 
 NUM_ORDERS = 1000
@@ -33,75 +45,335 @@ def simulate_traders(num_orders, traders):
 
 # Benchmark using LimitOrderBook (dict+deque)
 
-def benchmark_limit_order_book_with_traders():
+def benchmark_limit_order_book_with_traders(num_orders=NUM_ORDERS):
     lob = LimitOrderBook()
     traders = [t(i) for i, t in enumerate(TRADER_TYPES * (NUM_TRADERS // len(TRADER_TYPES)))]
-    orders = simulate_traders(NUM_ORDERS, traders)
-    spread_history = []
-    depth_history = []
+    orders = simulate_traders(num_orders, traders)
+    # Spread/depth samples arrive from the book only when its top of book changes
+    samples = []
+    lob.subscribe(samples.append)
     start = time.perf_counter()
     for order in orders:
         lob.add_order(order)
-        # Record spread and depth
-        if lob.bids and lob.asks:
-            best_bid = max(lob.bids.keys())
-            best_ask = min(lob.asks.keys())
-            spread = best_ask - best_bid
-            depth = sum(q.qty for dq in lob.bids.values() for q in dq) + sum(q.qty for dq in lob.asks.values() for q in dq)
-            spread_history.append(spread)
-            depth_history.append(depth)
     add_time = time.perf_counter() - start
     start = time.perf_counter()
     lob.match()
     match_time = time.perf_counter() - start
     print(f"LimitOrderBook (Traders): Add {add_time:.6f}s, Match {match_time:.6f}s")
-    return spread_history, depth_history
+    two_sided = [s for s in samples if s.spread is not None]
+    return [s.spread for s in two_sided], [s.depth for s in two_sided]
 
-# Benchmark using SortedDict
-def benchmark_sorted_dict():
-    from order_book.order import Side
-    book = {Side.BUY: SortedDict(), Side.SELL: SortedDict()}
-    traders = [t(i) for i, t in enumerate(TRADER_TYPES * (NUM_TRADERS // len(TRADER_TYPES)))]
-    orders = simulate_traders(NUM_ORDERS, traders)
+# Cancel latency with a deep queue at a single price level
+def benchmark_deep_level_cancels(orders_per_level=10000, seed=7):
+    rng = random.Random(seed)
+    cancel_ids = list(range(orders_per_level))
+    rng.shuffle(cancel_ids)
+    for book_cls in (HeapOrderBook, SortedOrderBook, LimitOrderBook):
+        events = [('add', Order(i, float(i), Side.BUY, OrderType.LIMIT, 10000, 1)) for i in range(orders_per_level)]
+        events += [('cancel', i) for i in cancel_ids]
+        bench = LatencyBench(book_cls(), events)
+        bench.run(warmup=orders_per_level)  # resting orders are built during warmup
+        cancel = bench.stats()['cancel']
+        print(f"{book_cls.__name__} cancel @ {orders_per_level} orders/level: "
+              f"p50 {cancel['p50']:.0f}ns, p99 {cancel['p99']:.0f}ns")
+
+# Same integer-priced add/match/cancel workload on every book backend
+def _backend_events(n_events, seed, cancel_prob=0.3):
+    rng = random.Random(seed)
+    mid = 10000
+    live = []
+    events = []
+    for i in range(n_events):
+        mid += rng.choice((-1, 0, 1))
+        if live and rng.random() < cancel_prob:
+            events.append(('cancel', live.pop(rng.randrange(len(live)))))
+            continue
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        offset = int(rng.expovariate(0.2))
+        price = mid - 1 - offset if side == Side.BUY else mid + 1 + offset
+        events.append(('add', lob.order.Order(i, float(i), side, OrderType.LIMIT, price, rng.randint(1, 10))))
+        live.append(i)
+    return events
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+
+def benchmark_backends(n_events=200000, seed=11):
+    for book_cls in BACKENDS:
+        # add_order + full match() per add, vs. matching only the incoming order
+        for mode in ('add+match', 'incoming'):
+            events = _backend_events(n_events, seed)
+            book = book_cls()
+            matcher = Matcher(book)
+            start = time.perf_counter()
+            for etype, payload in events:
+                if etype == 'add':
+                    if mode == 'incoming':
+                        matcher.submit_fills(payload)
+                    else:
+                        book.add_order(payload)
+                        book.match()
+                else:
+                    book.cancel_order(payload)
+            elapsed = time.perf_counter() - start
+            print(f"{book_cls.__name__} [{mode}]: {n_events / elapsed:,.0f} events/sec")
+# Matcher.submit_batch throughput vs. batch size (CustomOrderBook)
+def _run_per_event(events):
+    book = CustomOrderBook()
+    matcher = Matcher(book)
     start = time.perf_counter()
-    for order in orders:
-        sd = book[order.side]
-        if order.price not in sd:
-            sd[order.price] = []
-        sd[order.price].append(order)
-    add_time = time.perf_counter() - start
-    print(f"SortedDict: Add {add_time:.6f}s")
+    for etype, payload in events:
+        if etype == 'add':
+            matcher.submit_fills(payload)
+        else:
+            book.cancel_order(payload)
+    return time.perf_counter() - start
 
-# Benchmark using heapq
-def benchmark_heapq():
-    bids = []
-    asks = []
-    traders = [t(i) for i, t in enumerate(TRADER_TYPES * (NUM_TRADERS // len(TRADER_TYPES)))]
-    orders = simulate_traders(NUM_ORDERS, traders)
+def _run_batched(blocks):
+    matcher = Matcher(CustomOrderBook())
     start = time.perf_counter()
-    for order in orders:
-        if order.side == 'bid':
-            heapq.heappush(bids, (-order.price, order.ts, order))
+    for b in blocks:
+        matcher.submit_batch(b)
+    return time.perf_counter() - start
+
+def benchmark_batch_sizes(n_events=262144, seed=13):
+    template = EventBlock.from_events(_backend_events(n_events, seed))
+    columns = (template.kind, template.order_id, template.ts, template.side, template.price, template.qty)
+    # Baseline: one Matcher/book call per message, Order objects already built
+    elapsed = _run_per_event(list(template.to_events()))
+    print(f"per-event submit (prebuilt orders): {n_events / elapsed:,.0f} events/sec")
+    for batch_size in (1, 16, 256, 4096, 65536):
+        events = list(template.to_events())
+        elapsed = _run_batched([events[i:i + batch_size] for i in range(0, n_events, batch_size)])
+        print(f"submit_batch(size={batch_size}, event tuples): {n_events / elapsed:,.0f} events/sec")
+        # Columnar blocks also pay for building each Order inside the batch
+        elapsed = _run_batched([EventBlock(*(col[i:i + batch_size] for col in columns))
+                                for i in range(0, n_events, batch_size)])
+        print(f"submit_batch(size={batch_size}, EventBlock): {n_events / elapsed:,.0f} events/sec")
+
+# Multi-symbol throughput: in-process vs. books sharded over worker processes
+def benchmark_sharded_engine(n_symbols=500, n_events=1000000, workers=(1, 2, 4, 8), seed=17):
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    batches = [pack_messages(ids, block) for ids, block in
+               MultiSymbolEventStream(symbols, n_events=n_events, seed=seed).blocks(block_size=65536)]
+    engine = MultiSymbolEngine()
+    start = time.perf_counter()
+    for batch in batches:
+        engine.submit_messages(batch)
+    print(f"MultiSymbolEngine (1 process, {n_symbols} symbols): {n_events / (time.perf_counter() - start):,.0f} events/sec")
+    for n_workers in workers:
+        with ShardedEngine(n_workers) as sharded:
+            sharded.register(symbols)
+            start = time.perf_counter()
+            for batch in batches:
+                sharded.submit_messages(batch)
+            elapsed = time.perf_counter() - start
+        print(f"ShardedEngine ({n_workers} workers): {n_events / elapsed:,.0f} events/sec")
+
+# Warm start: restore a deep book from a snapshot vs. rebuilding it order by order
+def benchmark_snapshot_restore(n_orders=1000000, levels=2000, seed=19, path='book.snap'):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_orders):
+        if rng.random() < 0.5:
+            rows.append((i, float(i), Side.BUY, OrderType.LIMIT, 10000 - rng.randrange(1, levels), rng.randint(1, 10)))
         else:
-            heapq.heappush(asks, (order.price, order.ts, order))
-    add_time = time.perf_counter() - start
-    print(f"heapq: Add {add_time:.6f}s")
+            rows.append((i, float(i), Side.SELL, OrderType.LIMIT, 10000 + rng.randrange(levels), rng.randint(1, 10)))
+    for book_cls in BACKENDS:
+        book = book_cls()
+        start = time.perf_counter()
+        for row in rows:
+            book.add_order(lob.order.Order(*row))
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        save_snapshot(book, path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = load_snapshot(path, book_cls)
+        loaded = time.perf_counter() - start
+        assert restored.depth(k=10) == book.depth(k=10)
+        print(f"{book_cls.__name__} @ {n_orders:,} orders: rebuild by add_order {built:.2f}s, "
+              f"save {saved:.2f}s, restore {loaded:.2f}s")
+        del book, restored
+    os.remove(path)
+
+# Building a deep book: add_order per order vs. one bulk load (Order list or columns)
+def benchmark_bulk_load(n_orders=1000000, levels=2000, seed=23):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_orders):
+        if rng.random() < 0.5:
+            rows.append((i, float(i), Side.BUY, OrderType.LIMIT, 10000 - rng.randrange(1, levels), rng.randint(1, 10)))
+        else:
+            rows.append((i, float(i), Side.SELL, OrderType.LIMIT, 10000 + rng.randrange(levels), rng.randint(1, 10)))
+    block = EventBlock(*(np.array(col) for col in zip(*((int(t), i, ts, int(sd), p, q) for i, ts, sd, t, p, q in rows))))
+    for book_cls in (HeapOrderBook, SortedOrderBook):
+        orders = [Order(*row) for row in rows]
+        book = book_cls()
+        start = time.perf_counter()
+        for order in orders:
+            book.add_order(order)
+        add = time.perf_counter() - start
+        del book
+        orders = [Order(*row) for row in rows]
+        start = time.perf_counter()
+        book_cls.from_orders(orders)
+        bulk = time.perf_counter() - start
+        start = time.perf_counter()
+        book_cls.from_orders(block)
+        columnar = time.perf_counter() - start
+        print(f"{book_cls.__name__} @ {n_orders:,} orders: add_order {add:.2f}s, "
+              f"from_orders(list) {bulk:.2f}s, from_orders(EventBlock) {columnar:.2f}s")
+
+# Cost per incoming order by time in force / iceberg, vs. a plain limit order and IOC emulated with add-then-cancel
+def benchmark_order_types(n_resting=20000, n_orders=100000, seed=29):
+    rng = random.Random(seed)
+    resting = [(i, Side.BUY if i % 2 else Side.SELL, 10000 - rng.randint(1, 50) if i % 2 else 10000 + rng.randint(1, 50),
+                rng.randint(1, 10)) for i in range(n_resting)]
+    flow = []
+    for i in range(n_resting, n_resting + n_orders):
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        offset = rng.randint(-3, 20)  # negative: crosses the touch
+        flow.append((i, side, 10000 - 1 - offset if side == Side.BUY else 10000 + 1 + offset, rng.randint(1, 10)))
+    variants = [('GTC', {}), ('IOC', {'tif': lob.order.TimeInForce.IOC}), ('FOK', {'tif': lob.order.TimeInForce.FOK}),
+                ('POST_ONLY', {'tif': lob.order.TimeInForce.POST_ONLY}), ('iceberg', {'peak': 3}),
+                ('add+cancel IOC', {})]
+    for book_cls in BACKENDS:
+        results = []
+        for name, kwargs in variants:
+            matcher = Matcher(book_cls())
+            for oid, side, price, qty in resting:
+                matcher.submit_fills(lob.order.Order(oid, 0.0, side, OrderType.LIMIT, price, qty))
+            orders = [lob.order.Order(oid, 1.0, side, OrderType.LIMIT, price, qty, **kwargs)
+                      for oid, side, price, qty in flow]
+            submit, cancel = matcher.submit_fills, matcher.book.cancel_order
+            start = time.perf_counter()
+            if name == 'add+cancel IOC':
+                for order in orders:
+                    submit(order)
+                    cancel(order.id)
+            else:
+                for order in orders:
+                    submit(order)
+            results.append(f"{name} {(time.perf_counter() - start) / n_orders * 1e9:,.0f}ns")
+        print(f"{book_cls.__name__} per order: " + ", ".join(results))
 
+# Kill switch: cancel one participant's orders with mass_cancel vs. scanning order_map and cancelling one by one
+def benchmark_mass_cancel(n_orders=200000, owned=20000, levels=500, seed=31):
+    rng = random.Random(seed)
+    rows = [(i, Side.BUY if i % 2 else Side.SELL, rng.randrange(1, levels), rng.randint(1, 10),
+             'mm' if rng.random() < owned / n_orders else None) for i in range(n_orders)]
+    for book_cls in BACKENDS:
+        timings = []
+        for mode in ('scan+cancel', 'mass_cancel'):
+            book = book_cls()
+            for oid, side, offset, qty, owner in rows:
+                price = 10000 - offset if side == Side.BUY else 10000 + offset
+                book.add_order(lob.order.Order(oid, 0.0, side, OrderType.LIMIT, price, qty, owner=owner))
+            start = time.perf_counter()
+            if mode == 'mass_cancel':
+                n = len(book.mass_cancel('mm'))
+            else:
+                ids = [oid for oid, order in book.order_map.items() if order.owner == 'mm']
+                for oid in ids:
+                    book.cancel_order(oid)
+                n = len(ids)
+            timings.append(f"{mode} {(time.perf_counter() - start) * 1e3:,.1f}ms")
+        print(f"{book_cls.__name__} cancelling {n:,} of {n_orders:,} orders: " + ", ".join(timings))
+
+# Churn near a drifting touch: HeapOrderBook heap size vs. live levels, with and without compaction
+def benchmark_heap_churn(n_events=500000, seed=37):
+    rng = random.Random(seed)
+    events = []
+    live = []
+    for i in range(n_events):
+        if live and rng.random() < 0.5:
+            events.append(('cancel', live.pop(rng.randrange(len(live)))))
+            continue
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        mid = 10000 + i // 50
+        price = mid - rng.randint(1, 40) if side == Side.BUY else mid + rng.randint(1, 40)
+        events.append(('add', (i, float(i), side, OrderType.LIMIT, price, 1)))
+        live.append(i)
+    for label, ratio in (('no compaction', float('inf')), ('compact_ratio=0.5', 0.5)):
+        book = HeapOrderBook(compact_ratio=ratio)
+        for etype, payload in events:
+            if etype == 'add':
+                book.add_order(Order(*payload))  # fresh Orders: each book links its own
+            else:
+                book.cancel_order(payload)
+        start = time.perf_counter()
+        for _ in range(1000):
+            book.best_bid()
+            book.best_ask()
+        touch = (time.perf_counter() - start) / 2000
+        stats = book.heap_stats()
+        print(f"HeapOrderBook churn [{label}]: heap {stats['bid_heap'] + stats['ask_heap']:,} entries for "
+              f"{stats['bid_levels'] + stats['ask_levels']:,} levels, {stats['compactions']} compactions, "
+              f"touch query {touch * 1e9:,.0f}ns")
+
+# Full-book and top-k L2 snapshots per backend, and depth-matrix recording during replay
+def benchmark_depth_snapshots(n_events=200000, reps=200, seed=41):
+    block = EventBlock.from_events(_backend_events(n_events, seed, cancel_prob=0.1))
+    for book_cls in BACKENDS:
+        matcher = Matcher(book_cls())
+        matcher.submit_batch(block)
+        book = matcher.book
+        timings = {}
+        for label, snapshot in (('depth(k=10)', lambda: book.depth(k=10)),
+                                ('depth_arrays(10)', lambda: book.depth_arrays(10)),
+                                ('depth(all)', lambda: book.depth(k=10 ** 6)),
+                                ('depth_arrays(all)', lambda: book.depth_arrays())):
+            start = time.perf_counter()
+            for _ in range(reps):
+                snapshot()
+            timings[label] = (time.perf_counter() - start) / reps
+        levels = len(book.depth_arrays().bid_price) + len(book.depth_arrays().ask_price)
+        print(f"{book_cls.__name__} depth snapshots ({levels:,} levels): " +
+              ", ".join(f"{label} {t * 1e6:,.1f}us" for label, t in timings.items()))
+    for every in (None, 1000, 100):
+        matcher = Matcher(CustomOrderBook())
+        start = time.perf_counter()
+        if every is None:
+            matcher.submit_batch(block)
+            label = 'no recording'
+        else:
+            DepthRecorder(levels=20, capacity=-(-n_events // every)).replay(matcher, block, every)
+            label = f'20-level snapshot every {every} events'
+        elapsed = time.perf_counter() - start
+        print(f"CustomOrderBook replay [{label}]: {n_events / elapsed:,.0f} events/sec")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the order book benchmarks (the 1M-order ones only on request).")
+    parser.add_argument('--sharded', action='store_true', help="multi-symbol engine vs. sharded workers, 1M events")
+    parser.add_argument('--snapshot', action='store_true', help="snapshot save/restore vs. rebuild, 1M orders")
+    parser.add_argument('--bulk', action='store_true', help="bulk load vs. add_order, 1M orders")
+    parser.add_argument('--heavy', action='store_true', help="all of the above")
+    args = parser.parse_args()
+
     print("Benchmarking Limit Order Book Implementations...")
     spread, depth = benchmark_limit_order_book_with_traders()
 
     # LatencyBench for LimitOrderBook
     print("\nLatency Profiling (LimitOrderBook):")
     event_stream = SyntheticEventStream(n_events=NUM_ORDERS)
-    lob = LimitOrderBook()
-    bench = LatencyBench(lob, event_stream)
+    book = LimitOrderBook()
+    bench = LatencyBench(book, event_stream)
     bench.run(warmup=10)
     bench.pretty_report()
 
-    benchmark_sorted_dict()
-    benchmark_heapq()
+    benchmark_deep_level_cancels()
+    benchmark_backends()
+    benchmark_batch_sizes()
+    if args.sharded or args.heavy:
+        benchmark_sharded_engine()
+    if args.snapshot or args.heavy:
+        benchmark_snapshot_restore()
+    if args.bulk or args.heavy:
+        benchmark_bulk_load()
+    benchmark_order_types()
+    benchmark_mass_cancel()
+    benchmark_heap_churn()
+    benchmark_depth_snapshots()
     # Visualization
     plt.figure(figsize=(12,5))
     plt.subplot(1,2,1)
@@ -115,4 +387,5 @@ if __name__ == "__main__":
     plt.xlabel('Order #')
     plt.ylabel('Depth')
     plt.tight_layout()
-    plt.show()
+    plt.savefig('spread_depth.png')
+    print("\nFull backend comparison with JSON/CSV output: python -m benchmarks.suite --help")
@@ -0,0 +1,330 @@
+# Unified multi-backend benchmark suite: seeded workloads, scaling sweeps,
+# JSON/CSV results that can be diffed against a baseline run.
+#
+#   python -m benchmarks.suite --json results.json --csv results.csv
+#   python -m benchmarks.suite --scale 0.1 --baseline results.json
+import argparse
+import csv
+import gc
+import json
+import platform
+import random
+import sys
+import os
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Dynamically add project root to sys.path for portable imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from order_book.order import LimitOrderBook
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from lob.book_custom import CustomOrderBook
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType
+from sim.latency import SampleBuffer, measure_timer_overhead
+from sim.live_orders import LiveOrderSet
+
+BACKENDS = {
+    'HeapOrderBook': HeapOrderBook,
+    'SortedOrderBook': SortedOrderBook,
+    'LimitOrderBook': LimitOrderBook,
+    'CustomOrderBook': CustomOrderBook,
+}
+
+# Every sweep varies one parameter around BASE_CONFIG
+BASE_CONFIG = {'n_events': 100000, 'depth': 100, 'orders_per_level': 10, 'cancel_ratio': 0.3, 'amend_ratio': 0.0}
+SWEEPS = {
+    'n_events': (10000, 100000, 1000000),
+    'depth': (10, 100, 1000),
+    'orders_per_level': (1, 10, 100),
+    'cancel_ratio': (0.1, 0.3, 0.6),
+    'amend_ratio': (0.0, 0.3, 0.6),
+}
+MID = 100000
+AGGRESSIVE_PROB = 0.1  # share of adds priced through the opposite touch
+
+ADD, CANCEL, MODIFY = 0, 1, 2
+Row = Tuple[int, int, int, int, int]  # (op, order_id, side, price, qty); MODIFY carries the new price/qty
+
+
+def make_workload(n_events: int, depth: int, orders_per_level: int, cancel_ratio: float,
+                  seed: int = 1, amend_ratio: float = 0.0) -> Tuple[List[Row], List[Row]]:
+    """
+    Seeded workload, identical for every backend: setup rows that rest
+    `orders_per_level` orders on each of `depth` levels per side, then
+    `n_events` rows of flow. Flow adds are passive within `depth` ticks of
+    the mid, except AGGRESSIVE_PROB of them that cross; a `cancel_ratio`
+    share of the flow cancels a uniformly chosen order this generator
+    still considers live (it may have been filled meanwhile, then the
+    cancel is a miss on every backend alike). An `amend_ratio` share
+    amends such an order: mostly quantity reductions (in place), the rest
+    quantity increases and 1-2 tick price moves (re-queued, occasionally
+    crossing).
+    """
+    rng = random.Random(seed)
+    live = LiveOrderSet()
+    quotes: Dict[int, Tuple[int, int, int]] = {}  # id -> (side, price, qty) as last sent
+    setup: List[Row] = []
+    next_id = 0
+    for level in range(1, depth + 1):
+        for side, price in ((Side.BUY, MID - level), (Side.SELL, MID + level)):
+            for _ in range(orders_per_level):
+                qty = rng.randint(1, 10)
+                setup.append((ADD, next_id, int(side), price, qty))
+                live.add(next_id, 1)
+                quotes[next_id] = (int(side), price, qty)
+                next_id += 1
+    flow: List[Row] = []
+    for _ in range(n_events):
+        r = rng.random() if live else 1.0
+        if r < cancel_ratio:
+            order_id = live.pop_random(rng.random())
+            del quotes[order_id]
+            flow.append((CANCEL, order_id, 0, 0, 0))
+            continue
+        if r < cancel_ratio + amend_ratio:
+            order_id = live.pick(rng.random())
+            side, price, qty = quotes[order_id]
+            u = rng.random()
+            if u < 0.6 and qty > 1:
+                qty = rng.randint(1, qty - 1)
+            elif u < 0.8:
+                qty += rng.randint(1, 5)
+            else:
+                price += rng.choice((-2, -1, 1, 2))
+            quotes[order_id] = (side, price, qty)
+            flow.append((MODIFY, order_id, side, price, qty))
+            continue
+        buy = rng.random() < 0.5
+        if rng.random() < AGGRESSIVE_PROB:
+            offset = -rng.randint(1, 3)  # through the touch
+        else:
+            offset = rng.randint(1, depth)
+        price = MID - offset if buy else MID + offset
+        qty = rng.randint(1, 10)
+        flow.append((ADD, next_id, int(Side.BUY if buy else Side.SELL), price, qty))
+        live.add(next_id, 1)
+        quotes[next_id] = (int(Side.BUY if buy else Side.SELL), price, qty)
+        next_id += 1
+    return setup, flow
+
+
+def _materialize(rows: List[Row]) -> List[Tuple[int, object]]:
+    """
+    Fresh Order objects for one pass (matching mutates order.qty). MODIFY
+    payloads are (order_id, new_qty, new_price, replacement Order), the
+    last one for the cancel/replace emulation.
+    """
+    events = []
+    for i, (op, oid, side, price, qty) in enumerate(rows):
+        if op == ADD:
+            events.append((op, Order(oid, float(i), side, OrderType.LIMIT, price, qty)))
+        elif op == CANCEL:
+            events.append((op, oid))
+        else:
+            events.append((op, (oid, qty, price, Order(oid, float(i), side, OrderType.LIMIT, price, qty))))
+    return events
+
+
+def _build(book_cls, setup: List[Row]) -> Matcher:
+    matcher = Matcher(book_cls())
+    for _, order in _materialize(setup):
+        matcher.submit_fills(order)
+    return matcher
+
+
+def _throughput(book_cls, setup, flow, cancel_replace: bool = False) -> float:
+    """
+    Events/sec replaying `flow`. Amends use the book's native modify_order
+    via the matcher, or with `cancel_replace` the cancel + re-add a book
+    without it would need (which also loses priority on reductions).
+    """
+    matcher = _build(book_cls, setup)
+    events = _materialize(flow)
+    submit, cancel, modify = matcher.submit_fills, matcher.book.cancel_order, matcher.modify_fills
+    gc.collect()
+    start = time.perf_counter()
+    for op, payload in events:
+        if op == ADD:
+            submit(payload)
+        elif op == CANCEL:
+            cancel(payload)
+        elif cancel_replace:
+            if cancel(payload[0]):
+                submit(payload[3])
+        else:
+            modify(payload[0], payload[1], payload[2])
+    elapsed = time.perf_counter() - start
+    return len(events) / elapsed if elapsed > 0 else 0.0
+
+
+def _latencies(book_cls, setup, flow, overhead: int) -> Dict[str, dict]:
+    matcher = _build(book_cls, setup)
+    events = _materialize(flow)
+    submit, cancel, modify = matcher.submit_fills, matcher.book.cancel_order, matcher.modify_fills
+    adds, cancels, amends = (SampleBuffer(len(events) or 1) for _ in range(3))
+    record_add, record_cancel, record_amend = adds.record, cancels.record, amends.record
+    clock = time.perf_counter_ns
+    gc.collect()
+    for op, payload in events:
+        if op == ADD:
+            t0 = clock()
+            submit(payload)
+            t1 = clock()
+            record_add(t1 - t0 - overhead)
+        elif op == CANCEL:
+            t0 = clock()
+            cancel(payload)
+            t1 = clock()
+            record_cancel(t1 - t0 - overhead)
+        else:
+            order_id, qty, price, _ = payload
+            t0 = clock()
+            modify(order_id, qty, price)
+            t1 = clock()
+            record_amend(t1 - t0 - overhead)
+    return {'add': adds.summary(), 'cancel': cancels.summary(), 'modify': amends.summary()}
+
+
+def _peak_memory(book_cls, setup, flow) -> int:
+    """Peak traced bytes while building the book and replaying the flow."""
+    events = _materialize(setup) + _materialize(flow)
+    gc.collect()
+    tracemalloc.start()
+    matcher = Matcher(book_cls())
+    for op, payload in events:
+        if op == ADD:
+            matcher.submit_fills(payload)
+        elif op == CANCEL:
+            matcher.book.cancel_order(payload)
+        else:
+            matcher.modify_fills(*payload[:3])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def sweep_configs(base: dict = BASE_CONFIG, sweeps: dict = SWEEPS, scale: float = 1.0) -> List[dict]:
+    """One config per swept value, other parameters at `base`; event counts scaled by `scale`."""
+    configs = []
+    for param, values in sweeps.items():
+        for value in values:
+            config = dict(base, **{param: value})
+            config['n_events'] = max(1, int(config['n_events'] * scale))
+            if config not in configs:
+                configs.append(config)
+    return configs
+
+
+def run_suite(configs: Iterable[dict], backends: Optional[Iterable[str]] = None, seed: int = 1,
+              memory: bool = True, verbose: bool = True) -> dict:
+    """Run every backend on every config; returns {'meta': ..., 'results': [flat rows]}."""
+    names = list(backends) if backends is not None else list(BACKENDS)
+    overhead = measure_timer_overhead()
+    results = []
+    for config in configs:
+        setup, flow = make_workload(seed=seed, **config)
+        for name in names:
+            book_cls = BACKENDS[name]
+            row = dict(config, backend=name, seed=seed)
+            row['throughput_eps'] = _throughput(book_cls, setup, flow)
+            # Same flow with amends emulated as cancel + re-add, to show what native modify saves
+            row['cancel_replace_eps'] = (_throughput(book_cls, setup, flow, cancel_replace=True)
+                                         if config.get('amend_ratio') else None)
+            for op, stats in _latencies(book_cls, setup, flow, overhead).items():
+                for key in ('p50', 'p99', 'p99.9', 'mean', 'max'):
+                    row[f'{op}_{key}_ns'] = stats.get(key)
+            row['peak_mem_bytes'] = _peak_memory(book_cls, setup, flow) if memory else None
+            results.append(row)
+            if verbose:
+                amends = (f", {row['cancel_replace_eps']:,.0f} with cancel/replace amends"
+                          if row['cancel_replace_eps'] else '')
+                print(f"{name:16s} {config}: {row['throughput_eps']:,.0f} events/sec{amends}, "
+                      f"add p99 {row['add_p99_ns'] or 0:,.0f}ns, cancel p99 {row['cancel_p99_ns'] or 0:,.0f}ns")
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timer_overhead_ns': overhead,
+        'seed': seed,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def write_json(report: dict, path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def write_csv(report: dict, path: str) -> None:
+    rows = report['results']
+    if not rows:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _key(row: dict) -> tuple:
+    return (row['backend'], row['n_events'], row['depth'], row['orders_per_level'], row['cancel_ratio'],
+            row.get('amend_ratio', 0.0), row['seed'])
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions of `current` against `baseline` (both run_suite reports):
+    throughput down, or add/cancel/modify p99 or peak memory up, by more than
+    `tolerance` (relative) on a config present in both.
+    """
+    previous = {_key(row): row for row in baseline['results']}
+    regressions = []
+    for row in current['results']:
+        old = previous.get(_key(row))
+        if old is None:
+            continue
+        checks = [('throughput_eps', -1), ('add_p99_ns', 1), ('cancel_p99_ns', 1), ('modify_p99_ns', 1),
+                  ('peak_mem_bytes', 1)]
+        for metric, direction in checks:
+            before, after = old.get(metric), row.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change * direction > tolerance:
+                label = ' '.join(f"{k}={row.get(k)}" for k in ('n_events', 'depth', 'orders_per_level', 'cancel_ratio', 'amend_ratio'))
+                regressions.append(f"{row['backend']} {label}: {metric} {before:,.0f} -> {after:,.0f} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every order book backend on identical seeded workloads.")
+    parser.add_argument('--json', help="write results as JSON to this path")
+    parser.add_argument('--csv', help="write results as CSV to this path")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every event count (e.g. 0.1 for a quick run)")
+    parser.add_argument('--backend', action='append', choices=list(BACKENDS), help="restrict to these backends")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="skip the (slow) tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    report = run_suite(sweep_configs(scale=args.scale), args.backend, seed=args.seed, memory=not args.no_memory)
+    if args.json:
+        write_json(report, args.json)
+    if args.csv:
+        write_csv(report, args.csv)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,12 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from order_book.order import Order, Side, OrderType
+from lob.instrument import Instrument, DEFAULT_INSTRUMENT
 
 class Trader:
-    def __init__(self, trader_id):
+    def __init__(self, trader_id, instrument: Instrument = DEFAULT_INSTRUMENT):
         self.trader_id = trader_id
+        self.instrument = instrument
 
     def generate_order(self, order_id, timestamp):
         raise NotImplementedError
@@ -21,7 +23,7 @@ class MarketMaker(Trader):
         mid = 100.0
         spread = 0.1
         side = Side.BUY if random.random() < 0.5 else Side.SELL
-        price = mid - spread if side == Side.BUY else mid + spread
+        price = self.instrument.to_ticks(mid - spread if side == Side.BUY else mid + spread)
         qty = random.randint(1, 5)
         return Order(order_id, timestamp, side, OrderType.LIMIT, price, qty)
 
@@ -29,13 +31,13 @@ class MomentumTrader(Trader):
     def generate_order(self, order_id, timestamp):
         # Buys if price is rising, sells if falling (simplified)
         side = Side.BUY if random.random() < 0.7 else Side.SELL
-        price = 100.0 + random.uniform(-0.5, 0.5)
+        price = self.instrument.to_ticks(100.0 + random.uniform(-0.5, 0.5))
         qty = random.randint(1, 3)
         return Order(order_id, timestamp, side, OrderType.LIMIT, price, qty)
 
 class RandomTrader(Trader):
     def generate_order(self, order_id, timestamp):
         side = Side.BUY if random.random() < 0.5 else Side.SELL
-        price = round(random.uniform(99, 101), 2)
+        price = self.instrument.to_ticks(random.uniform(99, 101))
         qty = random.randint(1, 10)
         return Order(order_id, timestamp, side, OrderType.LIMIT, price, qty)
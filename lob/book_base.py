@@ -1,12 +1,30 @@
 
-from typing import Protocol, List, Tuple, Dict, Optional
+from typing import Callable, Iterable, Iterator, Protocol, List, Tuple, Dict, Optional
 from .order import Order, Trade, Side
+from .trade_buffer import TradeBuffer
+from order_book.depth import DepthArrays
+from order_book.level import PriceLevel
+from order_book.top_of_book import TopOfBook
 
 class OrderBook(Protocol):
     def add_order(self, order: Order) -> None: ...
     def match(self) -> List[Trade]: ...
+    def match_incoming(self, order: Order, fills: TradeBuffer) -> None: ...
+    def can_fill(self, side: Side, qty: int, limit: Optional[int] = None) -> bool: ...
+    def sweep(self, order: Order, fills: TradeBuffer, limit_price: Optional[int] = None) -> int: ...
     def cancel_order(self, order_id: int) -> bool: ...
-    def best_bid(self) -> Optional[Tuple[float, int]]: ...
-    def best_ask(self) -> Optional[Tuple[float, int]]: ...
-    def depth(self, k: int = 5) -> Dict[str, List[Tuple[float, int]]]: ...
-    def get_orders_at_price(self, side: Side, price: float) -> List[Order]: ...
+    def execute_order(self, order_id: int, qty: int) -> bool: ...
+    def mass_cancel(self, owner, side: Optional[Side] = None,
+                    price_range: Optional[Tuple[Optional[int], Optional[int]]] = None) -> List[Order]: ...
+    def modify_order(self, order_id: int, new_qty: int, new_price: Optional[int] = None,
+                     fills: Optional[TradeBuffer] = None) -> bool: ...
+    def best_bid(self) -> Optional[Tuple[int, int]]: ...
+    def best_ask(self) -> Optional[Tuple[int, int]]: ...
+    def depth(self, k: int = 5) -> Dict[str, List[Tuple[int, int]]]: ...
+    def depth_arrays(self, k: Optional[int] = None) -> DepthArrays: ...
+    def get_orders_at_price(self, side: Side, price: int) -> List[Order]: ...
+    def levels_from_touch(self, side: Side) -> Iterator[PriceLevel]: ...
+    def load_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], order_map: Dict[int, Order]) -> None: ...
+    def top_of_book(self) -> TopOfBook: ...
+    def subscribe(self, callback: Callable[[TopOfBook], None]) -> None: ...
+    def unsubscribe(self, callback: Callable[[TopOfBook], None]) -> None: ...
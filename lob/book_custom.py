@@ -1,6 +1,299 @@
-# Custom optimized order book implementation
+# Custom optimized order book implementation: array-indexed tick ladder
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sortedcontainers import SortedDict
+from order_book.level import PriceLevel, check_book
+from order_book.owners import OwnerIndex
+from order_book.matching import MatchingBook
 from .book_base import OrderBook
+from .order import Order, Trade, Side
 
-class CustomOrderBook(OrderBook):
-    # TODO: Implement custom price map + FIFO book
-    pass
+
+class CustomOrderBook(MatchingBook, OrderBook):
+    """
+    Order book over a preallocated ladder of integer-tick price levels.
+
+    Slot ``i`` of ``bid_levels``/``ask_levels`` holds the level at price
+    ``base + i``, so adds and cancels index straight into the ladder. The
+    best bid/ask are cached as slot indices; when the touch empties the next
+    one is found from a per-side occupancy bitmap. Prices outside the ladder
+    trigger a recenter, or a doubling if live prices span the whole ladder,
+    up to ``max_capacity`` slots. A price that would need more (a far
+    outlier) rests in a sparse per-side SortedDict, ``bid_overflow``/
+    ``ask_overflow``, instead of stretching the ladder over the gap.
+    """
+    trade_cls = Trade
+
+    def __init__(self, capacity: int = 4096, ref_price: Optional[int] = None,
+                 check_consistency: bool = False, max_capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if max_capacity < capacity:
+            raise ValueError("max_capacity must be at least capacity")
+        self.capacity = capacity
+        self.max_capacity = max_capacity
+        self.base: Optional[int] = None
+        self.bid_levels: List[PriceLevel] = []
+        self.ask_levels: List[PriceLevel] = []
+        self.bid_mask = 0  # bit i set <=> bid_levels[i] is non-empty
+        self.ask_mask = 0
+        self.best_bid_idx = -1  # -1 when there are no bids
+        self.best_ask_idx = capacity  # capacity when there are no asks
+        # Non-empty levels priced off the ladder, by price
+        self.bid_overflow: SortedDict = SortedDict()
+        self.ask_overflow: SortedDict = SortedDict()
+        self.order_map: Dict[int, Order] = {}
+        self.owners = OwnerIndex()  # owner -> resting orders, for mass_cancel
+        self.bid_qty = 0  # total resting qty per side, kept incrementally
+        self.ask_qty = 0
+        self.check_consistency = check_consistency
+        if ref_price is not None:
+            self._build(ref_price - capacity // 2, capacity)
+
+    # ---- ladder management -------------------------------------------------
+
+    def _build(self, base: int, capacity: int) -> None:
+        """
+        (Re)allocate the ladder at `base`, carrying over every live level;
+        overflow levels the new ladder covers move onto it.
+        """
+        live = [lvl for lvl in self.bid_levels if lvl], [lvl for lvl in self.ask_levels if lvl]
+        for levels, overflow in zip(live, (self.bid_overflow, self.ask_overflow)):
+            for price in list(overflow.irange(base, base + capacity - 1)):
+                levels.append(overflow.pop(price))
+        self.base = base
+        self.capacity = capacity
+        self.bid_levels = [PriceLevel(base + i) for i in range(capacity)]
+        self.ask_levels = [PriceLevel(base + i) for i in range(capacity)]
+        self.bid_mask = self.ask_mask = 0
+        for lvl in live[0]:
+            idx = lvl.price - base
+            self.bid_levels[idx] = lvl
+            self.bid_mask |= 1 << idx
+        for lvl in live[1]:
+            idx = lvl.price - base
+            self.ask_levels[idx] = lvl
+            self.ask_mask |= 1 << idx
+        self.best_bid_idx = self.bid_mask.bit_length() - 1
+        self.best_ask_idx = self._lowest_bit(self.ask_mask)
+
+    def _lowest_bit(self, mask: int) -> int:
+        return (mask & -mask).bit_length() - 1 if mask else self.capacity
+
+    def _grown(self, span: int) -> int:
+        """Ladder capacity for `span` live ticks: doubled until they fill at most half of it, up to max_capacity."""
+        capacity = self.capacity
+        while span > capacity // 2 and capacity < self.max_capacity:
+            capacity = min(capacity * 2, self.max_capacity)
+        return capacity
+
+    def _index(self, price) -> int:
+        """
+        Ladder slot for `price`, recentering or growing the ladder if it is
+        off it; -1 if the ladder cannot cover `price` and its live levels
+        within max_capacity (the price goes to the overflow levels).
+        """
+        tick = int(price)
+        if tick != price:
+            raise ValueError("CustomOrderBook prices must be integer ticks.")
+        if self.base is None:
+            self._build(tick - self.capacity // 2, self.capacity)
+        idx = tick - self.base
+        if 0 <= idx < self.capacity:
+            return idx
+        # Price drifted off the ladder: recenter on the live range, growing if needed
+        lo = hi = tick
+        if self.bid_mask:
+            lo = min(lo, self.base + self._lowest_bit(self.bid_mask))
+            hi = max(hi, self.base + self.best_bid_idx)
+        if self.ask_mask:
+            lo = min(lo, self.base + self.best_ask_idx)
+            hi = max(hi, self.base + self.ask_mask.bit_length() - 1)
+        capacity = self._grown(hi - lo + 1)
+        if hi - lo + 1 > capacity:
+            return -1
+        self._build(lo - (capacity - (hi - lo + 1)) // 2, capacity)
+        return tick - self.base
+
+    # ---- MatchingBook hooks ------------------------------------------------
+
+    def _level(self, side: Side, price: int) -> PriceLevel:
+        idx = price - self.base
+        if 0 <= idx < self.capacity:
+            return self.bid_levels[idx] if side == Side.BUY else self.ask_levels[idx]
+        return (self.bid_overflow if side == Side.BUY else self.ask_overflow)[price]
+
+    def _open_level(self, side: Side, price) -> PriceLevel:
+        idx = price - self.base if self.base is not None and price.__class__ is int else -1
+        if not 0 <= idx < self.capacity:
+            idx = self._index(price)
+            if idx < 0:
+                overflow = self.bid_overflow if side == Side.BUY else self.ask_overflow
+                level = overflow.get(price)
+                if level is None:
+                    level = overflow[price] = PriceLevel(price)
+                return level
+        if side == Side.BUY:
+            level = self.bid_levels[idx]
+            if not level:
+                self.bid_mask |= 1 << idx
+                if idx > self.best_bid_idx:
+                    self.best_bid_idx = idx
+        else:
+            level = self.ask_levels[idx]
+            if not level:
+                self.ask_mask |= 1 << idx
+                if idx < self.best_ask_idx:
+                    self.best_ask_idx = idx
+        return level
+
+    def _drop_level(self, side: Side, price: int) -> None:
+        idx = price - self.base
+        if not 0 <= idx < self.capacity:
+            del (self.bid_overflow if side == Side.BUY else self.ask_overflow)[price]
+        elif side == Side.BUY:
+            self.bid_mask &= ~(1 << idx)
+            if idx == self.best_bid_idx:
+                self.best_bid_idx = self.bid_mask.bit_length() - 1
+        else:
+            self.ask_mask &= ~(1 << idx)
+            if idx == self.best_ask_idx:
+                self.best_ask_idx = self._lowest_bit(self.ask_mask)
+
+    def _drop_levels(self, side: Side, prices) -> None:
+        """Clear the bits of the levels a mass cancel emptied and re-derive the touch once."""
+        overflow = self.bid_overflow if side == Side.BUY else self.ask_overflow
+        clear = 0
+        for price in prices:
+            idx = price - self.base
+            if 0 <= idx < self.capacity:
+                clear |= 1 << idx
+            else:
+                del overflow[price]
+        if side == Side.BUY:
+            self.bid_mask &= ~clear
+            self.best_bid_idx = self.bid_mask.bit_length() - 1
+        else:
+            self.ask_mask &= ~clear
+            self.best_ask_idx = self._lowest_bit(self.ask_mask)
+
+    def _touch(self, side: Side) -> Optional[PriceLevel]:
+        if side == Side.BUY:
+            level = self.bid_levels[self.best_bid_idx] if self.best_bid_idx >= 0 else None
+            if self.bid_overflow:
+                far = self.bid_overflow.peekitem(-1)[1]
+                if level is None or far.price > level.price:
+                    return far
+            return level
+        level = self.ask_levels[self.best_ask_idx] if self.best_ask_idx < self.capacity else None
+        if self.ask_overflow:
+            far = self.ask_overflow.peekitem(0)[1]
+            if level is None or far.price < level.price:
+                return far
+        return level
+
+    # ---- OrderBook protocol ------------------------------------------------
+
+    def levels_from_touch(self, side: Side) -> Iterator[PriceLevel]:
+        """Non-empty levels of one side, from the best price outward."""
+        if side == Side.BUY:
+            overflow = self.bid_overflow
+            if overflow:  # outliers above the ladder come first
+                yield from map(overflow.__getitem__, overflow.irange(minimum=self.base + self.capacity, reverse=True))
+            mask, levels = self.bid_mask, self.bid_levels
+            while mask:
+                idx = mask.bit_length() - 1
+                yield levels[idx]
+                mask ^= 1 << idx
+            if overflow:
+                yield from map(overflow.__getitem__, overflow.irange(maximum=self.base - 1, reverse=True))
+        else:
+            overflow = self.ask_overflow
+            if overflow:
+                yield from map(overflow.__getitem__, overflow.irange(maximum=self.base - 1))
+            mask, levels = self.ask_mask, self.ask_levels
+            while mask:
+                low = mask & -mask
+                yield levels[low.bit_length() - 1]
+                mask ^= low
+            if overflow:
+                yield from map(overflow.__getitem__, overflow.irange(minimum=self.base + self.capacity))
+
+    def depth(self, k: int = 5) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Returns L2 depth snapshot: top-k price levels for bids and asks.
+        Output: {'bids': [(price, qty)], 'asks': [(price, qty)]}
+        """
+        out = {}
+        for key, side in (('bids', Side.BUY), ('asks', Side.SELL)):
+            levels = []
+            for level in self.levels_from_touch(side):
+                if len(levels) >= k:
+                    break
+                levels.append((level.price, level.total_qty))
+            out[key] = levels
+        return out
+
+    def load_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], order_map: Dict[int, Order]) -> None:
+        """
+        Bulk-load an empty book from ready-built, non-empty levels (in any
+        order) holding exactly the orders in `order_map`: the ladder is
+        allocated once around their price range.
+        """
+        if self.order_map:
+            raise ValueError("load_levels needs an empty book.")
+        bids, asks = list(bids), list(asks)
+        prices = sorted([lvl.price for lvl in bids] + [lvl.price for lvl in asks])
+        if prices:
+            lo, hi = prices[0], prices[-1]
+            capacity = self._grown(hi - lo + 1)
+            if hi - lo + 1 <= capacity:
+                base = lo - (capacity - (hi - lo + 1)) // 2
+            else:
+                base = prices[len(prices) // 2] - capacity // 2  # outliers go to the overflow levels
+            window = range(base, base + capacity)
+            # Levels on the ladder are carried over by _build
+            self.bid_levels = [lvl for lvl in bids if lvl.price in window]
+            self.ask_levels = [lvl for lvl in asks if lvl.price in window]
+            self.bid_overflow = SortedDict((lvl.price, lvl) for lvl in bids if lvl.price not in window)
+            self.ask_overflow = SortedDict((lvl.price, lvl) for lvl in asks if lvl.price not in window)
+            self._build(base, capacity)
+        self.order_map = order_map
+        self.owners.rebuild(order_map.values())
+        self.bid_qty = sum(lvl.total_qty for lvl in bids)
+        self.ask_qty = sum(lvl.total_qty for lvl in asks)
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+
+    def get_orders_at_price(self, side: Side, price) -> List[Order]:
+        if self.base is None:
+            return []
+        idx = int(price) - self.base
+        if idx != price - self.base:
+            return []
+        if not 0 <= idx < self.capacity:
+            return list((self.bid_overflow if side == Side.BUY else self.ask_overflow).get(price, ()))
+        return list(self.bid_levels[idx] if side == Side.BUY else self.ask_levels[idx])
+
+    def verify(self) -> None:
+        bids = {lvl.price: lvl for lvl in self.bid_levels if lvl}
+        asks = {lvl.price: lvl for lvl in self.ask_levels if lvl}
+        bids.update(self.bid_overflow)
+        asks.update(self.ask_overflow)
+        check_book(bids, asks, self.order_map, (self.bid_qty, self.ask_qty))
+        self.owners.verify(self.order_map)
+        if self.base is None:
+            return
+        for price in list(self.bid_overflow) + list(self.ask_overflow):
+            if 0 <= price - self.base < self.capacity:
+                raise AssertionError(f"overflow level {price} is on the ladder")
+        if self.capacity > self.max_capacity:
+            raise AssertionError(f"ladder capacity {self.capacity} over max_capacity {self.max_capacity}")
+        for levels, mask in ((self.bid_levels, self.bid_mask), (self.ask_levels, self.ask_mask)):
+            for idx, lvl in enumerate(levels):
+                if bool(lvl) != bool(mask >> idx & 1):
+                    raise AssertionError(f"occupancy bitmap out of sync at {lvl.price}")
+        if self.best_bid_idx != self.bid_mask.bit_length() - 1 or \
+                self.best_ask_idx != self._lowest_bit(self.ask_mask):
+            raise AssertionError("cached best bid/ask index out of sync")
@@ -0,0 +1,199 @@
+# Multi-symbol matching: per-symbol books, sharded across worker processes
+import multiprocessing
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from .book_custom import CustomOrderBook
+from .events import EventBlock
+from .matcher import Matcher
+
+# Per-symbol books start with a small ladder (it grows on demand): thousands
+# of full 4096-tick ladders would dominate memory and startup time
+DEFAULT_BOOK = partial(CustomOrderBook, capacity=256)
+
+# Inbound order events, one per row, tagged with the symbol's integer id
+MESSAGE_DTYPE = np.dtype([
+    ('symbol', '<u4'),
+    ('kind', '<u1'),
+    ('side', '<u1'),
+    ('ts', '<f8'),
+    ('order_id', '<i8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+])
+
+# Outbound fills; within a symbol they are in execution order
+TRADE_DTYPE = np.dtype([
+    ('symbol', '<u4'),
+    ('ts', '<f8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+    ('maker_id', '<i8'),
+    ('taker_id', '<i8'),
+])
+
+
+def pack_messages(symbol_ids, block: EventBlock) -> np.ndarray:
+    """Columnar EventBlock plus a per-row symbol id column -> MESSAGE_DTYPE array."""
+    messages = np.empty(len(block), dtype=MESSAGE_DTYPE)
+    messages['symbol'] = symbol_ids
+    messages['kind'] = block.kind
+    messages['side'] = block.side
+    messages['ts'] = block.ts
+    messages['order_id'] = block.order_id
+    messages['price'] = block.price
+    messages['qty'] = block.qty
+    return messages
+
+
+class MultiSymbolEngine:
+    """
+    One Matcher per symbol id, created on first use from `book_factory`.
+
+    submit_messages() groups a message array by symbol with a stable sort,
+    so each symbol's events keep their arrival order (symbols are
+    independent, so their relative order does not matter), and hands each
+    group to that symbol's Matcher.submit_batch as a single EventBlock.
+    """
+
+    def __init__(self, book_factory: Callable[[], object] = DEFAULT_BOOK,
+                 protection_ticks: Optional[int] = None):
+        self.book_factory = book_factory
+        self.protection_ticks = protection_ticks
+        self.matchers: Dict[int, Matcher] = {}
+
+    def matcher(self, symbol_id: int) -> Matcher:
+        matcher = self.matchers.get(symbol_id)
+        if matcher is None:
+            matcher = self.matchers[symbol_id] = Matcher(self.book_factory(), self.protection_ticks)
+        return matcher
+
+    def submit_messages(self, messages: np.ndarray) -> np.ndarray:
+        if not len(messages):
+            return np.empty(0, dtype=TRADE_DTYPE)
+        order = np.argsort(messages['symbol'], kind='stable')
+        grouped = messages[order]
+        symbols = grouped['symbol']
+        bounds = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(grouped)]
+        out = []
+        for start, end in zip(starts, ends):
+            g = grouped[start:end]
+            symbol_id = int(symbols[start])
+            fills = self.matcher(symbol_id).submit_batch(
+                EventBlock(g['kind'], g['order_id'], g['ts'], g['side'], g['price'], g['qty']))
+            n = len(fills)
+            if n:
+                trades = np.empty(n, dtype=TRADE_DTYPE)
+                trades['symbol'] = symbol_id
+                trades['ts'] = fills.ts[:n]
+                trades['price'] = fills.price[:n]
+                trades['qty'] = fills.qty[:n]
+                trades['maker_id'] = fills.maker_id[:n]
+                trades['taker_id'] = fills.taker_id[:n]
+                out.append(trades)
+        return np.concatenate(out) if out else np.empty(0, dtype=TRADE_DTYPE)
+
+    def submit_block(self, symbol_ids, block: EventBlock) -> np.ndarray:
+        return self.submit_messages(pack_messages(symbol_ids, block))
+
+
+def _shard_worker(conn, book_factory, protection_ticks) -> None:
+    """Worker loop: message batches in, trade batches out, over one pipe."""
+    engine = MultiSymbolEngine(book_factory, protection_ticks)
+    while True:
+        payload = conn.recv_bytes()
+        if not payload:
+            break
+        if payload == b'depth':  # control request; message batches are multiples of 38 bytes
+            conn.send({sid: m.book.depth(k=10) for sid, m in engine.matchers.items()})
+            continue
+        trades = engine.submit_messages(np.frombuffer(payload, dtype=MESSAGE_DTYPE))
+        conn.send_bytes(trades.tobytes())
+    conn.close()
+
+
+class ShardedEngine:
+    """
+    Multi-symbol engine whose books live in `n_workers` processes.
+
+    Symbol names are registered to integer ids in first-seen order and
+    symbol id ``i`` is owned by worker ``i % n_workers``. Each batch is
+    split by owner with boolean masks (order-preserving), sent to every
+    worker as raw MESSAGE_DTYPE bytes over its pipe before any reply is
+    awaited, so the workers match in parallel; their trades come back as
+    raw TRADE_DTYPE bytes. A symbol's events always reach the same worker
+    in submission order, so per-symbol sequencing is preserved.
+    """
+
+    def __init__(self, n_workers: int = 2, book_factory: Callable[[], object] = DEFAULT_BOOK,
+                 protection_ticks: Optional[int] = None):
+        if n_workers <= 0:
+            raise ValueError("n_workers must be positive")
+        self.n_workers = n_workers
+        self.symbols: List[str] = []
+        self.symbol_ids: Dict[str, int] = {}
+        self.conns = []
+        self.workers = []
+        ctx = multiprocessing.get_context()
+        for _ in range(n_workers):
+            parent, child = ctx.Pipe()
+            worker = ctx.Process(target=_shard_worker, args=(child, book_factory, protection_ticks), daemon=True)
+            worker.start()
+            child.close()
+            self.conns.append(parent)
+            self.workers.append(worker)
+
+    def __enter__(self) -> 'ShardedEngine':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def symbol_id(self, symbol: str) -> int:
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
+
+    def register(self, symbols: Sequence[str]) -> np.ndarray:
+        return np.array([self.symbol_id(s) for s in symbols], dtype=np.uint32)
+
+    def submit_messages(self, messages: np.ndarray) -> np.ndarray:
+        """Match one batch across all shards; returns its trades grouped by shard."""
+        owner = messages['symbol'] % self.n_workers
+        busy = []
+        for shard, conn in enumerate(self.conns):
+            part = messages[owner == shard]
+            if len(part):
+                conn.send_bytes(part.tobytes())
+                busy.append(conn)
+        out = [np.frombuffer(conn.recv_bytes(), dtype=TRADE_DTYPE) for conn in busy]
+        return np.concatenate(out) if out else np.empty(0, dtype=TRADE_DTYPE)
+
+    def submit_block(self, symbol_ids, block: EventBlock) -> np.ndarray:
+        return self.submit_messages(pack_messages(symbol_ids, block))
+
+    def depth(self) -> Dict[str, dict]:
+        """Top-10 L2 depth of every symbol's book (collected from the workers)."""
+        out = {}
+        for conn in self.conns:
+            conn.send_bytes(b'depth')
+        for conn in self.conns:
+            for sid, depth in conn.recv().items():
+                out[self.symbols[sid] if sid < len(self.symbols) else sid] = depth
+        return out
+
+    def close(self) -> None:
+        for conn in self.conns:
+            try:
+                conn.send_bytes(b'')
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+        for conn in self.conns:
+            conn.close()
+        self.conns, self.workers = [], []
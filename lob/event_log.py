@@ -0,0 +1,178 @@
+# Binary event log: fixed-width order/trade records, streaming writer, mmap replay
+import struct
+from typing import Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+from .order import Order, OrderType
+from .events import EventBlock, EV_LIMIT, EV_MARKET, EV_CANCEL, EV_TRADE, EV_MODIFY
+from .trade_buffer import TradeBuffer
+
+MAGIC = b'LOBEVT01'
+HEADER = struct.Struct('<8sII')  # magic, record size, reserved
+HEADER_SIZE = HEADER.size
+
+# One little-endian 48-byte record per event. Order events use (kind, side,
+# ts, order_id, price, qty); trades store maker_id in order_id and taker_id
+# in aux. Unused fields are 0.
+RECORD_DTYPE = np.dtype([
+    ('kind', '<u1'),
+    ('side', '<u1'),
+    ('_pad', 'V6'),
+    ('ts', '<f8'),
+    ('order_id', '<i8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+    ('aux', '<i8'),
+])
+
+
+class EventLogWriter:
+    """
+    Streaming writer. Single events are staged in per-column lists and
+    written as one structured array every `chunk_size` events, so memory
+    stays bounded for any log length; columnar EventBlocks and TradeBuffers
+    are converted and written with vectorized copies.
+    """
+    _COLUMNS = ('kind', 'side', 'ts', 'order_id', 'price', 'qty')
+
+    def __init__(self, path: str, chunk_size: int = 65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+        self.staged = tuple([] for _ in self._COLUMNS)
+        self.records = 0
+
+    def __enter__(self) -> 'EventLogWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write_event(self, event: Tuple[str, Union[Order, int]]) -> None:
+        """Append one ('add', Order) / ('cancel', order_id) / ('modify', (id, qty, price)) event."""
+        etype, payload = event
+        kind, side, ts, order_id, price, qty = self.staged
+        if etype == 'cancel':
+            kind.append(EV_CANCEL)
+            side.append(0)
+            ts.append(0.0)
+            order_id.append(payload)
+            price.append(0)
+            qty.append(0)
+        elif etype == 'modify':
+            oid, new_qty, new_price = payload
+            kind.append(EV_MODIFY)
+            side.append(0)
+            ts.append(0.0)
+            order_id.append(oid)
+            price.append(new_price if new_price is not None else 0)
+            qty.append(new_qty)
+        else:
+            kind.append(EV_LIMIT if payload.type == OrderType.LIMIT else EV_MARKET)
+            side.append(int(payload.side))
+            ts.append(payload.ts)
+            order_id.append(payload.id)
+            price.append(payload.price if payload.price is not None else 0)
+            qty.append(payload.qty)
+        if len(kind) >= self.chunk_size:
+            self._flush_staged()
+
+    def write_events(self, events: Iterable[Tuple[str, Union[Order, int]]]) -> None:
+        for event in events:
+            self.write_event(event)
+
+    def _flush_staged(self) -> None:
+        staged = self.staged
+        if staged[0]:
+            self.staged = tuple([] for _ in self._COLUMNS)
+            self._write_records(len(staged[0]), **dict(zip(self._COLUMNS, staged)))
+
+    def _write_records(self, n: int, **columns) -> None:
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        for name, values in columns.items():
+            records[name] = values
+        self.file.write(records.tobytes())
+        self.records += n
+
+    def _write_columns(self, n: int, **columns) -> None:
+        self._flush_staged()  # keep record order
+        self._write_records(n, **columns)
+
+    def write_block(self, block: EventBlock) -> None:
+        """Append a columnar EventBlock (lists or NumPy columns)."""
+        self._write_columns(len(block), kind=block.kind, side=block.side, ts=block.ts,
+                            order_id=block.order_id, price=block.price, qty=block.qty)
+
+    def write_trades(self, fills: TradeBuffer) -> None:
+        """Append the fills in a TradeBuffer as EV_TRADE records."""
+        n = len(fills)
+        if n:
+            self._write_columns(n, kind=EV_TRADE, ts=fills.ts[:n], order_id=fills.maker_id[:n],
+                                price=fills.price[:n], qty=fills.qty[:n], aux=fills.taker_id[:n])
+
+    def flush(self) -> None:
+        self._flush_staged()
+        self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class EventLogReader:
+    """
+    Memory-mapped view of an event log. Nothing is read up front: blocks()
+    yields EventBlocks whose columns are NumPy views into the mapping, so
+    the OS pages the file in as replay reaches it and a multi-GB log never
+    has to fit in RAM.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise ValueError(f"{path}: not an event log (truncated header)")
+        magic, record_size, _ = HEADER.unpack(header)
+        if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: not an event log or unsupported format version")
+        self.path = path
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def blocks(self, block_size: int = 65536, trades: bool = False) -> Iterator[EventBlock]:
+        """
+        Yield consecutive EventBlocks of up to `block_size` records. Trade
+        records are dropped (a boolean-mask copy, only for blocks that
+        contain any) unless `trades` is set.
+        """
+        records = self.records
+        for start in range(0, len(records), block_size):
+            chunk = records[start:start + block_size]
+            if not trades:
+                is_trade = chunk['kind'] == EV_TRADE
+                if is_trade.any():
+                    chunk = chunk[~is_trade]
+            yield EventBlock(chunk['kind'], chunk['order_id'], chunk['ts'],
+                             chunk['side'], chunk['price'], chunk['qty'])
+
+    def trades(self) -> np.ndarray:
+        """All trade records (a copy)."""
+        return self.records[self.records['kind'] == EV_TRADE]
+
+
+def replay(reader: EventLogReader, matcher, block_size: int = 65536,
+           recorder: Optional[EventLogWriter] = None) -> int:
+    """
+    Feed every order event in the log to `matcher` block by block; returns
+    the number of fills. With `recorder`, the fills are written to it.
+    """
+    n_fills = 0
+    for block in reader.blocks(block_size):
+        fills = matcher.submit_batch(block)
+        n_fills += len(fills)
+        if recorder is not None:
+            recorder.write_trades(fills)
+    return n_fills
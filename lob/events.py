@@ -0,0 +1,87 @@
+# Order event codes and the columnar event block used for batch processing
+from typing import Iterable, Iterator, Tuple, Union
+from .order import Order, OrderType
+
+# Event kinds. EV_LIMIT/EV_MARKET share their codes with OrderType.
+EV_LIMIT = int(OrderType.LIMIT)
+EV_MARKET = int(OrderType.MARKET)
+EV_CANCEL = 3
+EV_TRADE = 4  # recorded executions (lob.event_log); never submitted
+EV_MODIFY = 5
+
+
+def _as_list(column) -> list:
+    return column.tolist() if hasattr(column, 'tolist') else list(column)
+
+
+class EventBlock:
+    """
+    Columnar block of order events. Row ``i`` is ``(kind[i], order_id[i],
+    ts[i], side[i], price[i], qty[i])``; for EV_CANCEL rows ``order_id`` is
+    the order to cancel and the other columns are ignored, EV_MODIFY rows
+    amend ``order_id`` to ``qty`` at ``price`` (0 keeps its price), and
+    market rows ignore ``price``. Columns may be lists or NumPy arrays.
+    """
+    __slots__ = ('kind', 'order_id', 'ts', 'side', 'price', 'qty')
+
+    def __init__(self, kind, order_id, ts, side, price, qty):
+        n = len(kind)
+        if not all(len(col) == n for col in (order_id, ts, side, price, qty)):
+            raise ValueError("EventBlock columns must have equal length.")
+        self.kind = kind
+        self.order_id = order_id
+        self.ts = ts
+        self.side = side
+        self.price = price
+        self.qty = qty
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def rows(self) -> Iterator[Tuple[int, int, float, int, int, int]]:
+        """Iterate rows as plain Python scalars (NumPy columns are converted once)."""
+        return zip(*(_as_list(col) for col in (self.kind, self.order_id, self.ts, self.side, self.price, self.qty)))
+
+    @classmethod
+    def from_events(cls, events: Iterable[Tuple[str, Union[Order, int]]]) -> 'EventBlock':
+        """
+        Build a block from ('add', Order) / ('cancel', order_id) /
+        ('modify', (order_id, new_qty, new_price)) tuples.
+        """
+        kind, order_id, ts, side, price, qty = [], [], [], [], [], []
+        for etype, payload in events:
+            if etype == 'cancel':
+                kind.append(EV_CANCEL)
+                order_id.append(payload)
+                ts.append(0.0)
+                side.append(0)
+                price.append(0)
+                qty.append(0)
+            elif etype == 'modify':
+                oid, new_qty, new_price = payload
+                kind.append(EV_MODIFY)
+                order_id.append(oid)
+                ts.append(0.0)
+                side.append(0)
+                price.append(new_price if new_price is not None else 0)
+                qty.append(new_qty)
+            else:
+                kind.append(int(payload.type))
+                order_id.append(payload.id)
+                ts.append(payload.ts)
+                side.append(int(payload.side))
+                price.append(payload.price if payload.price is not None else 0)
+                qty.append(payload.qty)
+        return cls(kind, order_id, ts, side, price, qty)
+
+    def to_events(self) -> Iterator[Tuple[str, Union[Order, int]]]:
+        """Inverse of from_events: yield ('add', Order) / ('cancel', order_id) / ('modify', ...)."""
+        for kind, oid, ts, side, price, qty in self.rows():
+            if kind == EV_CANCEL:
+                yield ('cancel', oid)
+            elif kind == EV_MODIFY:
+                yield ('modify', (oid, qty, price or None))
+            elif kind == EV_LIMIT:
+                yield ('add', Order(oid, ts, side, OrderType.LIMIT, price, qty))
+            else:
+                yield ('add', Order(oid, ts, side, OrderType.MARKET, None, qty))
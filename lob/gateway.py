@@ -0,0 +1,340 @@
+# asyncio order gateway: binary protocol over TCP/Unix sockets in front of a Matcher
+import asyncio
+import itertools
+import struct
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .events import EventBlock, EV_LIMIT, EV_MARKET, EV_CANCEL
+from .matcher import Matcher
+
+# Client -> gateway: one little-endian 40-byte record per message. `kind` is
+# EV_LIMIT/EV_MARKET/EV_CANCEL, `order_id` is the client's own id (unique
+# among its live orders; for cancels, the order to cancel) and `ts` is
+# opaque to the gateway and echoed back in the message's response.
+ORDER_MSG = struct.Struct('<BB6xdqqq')  # kind, side, ts, order_id, price, qty
+ORDER_DTYPE = np.dtype([
+    ('kind', '<u1'),
+    ('side', '<u1'),
+    ('_pad', 'V6'),
+    ('ts', '<f8'),
+    ('order_id', '<i8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+])
+
+# Gateway -> client: one 48-byte execution report per record
+REPORT_MSG = struct.Struct('<BB6xdqqqq')  # kind, side, ts, order_id, price, qty, aux
+REPORT_DTYPE = np.dtype([
+    ('kind', '<u1'),
+    ('side', '<u1'),
+    ('_pad', 'V6'),
+    ('ts', '<f8'),
+    ('order_id', '<i8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+    ('aux', '<i8'),
+])
+
+# Report kinds. Every inbound message gets exactly one response (ACK,
+# CANCELLED or REJECT) echoing its ts; fills and expiries follow on their own.
+ER_ACK = 1        # order accepted: qty is its qty
+ER_FILL = 2       # execution: price/qty of the fill, aux the order's remaining qty
+ER_CANCELLED = 3  # cancel done: qty is the qty removed
+ER_REJECT = 4     # message refused: aux is the REJ_* reason
+ER_EXPIRED = 5    # unfilled remainder of a market order: qty is the remainder
+
+# Reject reasons
+REJ_INVALID = 1       # bad kind, side, price or qty
+REJ_DUPLICATE_ID = 2  # order_id already live for this session
+REJ_UNKNOWN_ORDER = 3  # cancel of an order that is not (or no longer) live
+
+_REJECTED = 0  # internal pending-row kind: answered with a reject, never matched
+
+
+class Session(asyncio.Protocol):
+    """
+    One client connection. Decodes inbound records into the gateway's
+    pending batch and buffers outbound reports until the end of the batch.
+
+    Backpressure: reading is paused while the session has more than
+    `max_pending` messages waiting for the next batch, and while the
+    transport's write buffer is above its high-water mark (the client is
+    not reading its reports), so a fast or stalled client cannot grow the
+    gateway's memory without bound.
+    """
+
+    def __init__(self, gateway: 'OrderGateway'):
+        self.gateway = gateway
+        self.transport = None
+        self.partial = b''
+        self.orders: Dict[int, int] = {}  # client order_id -> engine order_id, live orders only
+        self.out: List[bytes] = []
+        self.pending = 0
+        self.read_paused = False
+        self.write_paused = False
+        self.closed = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.gateway.write_high_water)
+        self.gateway.sessions.add(self)
+
+    def data_received(self, data: bytes) -> None:
+        if self.partial:
+            data = self.partial + data
+        size = ORDER_MSG.size
+        end = len(data) - len(data) % size
+        self.partial = data[end:]
+        if end:
+            self.gateway._enqueue(self, ORDER_MSG.iter_unpack(memoryview(data)[:end]))
+            if self.pending > self.gateway.max_pending:
+                self._pause_reading()
+
+    def connection_lost(self, exc) -> None:
+        self.closed = True
+        self.gateway.sessions.discard(self)
+        self.gateway._cancel_all(self)
+
+    def pause_writing(self) -> None:
+        self.write_paused = True
+        self._pause_reading()
+
+    def resume_writing(self) -> None:
+        self.write_paused = False
+        self._resume_reading()
+
+    def _pause_reading(self) -> None:
+        if not self.read_paused and not self.closed:
+            self.read_paused = True
+            self.transport.pause_reading()
+
+    def _resume_reading(self) -> None:
+        if self.read_paused and not self.write_paused and self.pending <= self.gateway.max_pending:
+            self.read_paused = False
+            if not self.closed:
+                self.transport.resume_reading()
+
+    def report(self, kind: int, side: int, ts: float, order_id: int, price: int, qty: int, aux: int = 0) -> None:
+        if not self.closed:
+            self.out.append(REPORT_MSG.pack(kind, side, ts, order_id, price, qty, aux))
+
+    def _end_batch(self) -> None:
+        self.pending = 0
+        if self.out:
+            out, self.out = self.out, []
+            if not self.closed:
+                self.transport.write(b''.join(out))
+        self._resume_reading()
+
+
+class OrderGateway:
+    """
+    Network front end for a Matcher.
+
+    Messages from all sessions are queued as they arrive and matched as
+    one Matcher.submit_batch call per event-loop iteration (the flush runs
+    via call_soon once the current round of socket reads is done), so
+    batch size grows with load and the per-call overhead is amortized.
+    Reports are then generated in arrival order: each message's response,
+    then its fills (to both the taker and the resting maker), and written
+    with one transport write per session per batch.
+
+    Client order ids are per session; the gateway assigns engine ids and
+    keeps the live order table needed to route maker fills. When a
+    session disconnects, its resting orders are cancelled.
+    """
+
+    def __init__(self, matcher: Matcher, max_pending: int = 65536, write_high_water: int = 1 << 20):
+        self.matcher = matcher
+        self.max_pending = max_pending
+        self.write_high_water = write_high_water
+        self.sessions = set()
+        self.live: Dict[int, list] = {}  # engine id -> [session, client id, side, price, open qty]
+        self.next_id = itertools.count(1).__next__
+        self.rows: List[tuple] = []      # pending (kind, engine id, ts, side, price, qty, session, client id)
+        self.batches = 0
+        self.messages = 0
+        self._scheduled = False
+
+    # ---- serving ----------------------------------------------------------
+
+    async def serve_tcp(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        return await asyncio.get_running_loop().create_server(lambda: Session(self), host, port)
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        return await asyncio.get_running_loop().create_unix_server(lambda: Session(self), path)
+
+    # ---- inbound ----------------------------------------------------------
+
+    def _enqueue(self, session: Session, records) -> None:
+        rows = self.rows
+        orders = session.orders
+        n = len(rows)
+        for kind, side, ts, cid, price, qty in records:
+            if kind == EV_CANCEL:
+                eid = orders.get(cid)
+                if eid is None:
+                    rows.append((_REJECTED, REJ_UNKNOWN_ORDER, ts, 0, 0, 0, session, cid))
+                else:
+                    rows.append((EV_CANCEL, eid, ts, 0, 0, 0, session, cid))
+            elif (kind != EV_LIMIT and kind != EV_MARKET) or (side != 1 and side != 2) or qty <= 0 \
+                    or (kind == EV_LIMIT and price <= 0):
+                rows.append((_REJECTED, REJ_INVALID, ts, side, 0, 0, session, cid))
+            elif cid in orders:
+                rows.append((_REJECTED, REJ_DUPLICATE_ID, ts, side, 0, 0, session, cid))
+            else:
+                eid = orders[cid] = self.next_id()
+                rows.append((kind, eid, ts, side, price, qty, session, cid))
+        session.pending += len(rows) - n
+        self._schedule()
+
+    def _cancel_all(self, session: Session) -> None:
+        """Queue cancels for a session's live orders (and those still pending in this batch)."""
+        for cid, eid in session.orders.items():
+            self.rows.append((EV_CANCEL, eid, 0.0, 0, 0, 0, session, cid))
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self.rows and not self._scheduled:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    # ---- matching and reports ---------------------------------------------
+
+    def _flush(self) -> None:
+        self._scheduled = False
+        rows, self.rows = self.rows, []
+        if not rows:
+            return
+        matched = [row[:6] for row in rows if row[0] != _REJECTED]
+        fills = self.matcher.submit_batch(EventBlock(*zip(*matched)) if matched else ())
+        self.batches += 1
+        self.messages += len(rows)
+
+        # Walk the batch in arrival order, consuming each taker's fills (they are
+        # contiguous in the buffer), so the live table tracks the book exactly
+        live = self.live
+        n_fills = len(fills)
+        f = 0
+        touched = set()
+        for kind, eid, ts, side, price, qty, session, cid in rows:
+            touched.add(session)
+            if kind == _REJECTED:
+                session.report(ER_REJECT, side, ts, cid, 0, 0, eid)
+                continue
+            if kind == EV_CANCEL:
+                entry = live.pop(eid, None)
+                if entry is None:  # filled earlier in this batch
+                    session.report(ER_REJECT, 0, ts, cid, 0, 0, REJ_UNKNOWN_ORDER)
+                else:
+                    session.report(ER_CANCELLED, entry[2], ts, cid, entry[3], entry[4])
+                    del session.orders[cid]
+                continue
+            session.report(ER_ACK, side, ts, cid, price, qty)
+            while f < n_fills and fills.taker_id[f] == eid:
+                fill_ts, fill_price, fill_qty = fills.ts[f], fills.price[f], fills.qty[f]
+                qty -= fill_qty
+                session.report(ER_FILL, side, fill_ts, cid, fill_price, fill_qty, qty)
+                maker_id = fills.maker_id[f]
+                maker = live.get(maker_id)
+                f += 1
+                if maker is None:  # resting order placed directly on the book, not via the gateway
+                    continue
+                maker[4] -= fill_qty
+                maker_session = maker[0]
+                maker_session.report(ER_FILL, maker[2], fill_ts, maker[1], fill_price, fill_qty, maker[4])
+                touched.add(maker_session)
+                if not maker[4]:
+                    del live[maker_id]
+                    del maker_session.orders[maker[1]]
+            if not qty:
+                del session.orders[cid]
+            elif kind == EV_LIMIT:
+                live[eid] = [session, cid, side, price, qty]
+            else:
+                session.report(ER_EXPIRED, side, ts, cid, 0, qty)
+                del session.orders[cid]
+        for session in touched:
+            session._end_batch()
+
+
+class GatewayClient(asyncio.Protocol):
+    """
+    Client side of the protocol. Reports are decoded into REPORT_DTYPE
+    arrays and passed to `on_reports`; without a callback they are kept
+    and returned by reports().
+    """
+
+    def __init__(self, on_reports: Optional[Callable[[np.ndarray], None]] = None):
+        self.on_reports = on_reports
+        self.transport = None
+        self.partial = b''
+        self.received: List[np.ndarray] = []
+        self.n_received = 0
+        self.n_kept = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._wanted = 0
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int, **kw) -> 'GatewayClient':
+        _, client = await asyncio.get_running_loop().create_connection(lambda: cls(**kw), host, port)
+        return client
+
+    @classmethod
+    async def connect_unix(cls, path: str, **kw) -> 'GatewayClient':
+        _, client = await asyncio.get_running_loop().create_unix_connection(lambda: cls(**kw), path)
+        return client
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        if self.partial:
+            data = self.partial + data
+        end = len(data) - len(data) % REPORT_DTYPE.itemsize
+        self.partial = data[end:]
+        if not end:
+            return
+        reports = np.frombuffer(data, dtype=REPORT_DTYPE, count=end // REPORT_DTYPE.itemsize)
+        self.n_received += len(reports)
+        if self.on_reports is not None:
+            self.on_reports(reports)
+        else:
+            self.received.append(reports)
+            self.n_kept += len(reports)
+            if self._waiter is not None and self.n_kept >= self._wanted and not self._waiter.done():
+                self._waiter.set_result(None)
+
+    def send(self, kind: int, order_id: int, side: int = 0, price: int = 0, qty: int = 0, ts: float = 0.0) -> None:
+        self.transport.write(ORDER_MSG.pack(kind, side, ts, order_id, price, qty))
+
+    def send_messages(self, messages: np.ndarray) -> None:
+        """Send an ORDER_DTYPE array in one write."""
+        self.transport.write(messages.tobytes())
+
+    async def reports(self, n: int) -> np.ndarray:
+        """Wait until at least `n` reports are kept, then return and drop all of them."""
+        if self.n_kept < n:
+            self._wanted = n
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+            self._waiter = None
+        out = np.concatenate(self.received) if self.received else np.empty(0, dtype=REPORT_DTYPE)
+        self.received = []
+        self.n_kept = 0
+        return out
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def pack_orders(block: EventBlock) -> np.ndarray:
+    """EventBlock -> ORDER_DTYPE array; its order ids are used as client ids."""
+    messages = np.zeros(len(block), dtype=ORDER_DTYPE)
+    messages['kind'] = block.kind
+    messages['side'] = block.side
+    messages['ts'] = block.ts
+    messages['order_id'] = block.order_id
+    messages['price'] = block.price
+    messages['qty'] = block.qty
+    return messages
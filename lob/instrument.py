@@ -0,0 +1,35 @@
+# Instrument definition: tick size and price <-> integer tick conversion
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """
+    A tradable instrument with a fixed tick size.
+
+    Prices are converted to integer ticks once, where orders enter the
+    simulator (order construction, stream ingest); books, the matcher and
+    trades only ever see ints.
+    """
+    symbol: str
+    tick_size: float = 0.01
+
+    def __post_init__(self):
+        if self.tick_size <= 0:
+            raise ValueError("tick_size must be positive.")
+
+    def to_ticks(self, price: float) -> int:
+        """Nearest tick for a price, e.g. 100.07 -> 10007 with a 0.01 tick."""
+        return int(round(price / self.tick_size))
+
+    def to_price(self, ticks: int) -> float:
+        """Price of a tick, rounded to the tick size's decimal places."""
+        return round(ticks * self.tick_size, self.price_decimals)
+
+    @property
+    def price_decimals(self) -> int:
+        return max(0, -Decimal(str(self.tick_size)).normalize().as_tuple().exponent)
+
+
+DEFAULT_INSTRUMENT = Instrument('SYN', tick_size=0.01)
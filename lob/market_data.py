@@ -0,0 +1,265 @@
+# Market-data feed: L3 order events, L2 level deltas and sequenced snapshots
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from .order import Order, Side, OrderType
+from .matcher import Matcher
+
+# L3 event kinds
+MD_ADD = 1      # order rests (or an iceberg shows its next slice, at the back): qty is its resting qty
+MD_MODIFY = 2   # resting order changed in place: qty is its new qty
+MD_DELETE = 3   # order cancelled: qty is the qty removed
+MD_EXECUTE = 4  # resting order traded: qty is the executed qty; it leaves the book at 0
+
+
+class L3Event(NamedTuple):
+    seq: int
+    kind: int
+    order_id: int
+    side: int
+    price: int
+    qty: int
+
+
+class L2Delta(NamedTuple):
+    """New aggregate qty of one level; qty 0 means the level is gone."""
+    seq: int
+    side: int
+    price: int
+    qty: int
+
+
+class BookSnapshot(NamedTuple):
+    """
+    Full book as of L2 message `l2_seq` and L3 message `l3_seq`: levels from
+    the touch outward and orders as (order_id, side, price, qty), in queue
+    priority within each level. Messages with higher seqs apply on top.
+    """
+    l2_seq: int
+    l3_seq: int
+    bids: List[Tuple[int, int]]
+    asks: List[Tuple[int, int]]
+    orders: List[Tuple[int, int, int, int]]
+
+
+class MarketDataPublisher:
+    """
+    Publishes the changes a Matcher makes to its book.
+
+    Route order flow through submit()/cancel()/modify() instead of the
+    matcher and book. Every operation emits its L3 events (maker executions,
+    then the add of any resting remainder), then one L2 delta per level it
+    touched. Each channel numbers its messages 1, 2, 3, ... so consumers
+    can detect gaps, and snapshots carry both sequence numbers. Level aggregates
+    come from a shadow L2 book kept from the L3 events, so publishing works
+    the same over every backend and never calls depth(). Snapshots are
+    taken on demand or every `snapshot_interval` operations.
+
+    Iceberg orders publish only their visible slice. When a slice is
+    executed to 0 and the order refills from its hidden reserve, the new
+    slice is published as an MD_ADD (the order re-queues at the back of
+    its level). To know when that happens, the publisher keeps the
+    visible/reserve/peak of each resting iceberg that still has a reserve.
+    """
+
+    def __init__(self, matcher: Matcher, snapshot_interval: Optional[int] = None):
+        self.matcher = matcher
+        self.book = matcher.book
+        self.snapshot_interval = snapshot_interval
+        self.l2_seq = 0
+        self.l3_seq = 0
+        self.operations = 0
+        self.levels: Dict[int, Dict[int, int]] = {int(Side.BUY): {}, int(Side.SELL): {}}
+        self.l3_listeners: List[Callable[[L3Event], None]] = []
+        self.l2_listeners: List[Callable[[L2Delta], None]] = []
+        self.snapshot_listeners: List[Callable[[BookSnapshot], None]] = []
+        self._touched: Dict[Tuple[int, int], None] = {}  # levels changed by this operation, in order
+        self.icebergs: Dict[int, List[int]] = {}  # order id -> [visible, reserve, peak] as published
+        for order in self.book.order_map.values():
+            levels = self.levels[int(order.side)]
+            levels[order.price] = levels.get(order.price, 0) + order.qty
+            if order.reserve:
+                self.icebergs[order.id] = [order.qty, order.reserve, order.peak]
+
+    # ---- subscriptions ----------------------------------------------------
+
+    def subscribe_l3(self, callback: Callable[[L3Event], None]) -> None:
+        self.l3_listeners.append(callback)
+
+    def subscribe_l2(self, callback: Callable[[L2Delta], None]) -> None:
+        self.l2_listeners.append(callback)
+
+    def subscribe_snapshots(self, callback: Callable[[BookSnapshot], None]) -> None:
+        self.snapshot_listeners.append(callback)
+
+    # ---- order flow -------------------------------------------------------
+
+    def submit(self, order: Order):
+        """Match `order` via the matcher and publish the result; returns its fills."""
+        fills = self.matcher.submit_fills(order)
+        self._executions(fills, order.side)
+        if order.type == OrderType.LIMIT and order.qty > 0 and self.book.order_map.get(order.id) is order:
+            self._rested(order)
+        self._end_operation()
+        return fills
+
+    def cancel(self, order_id: int) -> bool:
+        order = self.book.order_map.get(order_id)
+        if order is None:
+            return False
+        side, price, qty = int(order.side), order.price, order.qty
+        if not self.book.cancel_order(order_id):
+            return False
+        self.icebergs.pop(order_id, None)
+        self._l3(MD_DELETE, order_id, side, price, qty, -qty)
+        self._end_operation()
+        return True
+
+    def mass_cancel(self, owner, side: Optional[Side] = None,
+                    price_range: Optional[Tuple[Optional[int], Optional[int]]] = None) -> int:
+        """Cancel an owner's orders (see OrderBook.mass_cancel) as one operation; returns how many."""
+        cancelled = self.book.mass_cancel(owner, side, price_range)
+        for order in cancelled:
+            self.icebergs.pop(order.id, None)
+            self._l3(MD_DELETE, order.id, int(order.side), order.price, order.qty, -order.qty)
+        if cancelled:
+            self._end_operation()
+        return len(cancelled)
+
+    def modify(self, order_id: int, new_qty: int, new_price: Optional[int] = None) -> bool:
+        """
+        Amend a resting order (see OrderBook.modify_order; an iceberg's
+        new_qty is its total). A qty reduction at the same price keeps queue
+        priority and publishes MD_MODIFY of the new visible qty (nothing if
+        only the hidden reserve shrank); new_qty 0 publishes MD_DELETE; a
+        price change or qty increase re-queues the order, published as
+        MD_DELETE, the executions of any crossing, then MD_ADD of what
+        rests. Returns False, publishing nothing, if the order is not
+        resting or the book rejected the amend (a crossing POST_ONLY amend).
+        """
+        order = self.book.order_map.get(order_id)
+        if order is None:
+            return False
+        if new_qty < 0:
+            raise ValueError("new_qty must be non-negative.")
+        if new_qty == 0:
+            return self.cancel(order_id)
+        side, price, old_qty = int(order.side), order.price, order.qty
+        if (new_price is None or new_price == price) and new_qty <= old_qty + order.reserve:
+            self.book.modify_order(order_id, new_qty)
+            if not order.reserve:
+                self.icebergs.pop(order_id, None)
+            elif order_id in self.icebergs:
+                self.icebergs[order_id][:2] = order.qty, order.reserve
+            if order.qty != old_qty:
+                self._l3(MD_MODIFY, order_id, side, price, order.qty, order.qty - old_qty)
+                self._end_operation()
+            return True
+        fills = self.matcher.fills
+        fills.clear()
+        if not self.book.modify_order(order_id, new_qty, new_price, fills):
+            return False
+        self.icebergs.pop(order_id, None)
+        self._l3(MD_DELETE, order_id, side, price, old_qty, -old_qty)
+        self._executions(fills, order.side)
+        if order.qty > 0 and self.book.order_map.get(order_id) is order:
+            self._rested(order)
+        self._end_operation()
+        return True
+
+    # ---- snapshots --------------------------------------------------------
+
+    def snapshot(self) -> BookSnapshot:
+        bids = sorted(self.levels[int(Side.BUY)].items(), reverse=True)
+        asks = sorted(self.levels[int(Side.SELL)].items())
+        # Walk the levels: iceberg refills re-queue orders, so arrival order is not queue order
+        orders = [(o.id, int(o.side), o.price, o.qty) for side in (Side.BUY, Side.SELL)
+                  for level in self.book.levels_from_touch(side) for o in level]
+        return BookSnapshot(self.l2_seq, self.l3_seq, bids, asks, orders)
+
+    def publish_snapshot(self) -> BookSnapshot:
+        snap = self.snapshot()
+        for callback in self.snapshot_listeners:
+            callback(snap)
+        return snap
+
+    # ---- internals --------------------------------------------------------
+
+    def _rested(self, order: Order) -> None:
+        """Publish the add of an order that now rests, tracking it if it is an iceberg."""
+        self._l3(MD_ADD, order.id, int(order.side), order.price, order.qty, order.qty)
+        if order.reserve:
+            self.icebergs[order.id] = [order.qty, order.reserve, order.peak]
+
+    def _executions(self, fills, taker_side: Side) -> None:
+        """Publish the maker executions in `fills`, and the refill of each iceberg slice they exhaust."""
+        maker_side = int(Side.SELL if taker_side == Side.BUY else Side.BUY)
+        icebergs = self.icebergs
+        for i in range(len(fills)):
+            maker_id, price, qty = fills.maker_id[i], fills.price[i], fills.qty[i]
+            self._l3(MD_EXECUTE, maker_id, maker_side, price, qty, -qty)
+            iceberg = icebergs.get(maker_id)
+            if iceberg is None:
+                continue
+            iceberg[0] -= qty
+            if iceberg[0] == 0:
+                # Same slice as PriceLevel.refill: up to peak from the reserve
+                visible = min(iceberg[1], iceberg[2])
+                self._l3(MD_ADD, maker_id, maker_side, price, visible, visible)
+                if visible == iceberg[1]:
+                    del icebergs[maker_id]  # last slice: from here on a plain order
+                else:
+                    iceberg[0], iceberg[1] = visible, iceberg[1] - visible
+
+    def _l3(self, kind: int, order_id: int, side: int, price: int, qty: int, change: int) -> None:
+        """Publish one L3 event; `change` is its signed effect on the level's qty."""
+        levels = self.levels[side]
+        levels[price] = levels.get(price, 0) + change
+        self._touched[(side, price)] = None
+        self.l3_seq += 1
+        if self.l3_listeners:
+            event = L3Event(self.l3_seq, kind, order_id, side, price, qty)
+            for callback in self.l3_listeners:
+                callback(event)
+
+    def _end_operation(self) -> None:
+        touched, self._touched = self._touched, {}
+        for side, price in touched:
+            levels = self.levels[side]
+            qty = levels.get(price, 0)
+            if qty == 0:
+                levels.pop(price, None)
+            self.l2_seq += 1
+            if self.l2_listeners:
+                delta = L2Delta(self.l2_seq, side, price, qty)
+                for callback in self.l2_listeners:
+                    callback(delta)
+        self.operations += 1
+        if self.snapshot_interval and self.operations % self.snapshot_interval == 0:
+            self.publish_snapshot()
+
+
+class L2BookView:
+    """Downstream L2 book rebuilt from a BookSnapshot plus later L2Deltas."""
+
+    def __init__(self):
+        self.seq = 0
+        self.levels: Dict[int, Dict[int, int]] = {int(Side.BUY): {}, int(Side.SELL): {}}
+
+    def apply_snapshot(self, snap: BookSnapshot) -> None:
+        self.seq = snap.l2_seq
+        self.levels = {int(Side.BUY): dict(snap.bids), int(Side.SELL): dict(snap.asks)}
+
+    def apply(self, delta: L2Delta) -> None:
+        if delta.seq <= self.seq:
+            return  # already in the snapshot
+        if delta.seq != self.seq + 1:
+            raise ValueError(f"L2 gap: expected seq {self.seq + 1}, got {delta.seq}")
+        self.seq = delta.seq
+        if delta.qty:
+            self.levels[delta.side][delta.price] = delta.qty
+        else:
+            self.levels[delta.side].pop(delta.price, None)
+
+    def depth(self, k: int = 5) -> Dict[str, List[Tuple[int, int]]]:
+        bids = sorted(self.levels[int(Side.BUY)].items(), reverse=True)[:k]
+        asks = sorted(self.levels[int(Side.SELL)].items())[:k]
+        return {'bids': bids, 'asks': asks}
@@ -1,86 +1,104 @@
 
-from .order import Order, Trade, Side, OrderType
+from typing import Optional
+from .order import Order, Trade, Side, OrderType, TimeInForce
 from .book_base import OrderBook
+from .trade_buffer import TradeBuffer
+from .events import EventBlock, EV_LIMIT, EV_CANCEL, EV_MODIFY
 
 
 class Matcher:
-    def __init__(self, book: OrderBook):
+    def __init__(self, book: OrderBook, protection_ticks: Optional[int] = None):
         self.book = book
+        self.fills = TradeBuffer()
+        # Market orders never trade more than this many ticks through the touch
+        self.protection_ticks = protection_ticks
 
     def submit(self, order: Order) -> list:
-        trades = []
+        return self.submit_fills(order).to_trades()
+
+    def submit_fills(self, order: Order) -> TradeBuffer:
+        """
+        Process one order and return its fills in the matcher's reusable
+        TradeBuffer (overwritten by the next call). The book was uncrossed
+        before this order arrived, so only the incoming order can trade:
+        limit orders take liquidity up to their price and rest the remainder,
+        market orders sweep and leave their unfilled remainder in `order.qty`.
+        `order.tif` is honoured natively (see OrderBook.match_incoming); a
+        market FOK order is checked with can_fill() within price protection.
+        """
+        fills = self.fills
+        fills.clear()
         if order.type == OrderType.LIMIT:
-            self.book.add_order(order)
-            trades = self.book.match()
+            self.book.match_incoming(order, fills)
         elif order.type == OrderType.MARKET:
-            trades = self._match_market(order)
-        return trades
+            self._match_market(order, fills)
+        return fills
+
+    def modify(self, order_id: int, new_qty: int, new_price: Optional[int] = None) -> list:
+        return self.modify_fills(order_id, new_qty, new_price).to_trades()
+
+    def modify_fills(self, order_id: int, new_qty: int, new_price: Optional[int] = None) -> TradeBuffer:
+        """
+        Amend a resting order (see OrderBook.modify_order) and return the
+        fills of a re-queued order that crossed, in the reusable TradeBuffer.
+        Quantity reductions keep priority; price changes and increases
+        re-queue at the back.
+        """
+        fills = self.fills
+        fills.clear()
+        self.book.modify_order(order_id, new_qty, new_price, fills)
+        return fills
 
-    def _match_market(self, order: Order) -> list:
-        trades = []
-        qty_remaining = order.qty
-        # Use depth() to get sorted price levels and quantities
-        if order.side == Side.BUY:
-            # Match against asks from lowest price up
-            depth = self.book.depth(k=1000000)  # large k to get all levels
-            for price, level_qty in depth['asks']:
-                while level_qty > 0 and qty_remaining > 0:
-                    # Find the first order at this price
-                    ask_orders = self._get_orders_at_price(orderbook=self.book, side=Side.SELL, price=price)
-                    if not ask_orders:
-                        break
-                    ask_order = ask_orders[0]
-                    trade_qty = min(qty_remaining, ask_order.qty)
-                    trade = Trade(
-                        ts=max(order.ts, ask_order.ts),
-                        price=price,
-                        qty=trade_qty,
-                        maker_id=ask_order.id,
-                        taker_id=order.id
-                    )
-                    trades.append(trade)
-                    ask_order.qty -= trade_qty
-                    qty_remaining -= trade_qty
-                    if ask_order.qty == 0:
-                        self.book.cancel_order(ask_order.id)
-                    level_qty -= trade_qty
-                if qty_remaining == 0:
-                    break
+    def submit_batch(self, events) -> TradeBuffer:
+        """
+        Process a block of events in order, with exactly the semantics of
+        submitting them one by one (cancels go to book.cancel_order, amends
+        to book.modify_order). `events` is an EventBlock or an iterable of
+        ('add', Order) / ('cancel', id) / ('modify', (id, new_qty, new_price)).
+        Returns the fills of the whole batch in the matcher's TradeBuffer.
+        """
+        fills = self.fills
+        fills.clear()
+        match_incoming = self.book.match_incoming
+        cancel = self.book.cancel_order
+        modify = self.book.modify_order
+        market = self._match_market
+        limit_type, market_type = OrderType.LIMIT, OrderType.MARKET
+        if isinstance(events, EventBlock):
+            for kind, oid, ts, side, price, qty in events.rows():
+                if kind == EV_LIMIT:
+                    match_incoming(Order(oid, ts, side, limit_type, price, qty), fills)
+                elif kind == EV_CANCEL:
+                    cancel(oid)
+                elif kind == EV_MODIFY:
+                    modify(oid, qty, price or None, fills)
+                else:
+                    market(Order(oid, ts, side, market_type, None, qty), fills)
         else:
-            # Match against bids from highest price down
-            depth = self.book.depth(k=1000000)
-            for price, level_qty in depth['bids']:
-                while level_qty > 0 and qty_remaining > 0:
-                    bid_orders = self._get_orders_at_price(orderbook=self.book, side=Side.BUY, price=price)
-                    if not bid_orders:
-                        break
-                    bid_order = bid_orders[0]
-                    trade_qty = min(qty_remaining, bid_order.qty)
-                    trade = Trade(
-                        ts=max(order.ts, bid_order.ts),
-                        price=price,
-                        qty=trade_qty,
-                        maker_id=bid_order.id,
-                        taker_id=order.id
-                    )
-                    trades.append(trade)
-                    bid_order.qty -= trade_qty
-                    qty_remaining -= trade_qty
-                    if bid_order.qty == 0:
-                        self.book.cancel_order(bid_order.id)
-                    level_qty -= trade_qty
-                if qty_remaining == 0:
-                    break
-        return trades
+            for etype, payload in events:
+                if etype == 'cancel':
+                    cancel(payload)
+                elif etype == 'modify':
+                    modify(*payload, fills)
+                elif payload.type == limit_type:
+                    match_incoming(payload, fills)
+                elif payload.type == market_type:
+                    market(payload, fills)
+        return fills
 
-    def _get_orders_at_price(self, orderbook, side, price):
-        # This method should be implemented in each book backend for full decoupling
-        # For now, we assume the book has a method get_orders_at_price(side, price)
-        if hasattr(orderbook, 'get_orders_at_price'):
-            return orderbook.get_orders_at_price(side, price)
-        # Fallback: try to access bids/asks dict if present
-        if side == Side.BUY and hasattr(orderbook, 'bids'):
-            return list(orderbook.bids.get(price, []))
-        if side == Side.SELL and hasattr(orderbook, 'asks'):
-            return list(orderbook.asks.get(price, []))
-        return []
+    def _match_market(self, order: Order, fills: TradeBuffer) -> int:
+        limit = None
+        if self.protection_ticks is not None:
+            if order.side == Side.BUY:
+                touch = self.book.best_ask()
+                limit = touch[0] + self.protection_ticks if touch else None
+            else:
+                touch = self.book.best_bid()
+                limit = touch[0] - self.protection_ticks if touch else None
+        if order.tif:
+            if order.tif == TimeInForce.FOK:
+                if not self.book.can_fill(order.side, order.qty, limit):
+                    return order.qty
+            elif order.tif == TimeInForce.POST_ONLY:
+                return order.qty  # a market order can only take liquidity
+        return self.book.sweep(order, fills, limit)
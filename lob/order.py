@@ -1,30 +1,93 @@
-from dataclasses import dataclass
-from enum import Enum, auto
+from enum import IntEnum
 from typing import Optional
 
-class Side(Enum):
-    BUY = auto()
-    SELL = auto()
+# Side and type are int-coded so they are cheap to store and compare, and the
+# codes are shared by lob.order and order_book.order.
+class Side(IntEnum):
+    BUY = 1
+    SELL = 2
 
-class OrderType(Enum):
-    LIMIT = auto()
-    MARKET = auto()
+class OrderType(IntEnum):
+    LIMIT = 1
+    MARKET = 2
+
+class TimeInForce(IntEnum):
+    GTC = 0        # rest any limit remainder (default)
+    IOC = 1        # trade what crosses now, never rest
+    FOK = 2        # trade the full qty now or nothing
+    POST_ONLY = 3  # rest without trading; rejected if it would cross
 
-@dataclass
 class Order:
-    id: int
-    ts: float
-    side: Side
-    type: OrderType
-    price: Optional[float]
-    qty: int
-    owner: Optional[str] = None
-    flags: Optional[str] = None
-
-@dataclass
+    """Resting/incoming order. Slotted: no per-instance __dict__."""
+    __slots__ = ('id', 'ts', 'side', 'type', 'price', 'qty', 'owner', 'flags', 'tif', 'peak', 'reserve',
+                 'prev', 'next')
+
+    def __init__(self, id: int, ts: float, side: Side, type: OrderType, price: Optional[int], qty: int,
+                 owner: Optional[str] = None, flags: Optional[str] = None,
+                 tif: TimeInForce = TimeInForce.GTC, peak: int = 0):
+        self.id = id
+        self.ts = ts
+        self.side = side
+        self.type = type
+        self.price = price  # integer ticks, see lob.instrument.Instrument
+        self.qty = qty
+        self.owner = owner
+        self.flags = flags
+        self.tif = tif
+        # Iceberg: when resting, only `peak` of the qty is shown (in `qty`, and
+        # in the level totals) and the rest is held back in `reserve`
+        self.peak = peak
+        self.reserve = 0
+        # Intrusive links for the price-level FIFO (see order_book.level.PriceLevel)
+        self.prev: Optional['Order'] = None
+        self.next: Optional['Order'] = None
+
+    def _fields(self):
+        return (self.id, self.ts, self.side, self.type, self.price, self.qty, self.owner, self.flags,
+                self.tif, self.peak)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields() and self.reserve == other.reserve
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Pickle without the queue links, which would drag the whole level along
+        return (self.__class__, self._fields(), self.reserve)
+
+    def __setstate__(self, reserve):
+        self.reserve = reserve
+
+    def __repr__(self):
+        return (f"Order(id={self.id!r}, ts={self.ts!r}, side={self.side!r}, type={self.type!r}, "
+                f"price={self.price!r}, qty={self.qty!r}, owner={self.owner!r}, flags={self.flags!r}, "
+                f"tif={self.tif!r}, peak={self.peak!r}, reserve={self.reserve!r})")
+
 class Trade:
-    ts: float
-    price: float
-    qty: int
-    maker_id: int
-    taker_id: int
+    __slots__ = ('ts', 'price', 'qty', 'maker_id', 'taker_id')
+
+    def __init__(self, ts: float, price: int, qty: int, maker_id: int, taker_id: int):
+        self.ts = ts
+        self.price = price
+        self.qty = qty
+        self.maker_id = maker_id
+        self.taker_id = taker_id
+
+    def _fields(self):
+        return (self.ts, self.price, self.qty, self.maker_id, self.taker_id)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, self._fields())
+
+    def __repr__(self):
+        return (f"Trade(ts={self.ts!r}, price={self.price!r}, qty={self.qty!r}, "
+                f"maker_id={self.maker_id!r}, taker_id={self.taker_id!r})")
@@ -0,0 +1,147 @@
+# Binary snapshots of full L3 book state, for warm starts without replaying warmup flow
+import gc
+import struct
+from itertools import repeat
+from operator import attrgetter
+from typing import Callable
+import numpy as np
+from order_book.bulk import link_levels
+from .book_custom import CustomOrderBook
+from .order import Order, Side, OrderType, TimeInForce
+
+MAGIC = b'LOBSNP02'
+HEADER = struct.Struct('<8sIIQQ')  # magic, record size, string count, order count, string table bytes
+HEADER_SIZE = HEADER.size
+
+# One 64-byte record per resting order. Records are grouped by level (bids
+# from the touch outward, then asks) and in queue priority within a level.
+# qty is the visible qty; iceberg orders also keep their peak and hidden
+# reserve. owner/flags index the string table that follows the records
+# (-1 = None).
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('order_id', '<i8'),
+    ('price', '<i8'),
+    ('qty', '<i8'),
+    ('peak', '<i8'),
+    ('reserve', '<i8'),
+    ('owner', '<i4'),
+    ('flags', '<i4'),
+    ('side', '<u1'),
+    ('tif', '<u1'),
+    ('_pad', 'V6'),
+])
+
+_SIDES = (None, Side.BUY, Side.SELL)  # side code -> Side
+_TIFS = tuple(TimeInForce)  # tif code -> TimeInForce
+_NUMERIC_FIELDS = attrgetter('ts', 'id', 'price', 'qty', 'peak', 'reserve')
+_NUMERIC_DTYPE = np.dtype([('ts', '<f8'), ('order_id', '<i8'), ('price', '<i8'), ('qty', '<i8'),
+                           ('peak', '<i8'), ('reserve', '<i8')])
+
+
+def save_snapshot(book, path: str) -> int:
+    """
+    Write every resting order of `book` (any backend) with its level and
+    queue position; returns the number of orders written. Derived
+    structures (heaps, sorted dicts, ladders, cached totals) are not
+    stored: load_snapshot() rebuilds them in bulk.
+    """
+    bids = [order for level in book.levels_from_touch(Side.BUY) for order in level]
+    asks = [order for level in book.levels_from_touch(Side.SELL) for order in level]
+    orders = bids + asks
+    n = len(orders)
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records['side'][:len(bids)] = int(Side.BUY)
+    records['side'][len(bids):] = int(Side.SELL)
+    numeric = np.fromiter(map(_NUMERIC_FIELDS, orders), dtype=_NUMERIC_DTYPE, count=n)
+    for name in _NUMERIC_DTYPE.names:
+        records[name] = numeric[name]
+    tifs = [o.tif for o in orders]
+    if tifs.count(TimeInForce.GTC) != n:
+        records['tif'] = [int(t) for t in tifs]
+    strings = {}
+    for column in ('owner', 'flags'):
+        values = list(map(attrgetter(column), orders))
+        if values.count(None) == n:
+            records[column] = -1
+        else:
+            records[column] = [-1 if v is None else strings.setdefault(v, len(strings)) for v in values]
+    for s in strings:
+        if not isinstance(s, str) or '\0' in s:
+            raise ValueError(f"cannot snapshot owner/flags value {s!r}: must be a str without NUL")
+    table = b'\0'.join(s.encode() for s in strings)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, len(strings), len(orders), len(table)))
+        f.write(records.tobytes())
+        f.write(table)
+    return len(orders)
+
+
+def _string_column(codes: np.ndarray, strings: list):
+    if not len(codes) or codes.max() < 0:
+        return repeat(None)
+    table = strings + [None]  # code -1 picks the trailing None
+    return map(table.__getitem__, codes.tolist())
+
+
+def load_snapshot(path: str, book_factory: Callable[[], object] = CustomOrderBook):
+    """
+    Rebuild a book from a snapshot into a new `book_factory()` book (any
+    backend, not necessarily the one that was saved). Orders are created
+    in one pass, linked into their levels in one pass, and handed to the
+    book's load_levels() for a single bulk build of its price structure.
+    The cyclic GC is paused meanwhile: every object created is kept, and
+    collections triggered by millions of new orders would only re-scan them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load(path, book_factory)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load(path: str, book_factory: Callable[[], object]):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{path}: not a book snapshot (truncated header)")
+    magic, record_size, n_strings, n, table_size = HEADER.unpack_from(data)
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: not a book snapshot or unsupported format version")
+    end = HEADER_SIZE + n * RECORD_DTYPE.itemsize
+    if len(data) != end + table_size:
+        raise ValueError(f"{path}: truncated book snapshot")
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=n, offset=HEADER_SIZE)
+    strings = [s.decode() for s in data[end:].split(b'\0')] if n_strings else []
+
+    side = records['side']
+    price = records['price']
+    tif = records['tif']
+    if n and not np.isin(side, (int(Side.BUY), int(Side.SELL))).all():
+        raise ValueError(f"{path}: invalid side code in book snapshot")
+    if n and tif.max() >= len(_TIFS):
+        raise ValueError(f"{path}: invalid time-in-force code in book snapshot")
+    if n and ((records['qty'] <= 0).any() or (records['peak'] < 0).any() or (records['reserve'] < 0).any()):
+        raise ValueError(f"{path}: non-positive qty or negative peak/reserve in book snapshot")
+
+    ids = records['order_id'].tolist()
+    orders = list(map(Order, ids, records['ts'].tolist(), map(_SIDES.__getitem__, side.tolist()),
+                      repeat(OrderType.LIMIT), price.tolist(), records['qty'].tolist(),
+                      _string_column(records['owner'], strings), _string_column(records['flags'], strings),
+                      map(_TIFS.__getitem__, tif.tolist()) if tif.any() else repeat(TimeInForce.GTC),
+                      records['peak'].tolist()))
+    reserve = records['reserve']
+    for i in np.flatnonzero(reserve).tolist():
+        orders[i].reserve = int(reserve[i])
+    order_map = dict(zip(ids, orders))
+    if len(order_map) != n:
+        raise ValueError(f"{path}: duplicate order ids in book snapshot")
+    bids, asks = link_levels(orders, side, price, records['qty'])
+    if len({lvl.price for lvl in bids}) != len(bids) or len({lvl.price for lvl in asks}) != len(asks):
+        raise ValueError(f"{path}: a price level is split in the book snapshot")
+
+    book = book_factory()
+    book.load_levels(bids, asks, order_map)
+    return book
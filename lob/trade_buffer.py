@@ -0,0 +1,63 @@
+# Reusable columnar fill buffer for the matching hot path
+from typing import Iterator, List
+from .order import Trade
+
+
+class TradeBuffer:
+    """
+    Fills stored as parallel columns (ts, price, qty, maker_id, taker_id).
+
+    The columns are preallocated and overwritten in place: ``clear()`` only
+    resets ``size``, so matching appends fills without building a Trade
+    object per fill. Use ``to_trades()`` when Trade objects are needed.
+    """
+    __slots__ = ('ts', 'price', 'qty', 'maker_id', 'taker_id', 'size', 'capacity')
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(1, capacity)
+        self.ts = [0.0] * self.capacity
+        self.price = [0] * self.capacity
+        self.qty = [0] * self.capacity
+        self.maker_id = [0] * self.capacity
+        self.taker_id = [0] * self.capacity
+        self.size = 0
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def _grow(self) -> None:
+        extra = self.capacity
+        self.ts.extend([0.0] * extra)
+        self.price.extend([0] * extra)
+        self.qty.extend([0] * extra)
+        self.maker_id.extend([0] * extra)
+        self.taker_id.extend([0] * extra)
+        self.capacity += extra
+
+    def append(self, ts: float, price: int, qty: int, maker_id: int, taker_id: int) -> None:
+        n = self.size
+        if n == self.capacity:
+            self._grow()
+        self.ts[n] = ts
+        self.price[n] = price
+        self.qty[n] = qty
+        self.maker_id[n] = maker_id
+        self.taker_id[n] = taker_id
+        self.size = n + 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> Trade:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("TradeBuffer index out of range")
+        return Trade(self.ts[i], self.price[i], self.qty[i], self.maker_id[i], self.taker_id[i])
+
+    def __iter__(self) -> Iterator[Trade]:
+        for i in range(self.size):
+            yield Trade(self.ts[i], self.price[i], self.qty[i], self.maker_id[i], self.taker_id[i])
+
+    def to_trades(self) -> List[Trade]:
+        return list(self)
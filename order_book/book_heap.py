@@ -1,98 +1,223 @@
 # heapq-based order book implementation
 import heapq
-from collections import deque
-from typing import Dict, List, Tuple
-from .order import Order, Trade, Side, OrderType
-
-class HeapOrderBook:
-    def __init__(self):
-        self.bid_heap: List[float] = []  # max-heap (store -price)
-        self.ask_heap: List[float] = []  # min-heap
-        self.bids: Dict[float, deque] = {}
-        self.asks: Dict[float, deque] = {}
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from .bulk import bulk_levels
+from .depth import DepthArrays, level_arrays
+from .level import PriceLevel, check_book
+from .owners import OwnerIndex
+from .matching import MatchingBook
+from .order import Order, Trade, Side
+
+# Compaction floor: heaps are never rebuilt for fewer stale entries than this
+COMPACT_MIN_STALE = 64
+
+
+class HeapOrderBook(MatchingBook):
+    """
+    Order book with a dict of levels per side and a heap of prices for the
+    touch. Emptied levels leave their heap entry behind (lazy deletion);
+    each price has at most one entry (``bid_entries``/``ask_entries``), so
+    a price that empties and refills reuses it, and once stale entries
+    exceed ``compact_ratio`` times the live levels (plus
+    COMPACT_MIN_STALE) the heap is rebuilt from the live prices. Heap size
+    and stale entries are therefore bounded by the live levels.
+    """
+    trade_cls = Trade
+
+    def __init__(self, check_consistency: bool = False, compact_ratio: float = 0.5):
+        self.bid_heap: List[int] = []  # max-heap (store -price)
+        self.ask_heap: List[int] = []  # min-heap
+        self.bid_entries: Set[int] = set()  # prices with an entry in bid_heap, live or stale
+        self.ask_entries: Set[int] = set()
+        self.compact_ratio = compact_ratio
+        self.compactions = 0
+        self.stale_pops = 0  # stale entries popped lazily at the touch
+        self.bids: Dict[int, PriceLevel] = {}
+        self.asks: Dict[int, PriceLevel] = {}
         self.order_map: Dict[int, Order] = {}
+        self.owners = OwnerIndex()  # owner -> resting orders, for mass_cancel
+        self.bid_qty = 0  # total resting qty per side, kept incrementally
+        self.ask_qty = 0
+        # Re-verify every level aggregate after each mutation (slow; for tests)
+        self.check_consistency = check_consistency
 
-    def add_order(self, order: Order):
-        if order.type == OrderType.LIMIT:
-            if order.price is None:
-                raise ValueError("Limit order must have a price.")
-            if order.side == Side.BUY:
-                if order.price not in self.bids:
-                    self.bids[order.price] = deque()
-                    heapq.heappush(self.bid_heap, -order.price)
-                self.bids[order.price].append(order)
-            else:
-                if order.price not in self.asks:
-                    self.asks[order.price] = deque()
-                    heapq.heappush(self.ask_heap, order.price)
-                self.asks[order.price].append(order)
-            self.order_map[order.id] = order
-        elif order.type == OrderType.MARKET:
-            pass  # Matching logic elsewhere
-
-    def cancel_order(self, order_id: int) -> bool:
-        order = self.order_map.get(order_id)
-        if not order or order.type != OrderType.LIMIT or order.price is None:
-            return False
-        book = self.bids if order.side == Side.BUY else self.asks
-        queue = book.get(order.price)
-        if queue:
-            for idx, o in enumerate(queue):
-                if o.id == order_id:
-                    del queue[idx]
-                    del self.order_map[order_id]
-                    if not queue:
-                        del book[order.price]
-                    # Lazy deletion: don't remove price from heap yet
-                    return True
-        return False
-
-    def best_bid(self):
-        while self.bid_heap:
-            price = -self.bid_heap[0]
-            if price in self.bids and self.bids[price]:
-                return price, sum(o.qty for o in self.bids[price])
-            heapq.heappop(self.bid_heap)  # lazy cleanup
-        return None
+    @classmethod
+    def from_orders(cls, orders, match: bool = False, **kwargs) -> 'HeapOrderBook':
+        """New book bulk-loaded with `orders` (see bulk_load)."""
+        book = cls(**kwargs)
+        book.bulk_load(orders, match)
+        return book
 
-    def best_ask(self):
-        while self.ask_heap:
-            price = self.ask_heap[0]
-            if price in self.asks and self.asks[price]:
-                return price, sum(o.qty for o in self.asks[price])
-            heapq.heappop(self.ask_heap)
+    def _level(self, side: Side, price: int) -> PriceLevel:
+        return self.bids[price] if side == Side.BUY else self.asks[price]
+
+    def _open_level(self, side: Side, price: int) -> PriceLevel:
+        if side == Side.BUY:
+            book, heap, entries, key = self.bids, self.bid_heap, self.bid_entries, -price
+        else:
+            book, heap, entries, key = self.asks, self.ask_heap, self.ask_entries, price
+        level = book.get(price)
+        if level is None:
+            level = book[price] = PriceLevel(price)
+            if price not in entries:  # else its stale entry is live again
+                entries.add(price)
+                heapq.heappush(heap, key)
+        return level
+
+    def _touch(self, side: Side) -> Optional[PriceLevel]:
+        if side == Side.BUY:
+            heap, book, entries, sign = self.bid_heap, self.bids, self.bid_entries, -1
+        else:
+            heap, book, entries, sign = self.ask_heap, self.asks, self.ask_entries, 1
+        while heap:
+            price = sign * heap[0]
+            level = book.get(price)
+            if level:
+                return level
+            entries.discard(price)
+            heapq.heappop(heap)  # lazy cleanup
+            self.stale_pops += 1
         return None
 
-    def match(self) -> List[Trade]:
-        trades: List[Trade] = []
-        while True:
-            best_bid = self.best_bid()
-            best_ask = self.best_ask()
-            if not best_bid or not best_ask or best_bid[0] < best_ask[0]:
-                break
-            bid_queue = self.bids[best_bid[0]]
-            ask_queue = self.asks[best_ask[0]]
-            bid_order = bid_queue[0]
-            ask_order = ask_queue[0]
-            trade_qty = min(bid_order.qty, ask_order.qty)
-            trade = Trade(
-                ts=max(bid_order.ts, ask_order.ts),
-                price=best_ask[0],
-                qty=trade_qty,
-                maker_id=ask_order.id,
-                taker_id=bid_order.id
-            )
-            trades.append(trade)
-            bid_order.qty -= trade_qty
-            ask_order.qty -= trade_qty
-            if bid_order.qty == 0:
-                bid_queue.popleft()
-                del self.order_map[bid_order.id]
-            if ask_order.qty == 0:
-                ask_queue.popleft()
-                del self.order_map[ask_order.id]
-            if not bid_queue:
-                del self.bids[best_bid[0]]
-            if not ask_queue:
-                del self.asks[best_ask[0]]
-        return trades
+    def _drop_level(self, side: Side, price: int) -> None:
+        """
+        Delete an emptied level. Its heap entry goes stale and is popped
+        lazily, unless stale entries now pass the compaction threshold.
+        """
+        book, heap = (self.bids, self.bid_heap) if side == Side.BUY else (self.asks, self.ask_heap)
+        del book[price]
+        if len(heap) - len(book) > self.compact_ratio * len(book) + COMPACT_MIN_STALE:
+            self._compact(side)
+
+    def _compact(self, side: Side) -> None:
+        """Rebuild one side's heap from its live prices, dropping every stale entry."""
+        if side == Side.BUY:
+            self.bid_heap = [-price for price in self.bids]
+            heapq.heapify(self.bid_heap)
+            self.bid_entries = set(self.bids)
+        else:
+            self.ask_heap = list(self.asks)
+            heapq.heapify(self.ask_heap)
+            self.ask_entries = set(self.asks)
+        self.compactions += 1
+
+    def _levels_to(self, side: Side, limit: int) -> Iterator[PriceLevel]:
+        """
+        Non-empty levels of `side` from the touch to `limit`, for can_fill.
+        Visits only the heap entries within the limit (an entry beyond it
+        has nothing within it below); stale or repeated entries are skipped.
+        """
+        heap, book, sign = (self.bid_heap, self.bids, -1) if side == Side.BUY else (self.ask_heap, self.asks, 1)
+        bound = sign * limit
+        n = len(heap)
+        stack = [0] if n else []
+        seen = set()
+        while stack:
+            i = stack.pop()
+            key = heap[i]
+            if key > bound:
+                continue
+            price = sign * key
+            if price not in seen:
+                seen.add(price)
+                level = book.get(price)
+                if level:
+                    yield level
+            child = 2 * i + 1
+            if child < n:
+                stack.append(child)
+                if child + 1 < n:
+                    stack.append(child + 1)
+
+    def heap_stats(self) -> Dict[str, int]:
+        """Heap entries vs. live levels per side, and the stale-entry upkeep so far."""
+        return {
+            'bid_heap': len(self.bid_heap), 'bid_levels': len(self.bids),
+            'ask_heap': len(self.ask_heap), 'ask_levels': len(self.asks),
+            'stale': len(self.bid_heap) - len(self.bids) + len(self.ask_heap) - len(self.asks),
+            'stale_pops': self.stale_pops, 'compactions': self.compactions,
+        }
+
+    def depth(self, k: int = 5) -> dict:
+        """
+        Returns L2 depth snapshot: top-k price levels for bids and asks.
+        Output: {'bids': [(price, qty)], 'asks': [(price, qty)]}
+        """
+        bids = [(p, self.bids[p].total_qty) for p in heapq.nlargest(k, self.bids)]
+        asks = [(p, self.asks[p].total_qty) for p in heapq.nsmallest(k, self.asks)]
+        return {'bids': bids, 'asks': asks}
+
+    def depth_arrays(self, k: Optional[int] = None) -> DepthArrays:
+        """
+        Top-k (None = all) levels per side as NumPy arrays. The heaps are
+        not sorted, so this selects with nlargest/nsmallest (or sorts every
+        level when k is None); the sorted backends serve it from their index.
+        """
+        if k is None:
+            bid_prices, ask_prices = sorted(self.bids, reverse=True), sorted(self.asks)
+        elif k < 0:
+            raise ValueError("k must be non-negative")
+        else:
+            bid_prices, ask_prices = heapq.nlargest(k, self.bids), heapq.nsmallest(k, self.asks)
+        return DepthArrays(*level_arrays(map(self.bids.__getitem__, bid_prices)),
+                           *level_arrays(map(self.asks.__getitem__, ask_prices)))
+
+    def get_orders_at_price(self, side: Side, price: int) -> List[Order]:
+        book = self.bids if side == Side.BUY else self.asks
+        return list(book.get(price, ()))
+
+    def levels_from_touch(self, side: Side) -> Iterator[PriceLevel]:
+        """Non-empty levels of one side, from the best price outward."""
+        if side == Side.BUY:
+            return (self.bids[p] for p in sorted(self.bids, reverse=True))
+        return (self.asks[p] for p in sorted(self.asks))
+
+    def bulk_load(self, orders, match: bool = False) -> List[Trade]:
+        """
+        Fill an empty book with resting limit orders in one go: a list of
+        Orders or a columnar block (e.g. an EventBlock of limit rows), queued
+        in input order within each price. Orders are grouped by a NumPy
+        sort and the price index is built once (one heapify per side),
+        instead of add_order per order. Crossed input raises ValueError
+        unless `match` is set, in which case the book is matched once at
+        the end; returns those trades.
+        """
+        if self.order_map:
+            raise ValueError("bulk_load needs an empty book.")
+        bids, asks, order_map = bulk_levels(orders)
+        if bids and asks and bids[-1].price >= asks[0].price and not match:
+            raise ValueError(f"crossed input: best bid {bids[-1].price} >= best ask {asks[0].price}")
+        self.load_levels(bids, asks, order_map)
+        return self.match() if match else []
+
+    def load_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], order_map: Dict[int, Order]) -> None:
+        """
+        Bulk-load an empty book from ready-built, non-empty levels (in any
+        order) holding exactly the orders in `order_map`: one heapify per
+        side instead of a push per level.
+        """
+        if self.order_map:
+            raise ValueError("load_levels needs an empty book.")
+        self.bids = {lvl.price: lvl for lvl in bids}
+        self.asks = {lvl.price: lvl for lvl in asks}
+        self._compact(Side.BUY)
+        self._compact(Side.SELL)
+        self.order_map = order_map
+        self.owners.rebuild(order_map.values())
+        self.bid_qty = sum(lvl.total_qty for lvl in self.bids.values())
+        self.ask_qty = sum(lvl.total_qty for lvl in self.asks.values())
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+
+    def verify(self) -> None:
+        check_book(self.bids, self.asks, self.order_map, (self.bid_qty, self.ask_qty))
+        self.owners.verify(self.order_map)
+        for name, heap, entries, book, sign in (('bid', self.bid_heap, self.bid_entries, self.bids, -1),
+                                                 ('ask', self.ask_heap, self.ask_entries, self.asks, 1)):
+            prices = [sign * key for key in heap]
+            if len(prices) != len(entries) or set(prices) != entries:
+                raise AssertionError(f"{name} heap entries {sorted(prices)} do not match {sorted(entries)}")
+            if not entries.issuperset(book):
+                raise AssertionError(f"{name} levels missing from the heap: {sorted(set(book) - entries)}")
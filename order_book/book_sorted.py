@@ -1,90 +1,117 @@
 # sortedcontainers-based order book implementation
+from itertools import islice
 from sortedcontainers import SortedDict
-from collections import deque
-from typing import List
-from .order import Order, Trade, Side, OrderType
+from typing import Dict, Iterable, Iterator, List, Optional
+from .bulk import bulk_levels
+from .level import PriceLevel, check_book
+from .owners import OwnerIndex
+from .matching import MatchingBook
+from .order import Order, Trade, Side
 
-class SortedOrderBook:
-    def __init__(self):
+class SortedOrderBook(MatchingBook):
+    trade_cls = Trade
+
+    def __init__(self, check_consistency: bool = False):
         self.bids = SortedDict()
         self.asks = SortedDict()
         self.order_map = {}
+        self.owners = OwnerIndex()  # owner -> resting orders, for mass_cancel
+        self.bid_qty = 0  # total resting qty per side, kept incrementally
+        self.ask_qty = 0
+        # Re-verify every level aggregate after each mutation (slow; for tests)
+        self.check_consistency = check_consistency
+
+    @classmethod
+    def from_orders(cls, orders, match: bool = False, **kwargs) -> 'SortedOrderBook':
+        """New book bulk-loaded with `orders` (see bulk_load)."""
+        book = cls(**kwargs)
+        book.bulk_load(orders, match)
+        return book
+
+    def _level(self, side: Side, price: int) -> PriceLevel:
+        return self.bids[price] if side == Side.BUY else self.asks[price]
+
+    def _open_level(self, side: Side, price: int) -> PriceLevel:
+        book = self.bids if side == Side.BUY else self.asks
+        level = book.get(price)
+        if level is None:
+            level = book[price] = PriceLevel(price)
+        return level
+
+    def _drop_level(self, side: Side, price: int) -> None:
+        del (self.bids if side == Side.BUY else self.asks)[price]
+
+    def _drop_levels(self, side: Side, prices) -> None:
+        """Delete the levels a mass cancel emptied, rebuilding the SortedDict once if there are many."""
+        book = self.bids if side == Side.BUY else self.asks
+        if len(prices) * 8 > len(book):
+            # Many levels gone: one rebuild from the survivors (already in order)
+            survivors = [(price, level) for price, level in book.items() if level]
+            book.clear()
+            book.update(survivors)
+        else:
+            for price in prices:
+                del book[price]
+
+    def _touch(self, side: Side) -> Optional[PriceLevel]:
+        if side == Side.BUY:
+            return self.bids.peekitem(-1)[1] if self.bids else None
+        return self.asks.peekitem(0)[1] if self.asks else None
+
+    def depth(self, k: int = 5) -> dict:
+        """
+        Returns L2 depth snapshot: top-k price levels for bids and asks.
+        Output: {'bids': [(price, qty)], 'asks': [(price, qty)]}
+        """
+        bids = [(p, self.bids[p].total_qty) for p in islice(reversed(self.bids), k)]
+        asks = [(p, self.asks[p].total_qty) for p in islice(self.asks, k)]
+        return {'bids': bids, 'asks': asks}
 
-    def add_order(self, order: Order):
-        if order.type == OrderType.LIMIT:
-            if order.price is None:
-                raise ValueError("Limit order must have a price.")
-            book = self.bids if order.side == Side.BUY else self.asks
-            if order.price not in book:
-                book[order.price] = deque()
-            book[order.price].append(order)
-            self.order_map[order.id] = order
-        elif order.type == OrderType.MARKET:
-            pass
+    def get_orders_at_price(self, side: Side, price: int) -> List[Order]:
+        book = self.bids if side == Side.BUY else self.asks
+        return list(book.get(price, ()))
 
-    def cancel_order(self, order_id: int) -> bool:
-        order = self.order_map.get(order_id)
-        if not order or order.type != OrderType.LIMIT or order.price is None:
-            return False
-        book = self.bids if order.side == Side.BUY else self.asks
-        queue = book.get(order.price)
-        if queue:
-            for idx, o in enumerate(queue):
-                if o.id == order_id:
-                    del queue[idx]
-                    del self.order_map[order_id]
-                    if not queue:
-                        del book[order.price]
-                    return True
-        return False
+    def levels_from_touch(self, side: Side) -> Iterator[PriceLevel]:
+        """Non-empty levels of one side, from the best price outward."""
+        return reversed(self.bids.values()) if side == Side.BUY else iter(self.asks.values())
 
-    def best_bid(self):
-        if not self.bids:
-            return None
-        price = self.bids.peekitem(-1)[0]
-        qty = sum(o.qty for o in self.bids[price])
-        return (price, qty)
+    def bulk_load(self, orders, match: bool = False) -> List[Trade]:
+        """
+        Fill an empty book with resting limit orders in one go: a list of
+        Orders or a columnar block (e.g. an EventBlock of limit rows), queued
+        in input order within each price. Orders are grouped by a NumPy
+        sort and the price index is built once (one SortedDict build per side),
+        instead of add_order per order. Crossed input raises ValueError
+        unless `match` is set, in which case the book is matched once at
+        the end; returns those trades.
+        """
+        if self.order_map:
+            raise ValueError("bulk_load needs an empty book.")
+        bids, asks, order_map = bulk_levels(orders)
+        if bids and asks and bids[-1].price >= asks[0].price and not match:
+            raise ValueError(f"crossed input: best bid {bids[-1].price} >= best ask {asks[0].price}")
+        self.load_levels(bids, asks, order_map)
+        return self.match() if match else []
 
-    def best_ask(self):
-        if not self.asks:
-            return None
-        price = self.asks.peekitem(0)[0]
-        qty = sum(o.qty for o in self.asks[price])
-        return (price, qty)
+    def load_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], order_map: Dict[int, Order]) -> None:
+        """
+        Bulk-load an empty book from ready-built, non-empty levels (in any
+        order) holding exactly the orders in `order_map`: one SortedDict
+        construction (a single sort) per side instead of an insert per level.
+        """
+        if self.order_map:
+            raise ValueError("load_levels needs an empty book.")
+        self.bids = SortedDict((lvl.price, lvl) for lvl in bids)
+        self.asks = SortedDict((lvl.price, lvl) for lvl in asks)
+        self.order_map = order_map
+        self.owners.rebuild(order_map.values())
+        self.bid_qty = sum(lvl.total_qty for lvl in self.bids.values())
+        self.ask_qty = sum(lvl.total_qty for lvl in self.asks.values())
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
 
-    def match(self) -> List[Trade]:
-        trades: List[Trade] = []
-        while self.bids and self.asks:
-            best_bid = self.best_bid()
-            best_ask = self.best_ask()
-            if not best_bid or not best_ask or best_bid[0] < best_ask[0]:
-                break
-            bid_queue = self.bids[best_bid[0]]
-            ask_queue = self.asks[best_ask[0]]
-            bid_order = bid_queue[0]
-            ask_order = ask_queue[0]
-            trade_qty = min(bid_order.qty, ask_order.qty)
-            price = best_ask[0]
-            if not isinstance(price, float):
-                break
-            trade = Trade(
-                ts=max(bid_order.ts, ask_order.ts),
-                price=price,
-                qty=trade_qty,
-                maker_id=ask_order.id,
-                taker_id=bid_order.id
-            )
-            trades.append(trade)
-            bid_order.qty -= trade_qty
-            ask_order.qty -= trade_qty
-            if bid_order.qty == 0:
-                bid_queue.popleft()
-                del self.order_map[bid_order.id]
-            if ask_order.qty == 0:
-                ask_queue.popleft()
-                del self.order_map[ask_order.id]
-            if not bid_queue:
-                del self.bids[best_bid[0]]
-            if not ask_queue:
-                del self.asks[best_ask[0]]
-        return trades
+    def verify(self) -> None:
+        check_book(self.bids, self.asks, self.order_map, (self.bid_qty, self.ask_qty))
+        self.owners.verify(self.order_map)
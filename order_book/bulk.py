@@ -0,0 +1,111 @@
+# Bulk construction of price levels from many resting orders at once
+import gc
+from itertools import repeat
+from typing import Dict, List, Tuple
+import numpy as np
+from .level import PriceLevel
+from .order import Order, Side, OrderType
+
+_SIDES = (None, Side.BUY, Side.SELL)  # side code -> Side
+
+
+def link_levels(orders: List[Order], sides: np.ndarray, prices: np.ndarray,
+                qtys: np.ndarray) -> Tuple[List[PriceLevel], List[PriceLevel]]:
+    """
+    Link `orders`, already grouped contiguously by (side, price) and in
+    queue order within each group, into PriceLevels; `sides`/`prices`/
+    `qtys` are their columns. Every order is chained to its successor in
+    one pass and the chain is cut at group boundaries (any column that
+    differs between sides, e.g. side codes or an is-sell flag, works for
+    `sides`); level totals are summed with one reduceat. Returns (bids,
+    asks) in input group order.
+    """
+    n = len(orders)
+    bids: List[PriceLevel] = []
+    asks: List[PriceLevel] = []
+    if not n:
+        return bids, asks
+    starts = np.concatenate(([0], np.flatnonzero((sides[1:] != sides[:-1]) | (prices[1:] != prices[:-1])) + 1))
+    ends = np.append(starts[1:], n)
+    for prev, nxt in zip(orders, orders[1:]):
+        prev.next = nxt
+        nxt.prev = prev
+    level_qty = np.add.reduceat(qtys, starts).tolist()
+    for start, stop, qty in zip(starts.tolist(), ends.tolist(), level_qty):
+        head, tail = orders[start], orders[stop - 1]
+        head.prev = tail.next = None
+        level = PriceLevel(head.price)
+        level.head, level.tail = head, tail
+        level.count = stop - start
+        level.total_qty = qty
+        (bids if head.side == Side.BUY else asks).append(level)
+    return bids, asks
+
+
+def _level_order(sides: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Stable permutation grouping rows by (side, price), ascending prices within a side."""
+    return np.lexsort((prices, sides))
+
+
+def bulk_levels(orders, order_cls=Order) -> Tuple[List[PriceLevel], List[PriceLevel], Dict[int, Order]]:
+    """
+    Group resting limit orders into levels: returns (bids, asks, order_map),
+    levels in ascending price order and orders queued in input order.
+
+    `orders` is an iterable of Orders or a columnar block with `kind`,
+    `order_id`, `ts`, `side`, `price` and `qty` columns (e.g. a
+    lob.events.EventBlock of limit rows), from which `order_cls` objects
+    are created. Grouping is a stable NumPy sort of the (side, price)
+    columns rather than a dict lookup per order. Iceberg Orders are split
+    into peak and reserve, as add_order does.
+    """
+    enabled = gc.isenabled()
+    gc.disable()  # only new, live objects are created; collections would just re-scan them
+    try:
+        if hasattr(orders, 'order_id'):
+            kind = np.asarray(orders.kind)
+            sides = np.asarray(orders.side, dtype=np.int64)
+            prices = np.asarray(orders.price, dtype=np.int64)
+            qtys = np.asarray(orders.qty, dtype=np.int64)
+            if len(kind) and (kind != int(OrderType.LIMIT)).any():
+                raise ValueError("bulk load takes resting limit orders only.")
+            if not np.isin(sides, (int(Side.BUY), int(Side.SELL))).all():
+                raise ValueError("invalid side code in bulk load.")
+            if (qtys <= 0).any():
+                raise ValueError("bulk load takes positive order quantities only.")
+            ids = np.asarray(orders.order_id).tolist()
+            orders = list(map(order_cls, ids, np.asarray(orders.ts, dtype=np.float64).tolist(),
+                              map(_SIDES.__getitem__, sides.tolist()), repeat(OrderType.LIMIT),
+                              prices.tolist(), qtys.tolist()))
+        else:
+            # One cheap attribute pass per column (NumPy converts plain lists fastest)
+            orders = list(orders)
+            if [o.type for o in orders].count(OrderType.LIMIT) != len(orders):
+                raise ValueError("bulk load takes resting limit orders only.")
+            prices = [o.price for o in orders]
+            if None in prices:
+                raise ValueError("Limit order must have a price.")
+            prices = np.array(prices)
+            sides = np.array([o.side == Side.SELL for o in orders])  # any code that splits the sides
+            qtys = np.array([o.qty for o in orders])
+            if len(qtys) and (qtys <= 0).any():
+                raise ValueError("bulk load takes positive order quantities only.")
+            # Icebergs show only their peak, as in add_order; level totals are visible qty
+            peaks = np.array([o.peak for o in orders])
+            icebergs = (peaks > 0) & (qtys > peaks)
+            if icebergs.any():
+                for i in np.flatnonzero(icebergs).tolist():
+                    order = orders[i]
+                    order.reserve += order.qty - order.peak
+                    order.qty = order.peak
+                qtys = np.where(icebergs, peaks, qtys)
+            ids = [o.id for o in orders]
+        order_map = dict(zip(ids, orders))
+        if len(order_map) != len(orders):
+            raise ValueError("duplicate order ids in bulk load.")
+        perm = _level_order(sides, prices)
+        bids, asks = link_levels(list(map(orders.__getitem__, perm.tolist())), sides[perm], prices[perm], qtys[perm])
+        return bids, asks, order_map
+    finally:
+        if enabled:
+            gc.enable()
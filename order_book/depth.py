@@ -0,0 +1,34 @@
+# L2 depth as NumPy arrays, for analytics and depth recording
+from itertools import islice
+from typing import Iterable, NamedTuple, Optional, Tuple
+import numpy as np
+from .level import PriceLevel
+
+
+class DepthArrays(NamedTuple):
+    """
+    Per-side price, total qty and order count of the top levels, each an
+    int64 array ordered from the touch outward (bids descending, asks
+    ascending). Sides may have different lengths.
+    """
+    bid_price: np.ndarray
+    bid_qty: np.ndarray
+    bid_count: np.ndarray
+    ask_price: np.ndarray
+    ask_qty: np.ndarray
+    ask_count: np.ndarray
+
+
+def level_arrays(levels: Iterable[PriceLevel], k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (prices, qtys, counts) of the first `k` of `levels` (all if k is None).
+    `levels` should already be in touch order, so nothing is sorted here;
+    the three columns are converted in one np.array call, as the rows of a
+    single (3, n) array.
+    """
+    if k is not None and k < 0:
+        raise ValueError("k must be non-negative")
+    levels = list(islice(levels, k))
+    columns = np.array([[level.price for level in levels], [level.total_qty for level in levels],
+                        [level.count for level in levels]], dtype=np.int64)
+    return columns[0], columns[1], columns[2]
@@ -0,0 +1,125 @@
+# Price-level FIFO queue: intrusive doubly linked list of resting orders
+from typing import Iterator, Optional
+
+
+class PriceLevel:
+    """
+    FIFO queue of the orders resting at one price.
+
+    Orders are linked through their own ``prev``/``next`` fields, so removing
+    an order found via ``order_map`` is O(1) and never scans the queue.
+    ``count`` and ``total_qty`` are kept up to date on every change, so L1/L2
+    queries never sum the queue.
+    """
+    __slots__ = ('price', 'head', 'tail', 'count', 'total_qty')
+
+    def __init__(self, price):
+        self.price = price
+        self.head = None
+        self.tail = None
+        self.count = 0
+        self.total_qty = 0
+
+    def append(self, order) -> None:
+        order.prev = self.tail
+        order.next = None
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail.next = order
+        self.tail = order
+        self.count += 1
+        self.total_qty += order.qty
+
+    def remove(self, order) -> None:
+        prev, nxt = order.prev, order.next
+        if prev is None:
+            self.head = nxt
+        else:
+            prev.next = nxt
+        if nxt is None:
+            self.tail = prev
+        else:
+            nxt.prev = prev
+        order.prev = order.next = None
+        self.count -= 1
+        self.total_qty -= order.qty
+
+    def fill(self, order, qty: int) -> None:
+        """Reduce a resting order's quantity in place (partial or full fill)."""
+        order.qty -= qty
+        self.total_qty -= qty
+
+    def refill(self, order) -> int:
+        """
+        Show the next slice of an exhausted iceberg order (qty 0, reserve
+        left): it moves to the back of the queue with up to `peak` from its
+        reserve. Returns the visible qty added.
+        """
+        qty = order.reserve if order.reserve < order.peak else order.peak
+        order.reserve -= qty
+        self.remove(order)
+        order.qty = qty
+        self.append(order)
+        return qty
+
+    def popleft(self):
+        order = self.head
+        if order is None:
+            raise IndexError("pop from an empty PriceLevel")
+        self.remove(order)
+        return order
+
+    def peek(self) -> Optional[object]:
+        return self.head
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.head is not None
+
+    def __iter__(self) -> Iterator:
+        order = self.head
+        while order is not None:
+            nxt = order.next
+            yield order
+            order = nxt
+
+    def verify(self) -> None:
+        """Recompute the cached aggregates from the queue and compare."""
+        count = qty = 0
+        for order in self:
+            count += 1
+            qty += order.qty
+        if count != self.count or qty != self.total_qty:
+            raise AssertionError(
+                f"level {self.price!r}: cached count/qty {self.count}/{self.total_qty}, "
+                f"actual {count}/{qty}"
+            )
+
+    def __repr__(self) -> str:
+        return f"PriceLevel(price={self.price!r}, count={self.count}, total_qty={self.total_qty})"
+
+
+def check_book(bids, asks, order_map, totals=None) -> None:
+    """
+    Consistency check for a book built from PriceLevels (used in tests).
+    `totals` is the book's cached (bid_qty, ask_qty), if it keeps them.
+    """
+    resting = 0
+    for book in (bids, asks):
+        for price, level in book.items():
+            if not level:
+                raise AssertionError(f"empty level left in book at {price!r}")
+            level.verify()
+            for order in level:
+                if order_map.get(order.id) is not order:
+                    raise AssertionError(f"order {order.id} at {price!r} missing from order_map")
+            resting += level.count
+    if resting != len(order_map):
+        raise AssertionError(f"order_map has {len(order_map)} orders, levels hold {resting}")
+    if totals is not None:
+        actual = (sum(lvl.total_qty for lvl in bids.values()), sum(lvl.total_qty for lvl in asks.values()))
+        if tuple(totals) != actual:
+            raise AssertionError(f"cached bid/ask qty {tuple(totals)}, actual {actual}")
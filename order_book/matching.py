@@ -0,0 +1,373 @@
+# Order entry, amends, cancels and matching shared by the book backends
+from itertools import takewhile
+from typing import Iterable, Iterator, Optional, Tuple
+from .depth import DepthArrays, level_arrays
+from .level import PriceLevel
+from .top_of_book import TopOfBookFeed
+
+# Int codes of Side, OrderType and TimeInForce, shared by lob.order and
+# order_book.order: comparing codes lets this work with either module's orders
+BUY, SELL = 1, 2
+LIMIT = 1
+FOK, POST_ONLY = 2, 3
+
+
+class MatchingBook(TopOfBookFeed):
+    """
+    Mixin with the side-agnostic half of an order book: order entry,
+    cancels, fills, amends, mass cancels and matching, written once over
+    PriceLevels. A backend keeps ``order_map``, ``owners`` (an OwnerIndex),
+    ``bid_qty``/``ask_qty``, ``check_consistency`` and ``trade_cls`` (the
+    Trade class match() builds), and supplies its price index through a
+    few hooks:
+
+    - ``_level(side, price)``: the non-empty level resting at `price`;
+    - ``_open_level(side, price)``: the level to append a new order at
+      `price` to, indexing it if it was empty;
+    - ``_drop_level(side, price)``: unindex a level that just emptied;
+    - ``_touch(side)``: the best non-empty level, or None;
+    - ``levels_from_touch(side)``: non-empty levels from the best price out.
+
+    ``_drop_levels`` (several levels emptied by one mass cancel) and
+    ``_levels_to`` (the levels can_fill sums) default to those hooks and
+    can be overridden where the index does them faster.
+    """
+    trade_cls = None
+
+    def add_order(self, order) -> None:
+        if order.type == LIMIT:
+            if order.price is None:
+                raise ValueError("Limit order must have a price.")
+            if order.peak and order.qty > order.peak:
+                order.reserve += order.qty - order.peak  # iceberg: only the peak is shown
+                order.qty = order.peak
+            self._open_level(order.side, order.price).append(order)
+            self.order_map[order.id] = order
+            if order.owner is not None:
+                self.owners.add(order)
+            if order.side == BUY:
+                self.bid_qty += order.qty
+            else:
+                self.ask_qty += order.qty
+            if self.check_consistency:
+                self.verify()
+            if self._listeners:
+                self._publish()
+        # Market orders never rest; they are filled by match_incoming/sweep
+
+    def cancel_order(self, order_id: int) -> bool:
+        order = self.order_map.pop(order_id, None)
+        if order is None:
+            return False
+        if order.owner is not None:
+            self.owners.discard(order)
+        level = self._level(order.side, order.price)
+        level.remove(order)
+        if order.side == BUY:
+            self.bid_qty -= order.qty
+        else:
+            self.ask_qty -= order.qty
+        if not level:
+            self._drop_level(order.side, order.price)
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+        return True
+
+    def execute_order(self, order_id: int, qty: int) -> bool:
+        """Fill `qty` of a resting order, removing it once fully executed (an iceberg shows its next slice instead)."""
+        order = self.order_map.get(order_id)
+        if order is None:
+            return False
+        buy = order.side == BUY
+        level = self._level(order.side, order.price)
+        level.fill(order, qty)
+        if buy:
+            self.bid_qty -= qty
+        else:
+            self.ask_qty -= qty
+        if order.qty <= 0 and order.reserve:
+            if buy:
+                self.bid_qty += level.refill(order)
+            else:
+                self.ask_qty += level.refill(order)
+        elif order.qty <= 0:
+            level.remove(order)
+            del self.order_map[order_id]
+            if order.owner is not None:
+                self.owners.discard(order)
+            if not level:
+                self._drop_level(order.side, order.price)
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+        return True
+
+    def modify_order(self, order_id: int, new_qty: int, new_price: Optional[int] = None, fills=None) -> bool:
+        """
+        Amend a resting order. A quantity reduction at the same price is done
+        in place and keeps queue priority; a price change or quantity
+        increase re-queues the order at the back of its (new) level. If the
+        re-queued order crosses, it is matched first via match_incoming with
+        fills appended to `fills` (a TradeBuffer); without `fills` a crossing
+        amend raises ValueError. new_qty 0 cancels. For an iceberg, new_qty
+        is its total (visible + reserve): a reduction comes out of the reserve
+        first, and a re-queued iceberg is split by its peak again. Returns
+        False if the order is not resting, or if a POST_ONLY order's amend
+        would cross (the order is then left as it was).
+        """
+        order = self.order_map.get(order_id)
+        if order is None:
+            return False
+        if new_qty <= 0:
+            if new_qty < 0:
+                raise ValueError("new_qty must be non-negative.")
+            return self.cancel_order(order_id)
+        price = order.price if new_price is None else new_price
+        buy = order.side == BUY
+        level = self._level(order.side, order.price)
+        if price == order.price and new_qty <= order.qty + order.reserve:
+            reduce = max(order.qty - new_qty, 0)
+            order.reserve = new_qty - order.qty + reduce
+            level.fill(order, reduce)
+            if buy:
+                self.bid_qty -= reduce
+            else:
+                self.ask_qty -= reduce
+            if self.check_consistency:
+                self.verify()
+            if self._listeners:
+                self._publish()
+            return True
+        if order.tif == POST_ONLY and self._crosses(order.side, price):
+            return False
+        if fills is None and self._crosses(order.side, price):
+            raise ValueError("amend would cross the book; route it through Matcher.modify.")
+        level.remove(order)
+        del self.order_map[order_id]
+        if order.owner is not None:
+            self.owners.discard(order)
+        if buy:
+            self.bid_qty -= order.qty
+        else:
+            self.ask_qty -= order.qty
+        if not level:
+            self._drop_level(order.side, order.price)
+        order.price = price
+        order.qty = new_qty
+        order.reserve = 0
+        if fills is None:
+            self.add_order(order)  # publishes the final state
+        else:
+            self.match_incoming(order, fills)
+        return True
+
+    def mass_cancel(self, owner, side=None,
+                    price_range: Optional[Tuple[Optional[int], Optional[int]]] = None) -> list:
+        """
+        Cancel every resting order of `owner`, optionally only on `side`
+        and/or priced within the inclusive `price_range` (lo, hi). Orders
+        come from the owner index, so nothing else is scanned, and levels
+        emptied along the way are unindexed once at the end, per side,
+        through _drop_levels. Returns the cancelled orders.
+        """
+        cancelled = self.owners.take(owner, side, price_range)
+        if not cancelled:
+            return cancelled
+        order_map = self.order_map
+        level_at = self._level
+        removed = [0, 0, 0]  # qty and emptied prices by side code
+        emptied = ([], [], [])
+        for order in cancelled:
+            del order_map[order.id]
+            level = level_at(order.side, order.price)
+            level.remove(order)
+            removed[order.side] += order.qty
+            if not level:
+                emptied[order.side].append(order.price)
+        self.bid_qty -= removed[BUY]
+        self.ask_qty -= removed[SELL]
+        for code in (BUY, SELL):
+            if emptied[code]:
+                self._drop_levels(code, emptied[code])
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+        return cancelled
+
+    def _drop_levels(self, side, prices: Iterable[int]) -> None:
+        """Unindex several emptied levels of one side (one per price)."""
+        for price in prices:
+            self._drop_level(side, price)
+
+    def match_incoming(self, order, fills) -> None:
+        """
+        Match an incoming order against the opposite side, from the touch
+        outward, and rest any limit remainder. Fills are appended to `fills`
+        (a lob.trade_buffer.TradeBuffer); `order.qty` is left unfilled qty.
+        By time in force: IOC and FOK remainders never rest, FOK trades only
+        if can_fill() says it fills completely, and a POST_ONLY order that
+        would cross is rejected; rejections leave the book untouched.
+        """
+        limit = order.price if order.type == LIMIT else None
+        tif = order.tif
+        if tif:
+            if tif == FOK:
+                if not self.can_fill(order.side, order.qty, limit):
+                    return
+            elif tif == POST_ONLY and self._crosses(order.side, limit):
+                return
+        order.qty = self._take(order, limit, fills)
+        if order.qty > 0 and order.type == LIMIT and (not tif or tif == POST_ONLY):
+            self.add_order(order)  # publishes the final state
+            return
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+
+    def sweep(self, order, fills, limit_price=None) -> int:
+        """
+        Fill a market order from the touch outward until it is done, the
+        opposite side is empty, or the next level is beyond `limit_price`
+        (price protection). Never rests; returns (and leaves in `order.qty`)
+        the unfilled remainder.
+        """
+        order.qty = self._take(order, limit_price, fills)
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+        return order.qty
+
+    def can_fill(self, side, qty: int, limit: Optional[int] = None) -> bool:
+        """
+        Whether an incoming `side` order for `qty` would fill completely at
+        prices up to `limit` (None = any price). Reads the cached level
+        totals only and never mutates the book; hidden iceberg reserve is
+        not counted.
+        """
+        buy = side == BUY
+        if (self.ask_qty if buy else self.bid_qty) < qty:
+            return False
+        if limit is None:
+            return True
+        for level in self._levels_to(SELL if buy else BUY, limit):
+            qty -= level.total_qty
+            if qty <= 0:
+                return True
+        return qty <= 0
+
+    def _levels_to(self, side, limit: int) -> Iterator[PriceLevel]:
+        """Non-empty levels of `side` from the touch to `limit` inclusive, in any order."""
+        if side == BUY:
+            return takewhile(lambda level: level.price >= limit, self.levels_from_touch(side))
+        return takewhile(lambda level: level.price <= limit, self.levels_from_touch(side))
+
+    def _crosses(self, side, price: Optional[int]) -> bool:
+        """Whether a `side` order at `price` (None = market) would trade on arrival."""
+        touch = self.best_ask() if side == BUY else self.best_bid()
+        return touch is not None and (price is None or (price >= touch[0] if side == BUY else price <= touch[0]))
+
+    def _take(self, order, limit, fills) -> int:
+        """Consume opposite-side liquidity up to `limit` (None = any price); return unfilled qty."""
+        qty = order.qty
+        buy = order.side == BUY
+        side = SELL if buy else BUY
+        touch = self._touch
+        order_map = self.order_map
+        owners = self.owners
+        refilled = 0  # iceberg slices shown while matching
+        while qty > 0:
+            level = touch(side)
+            if level is None:
+                break
+            price = level.price
+            if limit is not None and (price > limit if buy else price < limit):
+                break
+            while qty > 0:
+                maker = level.head
+                if maker is None:
+                    break
+                fill = maker.qty if maker.qty < qty else qty
+                fills.append(maker.ts if maker.ts > order.ts else order.ts, price, fill, maker.id, order.id)
+                qty -= fill
+                level.fill(maker, fill)
+                if maker.qty == 0:
+                    if maker.reserve:
+                        refilled += level.refill(maker)
+                    else:
+                        level.popleft()
+                        del order_map[maker.id]
+                        if maker.owner is not None:
+                            owners.discard(maker)
+            if not level:
+                self._drop_level(side, price)
+        if buy:
+            self.ask_qty -= order.qty - qty - refilled
+        else:
+            self.bid_qty -= order.qty - qty - refilled
+        return qty
+
+    def best_bid(self) -> Optional[Tuple[int, int]]:
+        level = self._touch(BUY)
+        return None if level is None else (level.price, level.total_qty)
+
+    def best_ask(self) -> Optional[Tuple[int, int]]:
+        level = self._touch(SELL)
+        return None if level is None else (level.price, level.total_qty)
+
+    def match(self) -> list:
+        """Match a crossed book (e.g. after a bulk load) bid against ask until it uncrosses."""
+        trades = []
+        trade_cls = self.trade_cls
+        while True:
+            bid_queue = self._touch(BUY)
+            ask_queue = self._touch(SELL)
+            if bid_queue is None or ask_queue is None or bid_queue.price < ask_queue.price:
+                break
+            bid_order = bid_queue.head
+            ask_order = ask_queue.head
+            trade_qty = min(bid_order.qty, ask_order.qty)
+            trades.append(trade_cls(
+                ts=max(bid_order.ts, ask_order.ts),
+                price=ask_queue.price,
+                qty=trade_qty,
+                maker_id=ask_order.id,
+                taker_id=bid_order.id
+            ))
+            bid_queue.fill(bid_order, trade_qty)
+            ask_queue.fill(ask_order, trade_qty)
+            self.bid_qty -= trade_qty
+            self.ask_qty -= trade_qty
+            if bid_order.qty == 0 and bid_order.reserve:
+                self.bid_qty += bid_queue.refill(bid_order)
+            elif bid_order.qty == 0:
+                bid_queue.popleft()
+                del self.order_map[bid_order.id]
+                if bid_order.owner is not None:
+                    self.owners.discard(bid_order)
+            if ask_order.qty == 0 and ask_order.reserve:
+                self.ask_qty += ask_queue.refill(ask_order)
+            elif ask_order.qty == 0:
+                ask_queue.popleft()
+                del self.order_map[ask_order.id]
+                if ask_order.owner is not None:
+                    self.owners.discard(ask_order)
+            if not bid_queue:
+                self._drop_level(BUY, bid_queue.price)
+            if not ask_queue:
+                self._drop_level(SELL, ask_queue.price)
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+        return trades
+
+    def depth_arrays(self, k: Optional[int] = None) -> DepthArrays:
+        """Top-k (None = all) levels per side as NumPy arrays, read off levels_from_touch in order."""
+        return DepthArrays(*level_arrays(self.levels_from_touch(BUY), k),
+                           *level_arrays(self.levels_from_touch(SELL), k))
@@ -1,125 +1,216 @@
 
-from dataclasses import dataclass
-from enum import Enum, auto
+from enum import IntEnum
 from typing import Optional
 
-class Side(Enum):
-    BUY = auto()
-    SELL = auto()
+# Side and type are int-coded so they are cheap to store and compare, and the
+# codes are shared by lob.order and order_book.order.
+class Side(IntEnum):
+    BUY = 1
+    SELL = 2
 
-class OrderType(Enum):
-    LIMIT = auto()
-    MARKET = auto()
+class OrderType(IntEnum):
+    LIMIT = 1
+    MARKET = 2
+
+class TimeInForce(IntEnum):
+    GTC = 0        # rest any limit remainder (default)
+    IOC = 1        # trade what crosses now, never rest
+    FOK = 2        # trade the full qty now or nothing
+    POST_ONLY = 3  # rest without trading; rejected if it would cross
 
-@dataclass
 class Order:
-    id: int
-    ts: float
-    side: Side
-    type: OrderType
-    price: Optional[float]
-    qty: int
-    owner: Optional[str] = None
-    flags: Optional[str] = None
-
-@dataclass
+    """Resting/incoming order. Slotted: no per-instance __dict__."""
+    __slots__ = ('id', 'ts', 'side', 'type', 'price', 'qty', 'owner', 'flags', 'tif', 'peak', 'reserve',
+                 'prev', 'next')
+
+    def __init__(self, id: int, ts: float, side: Side, type: OrderType, price: Optional[int], qty: int,
+                 owner: Optional[str] = None, flags: Optional[str] = None,
+                 tif: TimeInForce = TimeInForce.GTC, peak: int = 0):
+        self.id = id
+        self.ts = ts
+        self.side = side
+        self.type = type
+        self.price = price  # integer ticks, see lob.instrument.Instrument
+        self.qty = qty
+        self.owner = owner
+        self.flags = flags
+        self.tif = tif
+        # Iceberg: when resting, only `peak` of the qty is shown (in `qty`, and
+        # in the level totals) and the rest is held back in `reserve`
+        self.peak = peak
+        self.reserve = 0
+        # Intrusive links for the price-level FIFO (see order_book.level.PriceLevel)
+        self.prev: Optional['Order'] = None
+        self.next: Optional['Order'] = None
+
+    def _fields(self):
+        return (self.id, self.ts, self.side, self.type, self.price, self.qty, self.owner, self.flags,
+                self.tif, self.peak)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields() and self.reserve == other.reserve
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Pickle without the queue links, which would drag the whole level along
+        return (self.__class__, self._fields(), self.reserve)
+
+    def __setstate__(self, reserve):
+        self.reserve = reserve
+
+    def __repr__(self):
+        return (f"Order(id={self.id!r}, ts={self.ts!r}, side={self.side!r}, type={self.type!r}, "
+                f"price={self.price!r}, qty={self.qty!r}, owner={self.owner!r}, flags={self.flags!r}, "
+                f"tif={self.tif!r}, peak={self.peak!r}, reserve={self.reserve!r})")
+
 class Trade:
-    ts: float
-    price: float
-    qty: int
-    maker_id: int
-    taker_id: int
-
-from collections import deque
-from typing import Dict, List
-
-class LimitOrderBook:
-    def __init__(self):
-        self.bids: Dict[float, deque] = {}
-        self.asks: Dict[float, deque] = {}
+    __slots__ = ('ts', 'price', 'qty', 'maker_id', 'taker_id')
+
+    def __init__(self, ts: float, price: int, qty: int, maker_id: int, taker_id: int):
+        self.ts = ts
+        self.price = price
+        self.qty = qty
+        self.maker_id = maker_id
+        self.taker_id = taker_id
+
+    def _fields(self):
+        return (self.ts, self.price, self.qty, self.maker_id, self.taker_id)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, self._fields())
+
+    def __repr__(self):
+        return (f"Trade(ts={self.ts!r}, price={self.price!r}, qty={self.qty!r}, "
+                f"maker_id={self.maker_id!r}, taker_id={self.taker_id!r})")
+
+from itertools import islice
+from sortedcontainers import SortedList
+from typing import Dict, Iterable, Iterator, List
+from .level import PriceLevel, check_book
+from .owners import OwnerIndex
+from .matching import MatchingBook
+
+class LimitOrderBook(MatchingBook):
+    trade_cls = Trade
+
+    def __init__(self, check_consistency: bool = False):
+        self.bids: Dict[int, PriceLevel] = {}
+        self.asks: Dict[int, PriceLevel] = {}
         self.order_map: Dict[int, Order] = {}
+        self.owners = OwnerIndex()  # owner -> resting orders, for mass_cancel
+        # Level prices per side, ascending, kept sorted as levels come and go
+        # (depth and the next touch never sort or scan the dicts); a
+        # SortedList makes each insert and removal O(log levels)
+        self.bid_prices = SortedList()
+        self.ask_prices = SortedList()
+        # Touch prices are cached
+        self.best_bid_price: Optional[int] = None
+        self.best_ask_price: Optional[int] = None
+        self.bid_qty = 0  # total resting qty per side, kept incrementally
+        self.ask_qty = 0
+        # Re-verify every level aggregate after each mutation (slow; for tests)
+        self.check_consistency = check_consistency
+
+    def _level(self, side: Side, price: int) -> PriceLevel:
+        return self.bids[price] if side == Side.BUY else self.asks[price]
+
+    def _open_level(self, side: Side, price: int) -> PriceLevel:
+        if side == Side.BUY:
+            level = self.bids.get(price)
+            if level is None:
+                level = self.bids[price] = PriceLevel(price)
+                self.bid_prices.add(price)
+                if self.best_bid_price is None or price > self.best_bid_price:
+                    self.best_bid_price = price
+        else:
+            level = self.asks.get(price)
+            if level is None:
+                level = self.asks[price] = PriceLevel(price)
+                self.ask_prices.add(price)
+                if self.best_ask_price is None or price < self.best_ask_price:
+                    self.best_ask_price = price
+        return level
+
+    def _touch(self, side: Side) -> Optional[PriceLevel]:
+        if side == Side.BUY:
+            price = self.best_bid_price
+            return None if price is None else self.bids[price]
+        price = self.best_ask_price
+        return None if price is None else self.asks[price]
 
+    def _drop_level(self, side: Side, price: int) -> None:
+        """Delete an emptied level; if it was the touch, the next one is the end of the sorted prices."""
+        if side == Side.BUY:
+            del self.bids[price]
+            prices = self.bid_prices
+            prices.remove(price)
+            if price == self.best_bid_price:
+                self.best_bid_price = prices[-1] if prices else None
+        else:
+            del self.asks[price]
+            prices = self.ask_prices
+            prices.remove(price)
+            if price == self.best_ask_price:
+                self.best_ask_price = prices[0] if prices else None
 
-    def add_order(self, order: Order):
-        # Only add LIMIT orders to the book
-        if order.type == OrderType.LIMIT:
-            if order.price is None:
-                raise ValueError("Limit order must have a price.")
-            book = self.bids if order.side == Side.BUY else self.asks
-            if order.price not in book:
-                book[order.price] = deque()
-            book[order.price].append(order)
-            self.order_map[order.id] = order
-        elif order.type == OrderType.MARKET:
-            # Market orders should be matched immediately, not stored
-            pass  # Matching logic should be handled elsewhere
-
-    def cancel_order(self, order_id: int) -> bool:
-        order = self.order_map.get(order_id)
-        if not order:
-            return False
-        if order.type != OrderType.LIMIT or order.price is None:
-            return False  # Only limit orders with price can be canceled from book
-        book = self.bids if order.side == Side.BUY else self.asks
-        queue = book.get(order.price)
-        if queue:
-            for idx, o in enumerate(queue):
-                if o.id == order_id:
-                    del queue[idx]
-                    del self.order_map[order_id]
-                    return True
-        return False
-
-
-    def match(self) -> List[Trade]:
-        trades: List[Trade] = []
-        if not self.bids or not self.asks:
-            return trades
-        best_bid = max(self.bids.keys()) if self.bids else None
-        best_ask = min(self.asks.keys()) if self.asks else None
-        while best_bid is not None and best_ask is not None and best_bid >= best_ask:
-            bid_queue = self.bids[best_bid]
-            ask_queue = self.asks[best_ask]
-            bid_order = bid_queue[0]
-            ask_order = ask_queue[0]
-            trade_qty = min(bid_order.qty, ask_order.qty)
-            trade = Trade(
-                ts=max(bid_order.ts, ask_order.ts),
-                price=best_ask,
-                qty=trade_qty,
-                maker_id=ask_order.id,
-                taker_id=bid_order.id
-            )
-            trades.append(trade)
-            bid_order.qty -= trade_qty
-            ask_order.qty -= trade_qty
-            if bid_order.qty == 0:
-                bid_queue.popleft()
-                del self.order_map[bid_order.id]
-            if ask_order.qty == 0:
-                ask_queue.popleft()
-                del self.order_map[ask_order.id]
-            if not bid_queue:
-                del self.bids[best_bid]
-            if not ask_queue:
-                del self.asks[best_ask]
-            best_bid = max(self.bids.keys()) if self.bids else None
-            best_ask = min(self.asks.keys()) if self.asks else None
-        return trades
-
-    def get_orders_at_price(self, side: Side, price: float) -> List[Order]:
+    def verify(self) -> None:
+        check_book(self.bids, self.asks, self.order_map, (self.bid_qty, self.ask_qty))
+        self.owners.verify(self.order_map)
+        if list(self.bid_prices) != sorted(self.bids) or list(self.ask_prices) != sorted(self.asks):
+            raise AssertionError("sorted level prices out of sync")
+        if self.best_bid_price != (self.bid_prices[-1] if self.bids else None) or \
+                self.best_ask_price != (self.ask_prices[0] if self.asks else None):
+            raise AssertionError("cached best bid/ask price out of sync")
+
+    def get_orders_at_price(self, side: Side, price: int) -> List[Order]:
         if side == Side.BUY:
             return list(self.bids.get(price, []))
         else:
             return list(self.asks.get(price, []))
 
+    def levels_from_touch(self, side: Side) -> Iterator[PriceLevel]:
+        """Non-empty levels of one side, from the best price outward."""
+        if side == Side.BUY:
+            return map(self.bids.__getitem__, reversed(self.bid_prices))
+        return map(self.asks.__getitem__, self.ask_prices)
+
+    def load_levels(self, bids: Iterable[PriceLevel], asks: Iterable[PriceLevel], order_map: Dict[int, Order]) -> None:
+        """
+        Bulk-load an empty book from ready-built, non-empty levels (in any
+        order) holding exactly the orders in `order_map`.
+        """
+        if self.order_map:
+            raise ValueError("load_levels needs an empty book.")
+        self.bids = {lvl.price: lvl for lvl in bids}
+        self.asks = {lvl.price: lvl for lvl in asks}
+        self.bid_prices = SortedList(self.bids)
+        self.ask_prices = SortedList(self.asks)
+        self.best_bid_price = self.bid_prices[-1] if self.bid_prices else None
+        self.best_ask_price = self.ask_prices[0] if self.ask_prices else None
+        self.order_map = order_map
+        self.owners.rebuild(order_map.values())
+        self.bid_qty = sum(lvl.total_qty for lvl in self.bids.values())
+        self.ask_qty = sum(lvl.total_qty for lvl in self.asks.values())
+        if self.check_consistency:
+            self.verify()
+        if self._listeners:
+            self._publish()
+
     def depth(self, k: int = 5) -> dict:
         """
         Returns L2 depth snapshot: top-k price levels for bids and asks.
         Output: {'bids': [(price, qty)], 'asks': [(price, qty)]}
         """
-        bid_levels = sorted(self.bids.keys(), reverse=True)[:k]
-        ask_levels = sorted(self.asks.keys())[:k]
-        bids = [(p, sum(o.qty for o in self.bids[p])) for p in bid_levels]
-        asks = [(p, sum(o.qty for o in self.asks[p])) for p in ask_levels]
+        bids = [(p, self.bids[p].total_qty) for p in islice(reversed(self.bid_prices), k)]
+        asks = [(p, self.asks[p].total_qty) for p in islice(self.ask_prices, k)]
         return {'bids': bids, 'asks': asks}
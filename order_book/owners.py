@@ -0,0 +1,75 @@
+# Owner -> resting orders index, for per-participant mass cancels
+from typing import Dict, Hashable, Iterable
+
+
+class OwnerIndex:
+    """
+    Resting orders grouped by ``owner`` (orders with owner None are not
+    indexed). Each owner maps to an insertion-ordered {order_id: Order}
+    dict, so adding or removing one order is O(1) and an owner's orders
+    are found without scanning ``order_map``.
+    """
+    __slots__ = ('by_owner',)
+
+    def __init__(self):
+        self.by_owner: Dict[Hashable, dict] = {}
+
+    def add(self, order) -> None:
+        orders = self.by_owner.get(order.owner)
+        if orders is None:
+            self.by_owner[order.owner] = {order.id: order}
+        else:
+            orders[order.id] = order
+
+    def discard(self, order) -> None:
+        orders = self.by_owner.get(order.owner)
+        if orders is not None and orders.pop(order.id, None) is not None and not orders:
+            del self.by_owner[order.owner]
+
+    def orders(self, owner) -> dict:
+        """The owner's resting orders by id (empty if none); do not mutate."""
+        return self.by_owner.get(owner, {})
+
+    def take(self, owner, side=None, price_range=None) -> list:
+        """
+        Remove and return the owner's orders on `side` (None = both) priced
+        within the inclusive `price_range` (lo, hi), either bound None for
+        open (None = any price), in the order they were indexed.
+        """
+        orders = self.by_owner.get(owner)
+        if not orders:
+            return []
+        if side is None and price_range is None:
+            del self.by_owner[owner]
+            return list(orders.values())
+        lo, hi = price_range if price_range is not None else (None, None)
+        taken = [o for o in orders.values()
+                 if (side is None or o.side == side) and (lo is None or o.price >= lo) and (hi is None or o.price <= hi)]
+        for order in taken:
+            del orders[order.id]
+        if not orders:
+            del self.by_owner[owner]
+        return taken
+
+    def rebuild(self, orders: Iterable) -> None:
+        self.by_owner = {}
+        for order in orders:
+            if order.owner is not None:
+                self.add(order)
+
+    def verify(self, order_map: dict) -> None:
+        """Check the index against `order_map` (used in tests)."""
+        indexed = 0
+        for owner, orders in self.by_owner.items():
+            if not orders:
+                raise AssertionError(f"empty owner entry left for {owner!r}")
+            for order_id, order in orders.items():
+                if order_map.get(order_id) is not order or order.owner != owner:
+                    raise AssertionError(f"owner index has stale order {order_id} for {owner!r}")
+            indexed += len(orders)
+        owned = sum(1 for order in order_map.values() if order.owner is not None)
+        if indexed != owned:
+            raise AssertionError(f"owner index holds {indexed} orders, book has {owned} with an owner")
+
+    def __len__(self) -> int:
+        return len(self.by_owner)
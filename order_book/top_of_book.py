@@ -0,0 +1,54 @@
+# Incrementally maintained top of book and change notifications
+from typing import Callable, List, NamedTuple, Optional
+
+
+class TopOfBook(NamedTuple):
+    """Best prices (None for an empty side) and total resting qty per side."""
+    best_bid: Optional[int]
+    best_ask: Optional[int]
+    bid_qty: int
+    ask_qty: int
+
+    @property
+    def spread(self) -> Optional[int]:
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return self.best_ask - self.best_bid
+
+    @property
+    def depth(self) -> int:
+        return self.bid_qty + self.ask_qty
+
+
+class TopOfBookFeed:
+    """
+    Mixin for books that keep ``bid_qty``/``ask_qty`` (total resting qty per
+    side) up to date on every mutation and expose best_bid()/best_ask().
+
+    Callbacks registered with subscribe() receive a TopOfBook after each
+    book mutation that changed it, so spread/depth history costs O(1) per
+    event. With no subscribers the books skip publishing entirely.
+    """
+    _listeners: List[Callable[[TopOfBook], None]] = []  # replaced per instance on subscribe
+    _last_top: Optional[TopOfBook] = None
+
+    def top_of_book(self) -> TopOfBook:
+        bid = self.best_bid()
+        ask = self.best_ask()
+        return TopOfBook(bid[0] if bid else None, ask[0] if ask else None, self.bid_qty, self.ask_qty)
+
+    def subscribe(self, callback: Callable[[TopOfBook], None]) -> None:
+        if not self._listeners:
+            self._listeners = []
+            self._last_top = self.top_of_book()
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[TopOfBook], None]) -> None:
+        self._listeners.remove(callback)
+
+    def _publish(self) -> None:
+        top = self.top_of_book()
+        if top != self._last_top:
+            self._last_top = top
+            for callback in self._listeners:
+                callback(top)
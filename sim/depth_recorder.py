@@ -0,0 +1,73 @@
+# Time x level depth matrices, recorded from any backend's depth_arrays()
+from typing import Optional
+import numpy as np
+from lob.events import EventBlock
+
+FIELDS = ('bid_price', 'bid_qty', 'bid_count', 'ask_price', 'ask_qty', 'ask_count')
+
+
+def record_dtype(levels: int) -> np.dtype:
+    """One snapshot: its timestamp, then each DepthArrays field padded to `levels` slots."""
+    return np.dtype([('ts', '<f8')] + [(name, '<i8', (levels,)) for name in FIELDS])
+
+
+class DepthRecorder:
+    """
+    Appends top-`levels` L2 snapshots into a preallocated record array of
+    `capacity` rows, so ``matrix('bid_qty')`` is a (snapshots x levels)
+    matrix with no per-snapshot allocation. Levels missing from a thin book
+    are left 0 (price 0 never rests). With `path`, the rows live in a
+    memory-mapped .npy file instead (np.lib.format.open_memmap), readable
+    with np.load(path, mmap_mode='r'); rows past ``n`` stay zero.
+    """
+
+    def __init__(self, levels: int, capacity: int, path: Optional[str] = None):
+        if levels <= 0 or capacity <= 0:
+            raise ValueError("levels and capacity must be positive")
+        self.levels = levels
+        self.capacity = capacity
+        self.path = path
+        dtype = record_dtype(levels)
+        if path is None:
+            self.records = np.zeros(capacity, dtype=dtype)
+        else:
+            self.records = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(capacity,))
+        self.n = 0
+
+    def record(self, book, ts: float = 0.0) -> None:
+        """Append the top levels of `book` (any backend with depth_arrays)."""
+        if self.n == self.capacity:
+            raise ValueError(f"depth recorder is full ({self.capacity} snapshots)")
+        row = self.records[self.n]
+        row['ts'] = ts
+        for name, values in zip(FIELDS, book.depth_arrays(self.levels)):
+            row[name][:len(values)] = values
+        self.n += 1
+
+    def replay(self, matcher, block: EventBlock, every: int) -> int:
+        """
+        Submit `block` through matcher.submit_batch `every` events at a
+        time, recording the book after each chunk (stamped with the chunk's
+        latest ts; cancel rows carry ts 0). Returns the number of snapshots
+        recorded.
+        """
+        if every <= 0:
+            raise ValueError("every must be positive")
+        columns = (block.kind, block.order_id, block.ts, block.side, block.price, block.qty)
+        start = self.n
+        for lo in range(0, len(block), every):
+            hi = min(lo + every, len(block))
+            matcher.submit_batch(EventBlock(*(col[lo:hi] for col in columns)))
+            self.record(matcher.book, float(max(block.ts[lo:hi])))
+        return self.n - start
+
+    def matrix(self, field: str) -> np.ndarray:
+        """The recorded (snapshots x levels) matrix of one field, or the ts vector for 'ts'."""
+        if field != 'ts' and field not in FIELDS:
+            raise ValueError(f"unknown depth field {field!r}")
+        return self.records[field][:self.n]
+
+    def flush(self) -> None:
+        """Write recorded rows through to the memory-mapped file (no-op in memory)."""
+        if self.path is not None:
+            self.records.flush()
@@ -1,50 +1,188 @@
-
 import numpy as np
 import random
 from typing import Iterator, Optional, Tuple, Union
 from lob.order import Order, Side, OrderType
+from lob.instrument import Instrument, DEFAULT_INSTRUMENT
+from lob.events import EventBlock, EV_LIMIT, EV_MARKET, EV_CANCEL
+from lob.trade_buffer import TradeBuffer
+from sim.live_orders import LiveOrderSet
 
 class SyntheticEventStream:
-    def __init__(self, n_events=10000, mid_start=100.0, drift=0.0001, sigma=0.01, cancel_prob=0.1, seed: Optional[int]=42):
+    def __init__(self, n_events=10000, mid_start=100.0, drift=0.0001, sigma=0.01, cancel_prob=0.1, seed: Optional[int]=42,
+                 instrument: Instrument = DEFAULT_INSTRUMENT):
         self.n_events = n_events
+        self.instrument = instrument
         self.mid = mid_start
         self.drift = drift
         self.sigma = sigma
         self.cancel_prob = cancel_prob
+        # All randomness comes from these seeded generators, so a seed reproduces
+        # the stream; uniform draws in __iter__ use the cheaper stdlib generator
         self.rng = np.random.default_rng(seed)
-        self.order_id_gen = self._id_gen()
-        self.active_orders = []
-
-    def _id_gen(self):
-        i = 1
-        while True:
-            yield i
-            i += 1
+        self.uniform_rng = random.Random(seed)
+        # Resting orders that cancels may target; kept exact by on_fills()
+        self.active_orders = LiveOrderSet()
+        self.clock = 0.0
+        self.n_issued = 0  # orders issued so far; ids run 1..n_issued
 
     def __iter__(self) -> Iterator[Tuple[str, Union[Order, int]]]:
         for _ in range(self.n_events):
             # Poisson arrival
-            dt = self.rng.exponential(1.0)
+            self.clock += self.rng.exponential(1.0)
             self.mid += self.drift + self.rng.normal(0, self.sigma)
-            ts = dt
+            ts = self.clock
             # Decide cancel or new order
-            if self.active_orders and random.random() < self.cancel_prob:
-                cancel_order = random.choice(self.active_orders)
-                yield ('cancel', cancel_order.id)
+            uniform = self.uniform_rng.random
+            if self.active_orders and uniform() < self.cancel_prob:
+                yield ('cancel', self.active_orders.pop_random(uniform()))
                 continue
-            side = Side.BUY if random.random() < 0.5 else Side.SELL
-            order_type = OrderType.LIMIT if random.random() < 0.9 else OrderType.MARKET
+            side = Side.BUY if uniform() < 0.5 else Side.SELL
+            order_type = OrderType.LIMIT if uniform() < 0.9 else OrderType.MARKET
             price = None
             if order_type == OrderType.LIMIT:
-                price = round(self.mid + self.rng.normal(0, 0.05) * (1 if side == Side.BUY else -1), 2)
-            qty = int(self.rng.lognormal(mean=1.5, sigma=0.5))
+                # Mid path is simulated in price units; orders carry integer ticks
+                price = self.instrument.to_ticks(self.mid + self.rng.normal(0, 0.05) * (1 if side == Side.BUY else -1))
+            qty = max(1, int(self.rng.lognormal(mean=1.5, sigma=0.5)))
+            self.n_issued += 1
             order = Order(
-                id=next(self.order_id_gen),
+                id=self.n_issued,
                 ts=ts,
                 side=side,
                 type=order_type,
                 price=price,
                 qty=qty
             )
-            self.active_orders.append(order)
+            if order_type == OrderType.LIMIT:
+                self.active_orders.add(order.id, qty)
             yield ('add', order)
+
+    def on_fills(self, fills) -> None:
+        """
+        Feed back executions (a TradeBuffer or an iterable of Trades) so that
+        fully filled orders leave `active_orders` and are never picked for a
+        cancel. Without feedback, filled orders stay cancel candidates.
+        """
+        reduce = self.active_orders.reduce
+        if isinstance(fills, TradeBuffer):
+            for i in range(len(fills)):
+                qty = fills.qty[i]
+                reduce(fills.maker_id[i], qty)
+                reduce(fills.taker_id[i], qty)
+        else:
+            for trade in fills:
+                reduce(trade.maker_id, trade.qty)
+                reduce(trade.taker_id, trade.qty)
+
+    def blocks(self, block_size: int = 65536, track_live: bool = False) -> Iterator[EventBlock]:
+        """
+        Generate the stream as columnar EventBlocks of NumPy arrays, drawing
+        each random quantity for a whole chunk at once. Same model as
+        iteration but not the same draws, so the two modes give different
+        streams for one seed; each is reproducible from `seed`.
+
+        By default everything is vectorized and cancel targets are uniform
+        over all previously issued ids, live or not. With `track_live`,
+        targets are drawn from `active_orders` instead (feed fills back with
+        on_fills() between blocks); that takes a Python step per row, which
+        is several times slower than the vectorized default.
+        """
+        remaining = self.n_events
+        while remaining > 0:
+            n = min(block_size, remaining)
+            yield self._block(n, track_live)
+            remaining -= n
+
+    def _block(self, n: int, track_live: bool) -> EventBlock:
+        rng = self.rng
+        ts = self.clock + np.cumsum(rng.exponential(1.0, n))
+        mid = self.mid + np.cumsum(self.drift + rng.normal(0, self.sigma, n))
+        self.clock, self.mid = float(ts[-1]), float(mid[-1])
+        cancel_u = rng.random(n)
+        target_u = rng.random(n)
+        buy = rng.random(n) < 0.5
+        is_limit = rng.random(n) < 0.9
+        offset = rng.normal(0, 0.05, n)
+        qty = np.maximum(1, rng.lognormal(mean=1.5, sigma=0.5, size=n).astype(np.int64))
+
+        if track_live:
+            is_cancel, order_id = self._assign_live(cancel_u, target_u, is_limit, qty)
+        else:
+            is_cancel = cancel_u < self.cancel_prob
+            if self.n_issued == 0:
+                is_cancel[0] = False  # nothing to cancel yet
+            is_add = ~is_cancel
+            issued = self.n_issued + np.cumsum(is_add)  # orders issued up to and including row i
+            self.n_issued = int(issued[-1])
+            # Uniform target among the ids issued before this row
+            target = (target_u * (issued - is_add)).astype(np.int64) + 1
+            order_id = np.where(is_add, issued, target)
+
+        side = np.where(buy, int(Side.BUY), int(Side.SELL))
+        kind = np.where(is_cancel, EV_CANCEL, np.where(is_limit, EV_LIMIT, EV_MARKET))
+        price = np.rint((mid + offset * np.where(buy, 1.0, -1.0)) / self.instrument.tick_size).astype(np.int64)
+        price[kind != EV_LIMIT] = 0
+        qty[is_cancel] = 0
+        side[is_cancel] = 0
+        return EventBlock(kind, order_id, ts, side, price, qty)
+
+    def _assign_live(self, cancel_u, target_u, is_limit, qty):
+        """Sequentially pick cancel targets from, and add new limit orders to, active_orders."""
+        live = self.active_orders
+        cancel_prob = self.cancel_prob
+        issued = self.n_issued
+        order_id = [0] * len(cancel_u)
+        is_cancel = [False] * len(cancel_u)
+        for i, (cu, tu, lim, q) in enumerate(zip(cancel_u.tolist(), target_u.tolist(), is_limit.tolist(), qty.tolist())):
+            if live and cu < cancel_prob:
+                order_id[i] = live.pop_random(tu)
+                is_cancel[i] = True
+            else:
+                issued += 1
+                order_id[i] = issued
+                if lim:
+                    live.add(issued, q)
+        self.n_issued = issued
+        return np.array(is_cancel), np.array(order_id, dtype=np.int64)
+
+
+class MultiSymbolEventStream:
+    """
+    Independent SyntheticEventStreams, one per symbol (each seeded from
+    `seed` and its index), merged into one stream in timestamp order.
+    blocks() yields ``(symbol_index, EventBlock)`` pairs with a per-row
+    symbol column; ts never decreases within or across blocks, each
+    symbol's own events stay in order and its order ids are its own.
+    """
+
+    def __init__(self, symbols, n_events=100000, seed: int = 42, **stream_kwargs):
+        self.symbols = list(symbols)
+        self.n_events = n_events
+        per_symbol = -(-n_events // len(self.symbols))
+        self.streams = [SyntheticEventStream(n_events=per_symbol, seed=seed * 100003 + i, **stream_kwargs)
+                        for i in range(len(self.symbols))]
+
+    def blocks(self, block_size: int = 65536) -> Iterator[Tuple[np.ndarray, EventBlock]]:
+        """
+        Blocks of about `block_size` rows. Each round draws the same number
+        of events from every symbol and merges them with the rows held back
+        from earlier rounds; only rows up to the lowest last ts among the
+        symbols are emitted (no symbol can still produce an earlier one),
+        the rest wait for the next round.
+        """
+        names = ('kind', 'order_id', 'ts', 'side', 'price', 'qty')
+        remaining = self.n_events
+        per_symbol = max(1, block_size // len(self.symbols))
+        held_symbol = np.empty(0, dtype=np.uint32)
+        held = [np.empty(0, dtype=np.float64 if name == 'ts' else np.int64) for name in names]
+        while remaining > 0:
+            parts = [(i, s._block(per_symbol, track_live=False)) for i, s in enumerate(self.streams)]
+            watermark = min(b.ts[-1] for _, b in parts)
+            symbol = np.concatenate([held_symbol] + [np.full(len(b), i, dtype=np.uint32) for i, b in parts])
+            columns = [np.concatenate([held[j]] + [getattr(b, name) for _, b in parts])
+                       for j, name in enumerate(names)]
+            order = np.argsort(columns[2], kind='stable')  # held rows (earlier) win ts ties
+            ready = int(np.searchsorted(columns[2][order], watermark, side='right'))
+            emit, rest = order[:min(ready, remaining)], order[ready:]
+            held_symbol, held = symbol[rest], [col[rest] for col in columns]
+            remaining -= len(emit)
+            yield symbol[emit], EventBlock(*(col[emit] for col in columns))
@@ -1,94 +1,248 @@
 # Microbenchmark harness
 import time
-import statistics
-from order_book.order import Trade
+import itertools
+from array import array
+import numpy as np
+from lob.matcher import Matcher
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _percentile_key(p) -> str:
+    return f"p{p:g}"
+
+
+def measure_timer_overhead(samples: int = 100000) -> int:
+    """Median cost in ns of one perf_counter_ns() reading, from back-to-back pairs."""
+    clock = time.perf_counter_ns
+    deltas = array('q', bytes(8 * samples))
+    for i in range(samples):
+        t0 = clock()
+        deltas[i] = clock() - t0
+    return int(np.median(np.frombuffer(deltas, dtype=np.int64)))
+
+
+class SampleBuffer:
+    """
+    Exact latency samples in a preallocated int64 buffer. Recording is one
+    store into an array('q'); the buffer doubles when full, and summaries
+    view it as a NumPy array without copying.
+    """
+    __slots__ = ('data', 'n')
+
+    def __init__(self, capacity: int = 1 << 16):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.data = array('q', bytes(8 * capacity))
+        self.n = 0
+
+    def record(self, ns: int) -> None:
+        n = self.n
+        if n == len(self.data):
+            self.data.extend(array('q', bytes(8 * n)))
+        self.data[n] = ns
+        self.n = n + 1
+
+    def extend(self, values) -> None:
+        """Record an array of samples with one vectorized copy."""
+        values = np.asarray(values, dtype=np.int64)
+        n = self.n
+        end = n + len(values)
+        if end > len(self.data):
+            self.data.extend(array('q', bytes(8 * max(end - len(self.data), n))))
+        np.frombuffer(self.data, dtype=np.int64, count=end)[n:] = values
+        self.n = end
+
+    def __len__(self) -> int:
+        return self.n
+
+    def values(self) -> np.ndarray:
+        """Copy of the recorded samples."""
+        return np.frombuffer(self.data, dtype=np.int64, count=self.n).copy()
+
+    def summary(self) -> dict:
+        if not self.n:
+            return {}
+        # Negative samples can only come from overhead subtraction; clamp them
+        values = np.maximum(np.frombuffer(self.data, dtype=np.int64, count=self.n), 0)
+        stats = dict(zip(map(_percentile_key, PERCENTILES), np.percentile(values, PERCENTILES).tolist()))
+        stats['median'] = stats['p50']
+        stats['mean'] = float(values.mean())
+        stats['min'] = int(values.min())
+        stats['max'] = int(values.max())
+        return stats
+
+
+class LogHistogram:
+    """
+    HDR-style log-bucketed latency histogram with fixed memory. Values below
+    ``2**precision_bits`` get exact buckets; above that each power of two is
+    split into ``2**(precision_bits - 1)`` buckets, so percentiles, min and
+    max are within a relative error of ``2**-(precision_bits - 1)``. Count
+    and mean are exact. Values of ``2**max_bits`` ns or more are clamped.
+    """
+    __slots__ = ('precision_bits', 'max_value', 'counts', 'n', 'total')
+
+    def __init__(self, precision_bits: int = 8, max_bits: int = 40):
+        if not 1 <= precision_bits < max_bits:
+            raise ValueError("need 1 <= precision_bits < max_bits")
+        self.precision_bits = precision_bits
+        self.max_value = (1 << max_bits) - 1
+        self.counts = [0] * (self._bucket(self.max_value) + 1)
+        self.n = 0
+        self.total = 0
+
+    def _bucket(self, ns: int) -> int:
+        shift = ns.bit_length() - self.precision_bits
+        if shift <= 0:
+            return ns
+        return (shift << (self.precision_bits - 1)) + (ns >> shift)
+
+    def record(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        elif ns > self.max_value:
+            ns = self.max_value
+        self.n += 1
+        self.total += ns
+        shift = ns.bit_length() - self.precision_bits
+        if shift <= 0:
+            self.counts[ns] += 1
+        else:
+            self.counts[(shift << (self.precision_bits - 1)) + (ns >> shift)] += 1
+
+    def __len__(self) -> int:
+        return self.n
+
+    def bucket_values(self) -> np.ndarray:
+        """Representative (midpoint) value of every bucket, in ns."""
+        half = 1 << (self.precision_bits - 1)
+        idx = np.arange(len(self.counts), dtype=np.int64)
+        shift = np.maximum(idx // half - 1, 0)
+        low = np.where(idx < 2 * half, idx, (idx - shift * half) << shift)
+        return low + ((1 << shift) - 1) / 2
+
+    def summary(self) -> dict:
+        if not self.n:
+            return {}
+        counts = np.array(self.counts, dtype=np.int64)
+        values = self.bucket_values()
+        cum = np.cumsum(counts)
+        # Nearest-rank percentiles, all resolved in one searchsorted pass
+        ranks = np.maximum(np.ceil(np.array(PERCENTILES) / 100 * self.n), 1)
+        stats = dict(zip(map(_percentile_key, PERCENTILES), values[np.searchsorted(cum, ranks)].tolist()))
+        occupied = np.flatnonzero(counts)
+        stats['median'] = stats['p50']
+        stats['mean'] = self.total / self.n
+        stats['min'] = float(values[occupied[0]])
+        stats['max'] = float(values[occupied[-1]])
+        return stats
+
 
 class LatencyBench:
-    def __init__(self, book, event_stream):
+    """
+    Per-event latency profile of a book driven by an event stream.
+
+    Orders go through a Matcher, as in production: each add is one timed
+    Matcher.submit_fills call, so market orders sweep and time in force
+    and iceberg reserve are honoured. Adds that traded are recorded under
+    match and adds that only rested under insert; each cancel under
+    cancel, and every event under overall (two clock readings each). Samples
+    go to a SampleBuffer (exact) or, with ``histogram=True``, a LogHistogram
+    (fixed memory for arbitrarily long runs). With ``subtract_overhead`` the
+    measured cost of a clock reading is subtracted from every interval.
+    """
+
+    STAGES = ('overall', 'insert', 'cancel', 'match')
+
+    def __init__(self, book, event_stream, histogram=False, capacity=1 << 16, subtract_overhead=False):
         self.book = book
+        self.matcher = Matcher(book)
         self.event_stream = event_stream
-        self.latencies = []
-        self.insert_latencies = []
-        self.cancel_latencies = []
-        self.match_latencies = []
-        self.trade_emit_latencies = []
-        self.event_count = 0
+        self.histogram = histogram
+        self.capacity = capacity
+        self.subtract_overhead = subtract_overhead
+        self.timer_overhead_ns = 0
+        self._reset()
         self.start_ns = None
         self.end_ns = None
 
-    def run(self, warmup=100):
-        # Warmup
-        for i, event in enumerate(self.event_stream):
-            if i >= warmup:
-                break
-            self._apply_event(event)
-        # Reset for measurement
-        self.latencies = []
-        self.insert_latencies = []
-        self.cancel_latencies = []
-        self.match_latencies = []
-        self.trade_emit_latencies = []
+    def _recorder(self):
+        return LogHistogram() if self.histogram else SampleBuffer(self.capacity)
+
+    def _reset(self):
+        self.latencies = self._recorder()
+        self.insert_latencies = self._recorder()
+        self.cancel_latencies = self._recorder()
+        self.match_latencies = self._recorder()
         self.event_count = 0
-        self.start_ns = time.perf_counter_ns()
-        for event in self.event_stream:
-            t0 = time.perf_counter_ns()
-            self._apply_event(event)
-            t1 = time.perf_counter_ns()
-            self.latencies.append(t1 - t0)
-            self.event_count += 1
-        self.end_ns = time.perf_counter_ns()
+
+    def run(self, warmup=100):
+        # Warmup: the first `warmup` events build book state without being timed
+        events = iter(self.event_stream)
+        # Streams that track live orders get fills fed back, outside the timed region
+        on_fills = getattr(self.event_stream, 'on_fills', None)
+        for event in itertools.islice(events, warmup):
+            fills = self._apply_event(event)
+            if fills and on_fills:
+                on_fills(fills)
+        self._reset()
+        self.timer_overhead_ns = measure_timer_overhead() if self.subtract_overhead else 0
+        one = self.timer_overhead_ns
+
+        clock = time.perf_counter_ns
+        submit, cancel_order = self.matcher.submit_fills, self.book.cancel_order
+        record_all = self.latencies.record
+        record_insert = self.insert_latencies.record
+        record_match = self.match_latencies.record
+        record_cancel = self.cancel_latencies.record
+        count = 0
+        self.start_ns = clock()
+        for etype, payload in events:
+            if etype == 'add':
+                t0 = clock()
+                fills = submit(payload)
+                t1 = clock()
+                if fills:
+                    record_match(t1 - t0 - one)
+                    if on_fills:
+                        on_fills(fills)
+                else:
+                    record_insert(t1 - t0 - one)
+                record_all(t1 - t0 - one)
+            elif etype == 'cancel':
+                t0 = clock()
+                cancel_order(payload)
+                t1 = clock()
+                record_cancel(t1 - t0 - one)
+                record_all(t1 - t0 - one)
+            count += 1
+        self.end_ns = clock()
+        self.event_count = count
 
     def _apply_event(self, event):
         etype, payload = event
         if etype == 'add':
-            t0 = time.perf_counter_ns()
-            self.book.add_order(payload)
-            t1 = time.perf_counter_ns()
-            self.insert_latencies.append(t1 - t0)
-
-            t2 = time.perf_counter_ns()
-            trades = self.book.match()
-            t3 = time.perf_counter_ns()
-            self.match_latencies.append(t3 - t2)
-
-            # Trade emit: time for creating Trade objects (if any)
-            if trades:
-                for trade in trades:
-                    # Simulate trade emit as time to instantiate Trade
-                    t_emit0 = time.perf_counter_ns()
-                    _ = Trade(trade.ts, trade.price, trade.qty, trade.maker_id, trade.taker_id)
-                    t_emit1 = time.perf_counter_ns()
-                    self.trade_emit_latencies.append(t_emit1 - t_emit0)
+            return self.matcher.submit_fills(payload)
         elif etype == 'cancel':
-            t0 = time.perf_counter_ns()
             self.book.cancel_order(payload)
-            t1 = time.perf_counter_ns()
-            self.cancel_latencies.append(t1 - t0)
 
     def stats(self):
-        def stage_stats(latencies):
-            if not latencies:
-                return {}
-            percentiles = [50, 90, 99, 99.9]
-            stats = {f'p{int(p)}': statistics.quantiles(latencies, n=100)[int(p)-1] for p in percentiles}
-            stats['median'] = statistics.median(latencies)
-            stats['mean'] = statistics.mean(latencies)
-            stats['min'] = min(latencies)
-            stats['max'] = max(latencies)
-            return stats
-
-        if not self.latencies or self.start_ns is None or self.end_ns is None:
+        if not len(self.latencies) or self.start_ns is None or self.end_ns is None:
             return {}
         total_time = (self.end_ns - self.start_ns) / 1e9  # seconds
         throughput = self.event_count / total_time if total_time > 0 else 0
+        overall = self.latencies.summary()
         return {
-            'overall': stage_stats(self.latencies),
-            'insert': stage_stats(self.insert_latencies),
-            'cancel': stage_stats(self.cancel_latencies),
-            'match': stage_stats(self.match_latencies),
-            'trade_emit': stage_stats(self.trade_emit_latencies),
+            'overall': overall,
+            'insert': self.insert_latencies.summary(),
+            'cancel': self.cancel_latencies.summary(),
+            'match': self.match_latencies.summary(),
+            'mean': overall['mean'],
+            'median': overall['median'],
             'throughput': throughput,
-            'total_events': self.event_count
+            'total_events': self.event_count,
+            'timer_overhead_ns': self.timer_overhead_ns
         }
 
     def pretty_report(self):
@@ -99,14 +253,15 @@ class LatencyBench:
                 print(f"{label}: No data")
                 return
             print(f"{label}:")
-            for p in ['p50', 'p90', 'p99', 'p99.9', 'median', 'mean', 'min', 'max']:
+            for p in list(map(_percentile_key, PERCENTILES)) + ['median', 'mean', 'min', 'max']:
                 if p in s:
                     print(f"  {p}: {s[p]:.2f} ns")
         print("Latency Percentiles by Stage:")
         print_stage('insert', 'Insert')
         print_stage('cancel', 'Cancel')
         print_stage('match', 'Match')
-        print_stage('trade_emit', 'Trade Emit')
         print_stage('overall', 'Overall')
+        if stats.get('timer_overhead_ns'):
+            print(f"Timer overhead subtracted: {stats['timer_overhead_ns']} ns per reading")
         print(f"Throughput: {stats.get('throughput', 0):.2f} events/sec")
         print(f"Total Events: {stats.get('total_events', 0)}")
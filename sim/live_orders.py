@@ -0,0 +1,65 @@
+# Live-order tracking for cancel generation
+from typing import Dict, List
+
+
+class LiveOrderSet:
+    """
+    Ids of live (resting) orders with their remaining quantity.
+
+    Ids sit in a dense array with an id -> position dict; removal swaps the
+    last id into the hole, so add, remove and uniform sampling are all O(1)
+    and memory is proportional to the live orders only.
+    """
+    __slots__ = ('ids', 'qty', 'index')
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.qty: List[int] = []
+        self.index: Dict[int, int] = {}
+
+    def add(self, order_id: int, qty: int) -> None:
+        if order_id in self.index:
+            return
+        self.index[order_id] = len(self.ids)
+        self.ids.append(order_id)
+        self.qty.append(qty)
+
+    def remove(self, order_id: int) -> bool:
+        pos = self.index.pop(order_id, None)
+        if pos is None:
+            return False
+        last_id = self.ids.pop()
+        last_qty = self.qty.pop()
+        if last_id != order_id:
+            self.ids[pos] = last_id
+            self.qty[pos] = last_qty
+            self.index[last_id] = pos
+        return True
+
+    def reduce(self, order_id: int, qty: int) -> bool:
+        """Apply a fill of `qty`; the order leaves the set once fully filled."""
+        pos = self.index.get(order_id)
+        if pos is None:
+            return False
+        remaining = self.qty[pos] - qty
+        if remaining > 0:
+            self.qty[pos] = remaining
+        else:
+            self.remove(order_id)
+        return True
+
+    def pick(self, u: float) -> int:
+        """Return a uniformly chosen id without removing it, given a uniform draw `u` in [0, 1)."""
+        return self.ids[int(u * len(self.ids))]
+
+    def pop_random(self, u: float) -> int:
+        """Remove and return a uniformly chosen id, given a uniform draw `u` in [0, 1)."""
+        order_id = self.ids[int(u * len(self.ids))]
+        self.remove(order_id)
+        return order_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self.index
@@ -0,0 +1,182 @@
+# Parallel parameter sweeps over stream settings x backends x seeds
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from lob.book_custom import CustomOrderBook
+from lob.matcher import Matcher
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+from sim.event_stream import SyntheticEventStream
+from sim.latency import SampleBuffer
+
+BACKENDS = {
+    'HeapOrderBook': HeapOrderBook,
+    'SortedOrderBook': SortedOrderBook,
+    'LimitOrderBook': LimitOrderBook,
+    'CustomOrderBook': CustomOrderBook,
+}
+
+# Defaults for any stream parameter a cell does not set
+CELL_DEFAULTS = {'n_events': 10000, 'drift': 0.0001, 'sigma': 0.01, 'cancel_prob': 0.1,
+                 'backend': 'CustomOrderBook', 'replicate': 0}
+
+
+def param_grid(**axes) -> List[dict]:
+    """Cartesian product of keyword axes, e.g. param_grid(sigma=[...], backend=[...], replicate=range(5))."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def cell_key(cell: dict) -> str:
+    """Canonical identity of a cell (its full parameter set)."""
+    return json.dumps(dict(CELL_DEFAULTS, **cell), sort_keys=True)
+
+
+def task_seed(cell: dict, base_seed: int = 0) -> int:
+    """Seed derived from the cell's parameters, identical in every process and run."""
+    digest = hashlib.sha256(f"{base_seed}:{cell_key(cell)}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little') >> 1
+
+
+def run_cell(cell: dict, base_seed: int = 0) -> dict:
+    """
+    Run one configuration and return only summary metrics: time-averaged
+    spread and depth (from top-of-book change samples), fill rates and
+    per-event latency percentiles. Trades never leave this function.
+    """
+    params = dict(CELL_DEFAULTS, **cell)
+    stream = SyntheticEventStream(n_events=params['n_events'], drift=params['drift'], sigma=params['sigma'],
+                                  cancel_prob=params['cancel_prob'], seed=task_seed(cell, base_seed))
+    book = BACKENDS[params['backend']]()
+    matcher = Matcher(book)
+
+    # The book pushes a sample only when its top changes; each event adds the current one
+    top = book.top_of_book()
+
+    def on_top(sample):
+        nonlocal top
+        top = sample
+    book.subscribe(on_top)
+
+    latencies = SampleBuffer(max(1, params['n_events']))
+    clock = time.perf_counter_ns
+    submitted = filled = orders = orders_filled = n_trades = 0
+    events = spread_sum = depth_sum = two_sided = 0
+    start = clock()
+    for etype, payload in stream:
+        if etype == 'cancel':
+            t0 = clock()
+            book.cancel_order(payload)
+            latencies.record(clock() - t0)
+        else:
+            qty = payload.qty
+            t0 = clock()
+            fills = matcher.submit_fills(payload)
+            latencies.record(clock() - t0)
+            n = len(fills)
+            orders += 1
+            submitted += qty
+            if n:
+                n_trades += n
+                orders_filled += 1
+                filled += qty - payload.qty
+                stream.on_fills(fills)
+        if top.spread is not None:
+            spread_sum += top.spread
+            two_sided += 1
+        depth_sum += top.depth
+        events += 1
+    elapsed = (clock() - start) / 1e9
+
+    lat = latencies.summary()
+    result = {
+        'mean_spread': spread_sum / two_sided if two_sided else float('nan'),
+        'mean_depth': depth_sum / events if events else 0.0,
+        'two_sided_frac': two_sided / events if events else 0.0,
+        'n_trades': n_trades,
+        'fill_rate_qty': filled / submitted if submitted else 0.0,
+        'fill_rate_orders': orders_filled / orders if orders else 0.0,
+        'latency_p50_ns': lat.get('p50', float('nan')),
+        'latency_p99_ns': lat.get('p99', float('nan')),
+        'latency_mean_ns': lat.get('mean', float('nan')),
+        'throughput_eps': events / elapsed if elapsed > 0 else 0.0,
+    }
+    return dict(params, seed=task_seed(cell, base_seed), **result)
+
+
+def _run_indexed(task):
+    index, cell, base_seed = task
+    return index, run_cell(cell, base_seed)
+
+
+def load_checkpoint(path: str) -> Dict[str, dict]:
+    """Completed cells from a JSON-lines checkpoint, by cell_key. A torn last line is ignored."""
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                done[record['key']] = record['result']
+    return done
+
+
+def _terminate_torn_line(path: str) -> None:
+    """End a last line left unterminated by an interrupted run, so appends start on a fresh line."""
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+
+def run_sweep(cells: Iterable[dict], checkpoint: Optional[str] = None, processes: Optional[int] = None,
+              base_seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Run every cell over a process pool and return one columnar table
+    (column name -> NumPy array, rows in `cells` order). With `checkpoint`,
+    each finished cell is appended to that JSON-lines file as it
+    completes, and cells already in it are not re-run, so an interrupted
+    sweep resumes where it stopped. `processes=1` runs in-process.
+    """
+    cells = list(cells)
+    done = load_checkpoint(checkpoint)
+    rows: List[Optional[dict]] = [done.get(cell_key(cell)) for cell in cells]
+    pending = [(i, cell, base_seed) for i, cell in enumerate(cells) if rows[i] is None]
+    with contextlib.ExitStack() as stack:
+        out = None
+        if checkpoint:
+            _terminate_torn_line(checkpoint)
+            out = stack.enter_context(open(checkpoint, 'a'))
+        if processes == 1 or len(pending) <= 1:
+            results = map(_run_indexed, pending)
+        else:
+            pool = stack.enter_context(multiprocessing.Pool(processes))
+            results = pool.imap_unordered(_run_indexed, pending)
+        for index, result in results:
+            rows[index] = result
+            if out:
+                out.write(json.dumps({'key': cell_key(cells[index]), 'result': result}) + '\n')
+                out.flush()
+    return results_table(rows)
+
+
+def results_table(rows: List[dict]) -> Dict[str, np.ndarray]:
+    """Row dicts -> columns; numeric columns become NumPy arrays, others object arrays."""
+    if not rows:
+        return {}
+    columns = {}
+    for name in rows[0]:
+        values = [row[name] for row in rows]
+        column = np.array(values)
+        columns[name] = column if column.dtype.kind in 'biuf' else np.array(values, dtype=object)
+    return columns
@@ -0,0 +1,91 @@
+import unittest
+from lob.book_custom import CustomOrderBook
+from lob.order import Order, Side, OrderType
+
+class TestCustomOrderBook(unittest.TestCase):
+    def setUp(self):
+        self.book = CustomOrderBook(capacity=64, check_consistency=True)
+        self.order1 = Order(id=1, side=Side.BUY, price=100, qty=10, ts=1.0, type=OrderType.LIMIT)
+        self.order2 = Order(id=2, side=Side.SELL, price=101, qty=5, ts=2.0, type=OrderType.LIMIT)
+
+    def test_add_order(self):
+        self.book.add_order(self.order1)
+        self.book.add_order(self.order2)
+        self.assertEqual(self.book.best_bid(), (100, 10))
+        self.assertEqual(self.book.best_ask(), (101, 5))
+
+    def test_cancel_order(self):
+        self.book.add_order(self.order1)
+        self.assertTrue(self.book.cancel_order(1))
+        self.assertFalse(self.book.cancel_order(1))
+        self.assertIsNone(self.book.best_bid())
+
+    def test_match(self):
+        self.book.add_order(self.order1)
+        self.book.add_order(Order(id=3, side=Side.SELL, price=99, qty=4, ts=3.0, type=OrderType.LIMIT))
+        self.book.add_order(Order(id=4, side=Side.SELL, price=100, qty=10, ts=4.0, type=OrderType.LIMIT))
+        trades = self.book.match()
+        self.assertEqual([(t.price, t.qty, t.maker_id) for t in trades], [(99, 4, 3), (100, 6, 4)])
+        self.assertIsNone(self.book.best_bid())
+        self.assertEqual(self.book.best_ask(), (100, 4))
+
+    def test_best_moves_when_touch_empties(self):
+        for i, price in enumerate((100, 97, 95)):
+            self.book.add_order(Order(id=10 + i, side=Side.BUY, price=price, qty=1, ts=1.0, type=OrderType.LIMIT))
+        self.book.cancel_order(10)
+        self.assertEqual(self.book.best_bid(), (97, 1))
+        self.book.execute_order(11, 1)
+        self.assertEqual(self.book.best_bid(), (95, 1))
+
+    def test_recenter_and_grow(self):
+        self.book.add_order(self.order1)
+        self.book.add_order(Order(id=5, side=Side.SELL, price=500, qty=2, ts=5.0, type=OrderType.LIMIT))
+        self.book.add_order(Order(id=6, side=Side.BUY, price=-300, qty=3, ts=6.0, type=OrderType.LIMIT))
+        self.assertGreaterEqual(self.book.capacity, 2 * 801)
+        self.assertEqual(self.book.best_bid(), (100, 10))
+        self.assertEqual(self.book.best_ask(), (500, 2))
+        self.assertEqual(self.book.depth(k=5)['bids'], [(100, 10), (-300, 3)])
+        self.assertEqual(len(self.book.get_orders_at_price(Side.SELL, 500)), 1)
+
+    def test_outliers_do_not_stretch_the_ladder(self):
+        book = CustomOrderBook(capacity=64, max_capacity=256, check_consistency=True)
+        book.add_order(self.order1)
+        book.add_order(self.order2)
+        book.add_order(Order(id=3, side=Side.SELL, price=10**9, qty=2, ts=3.0, type=OrderType.LIMIT))
+        book.add_order(Order(id=4, side=Side.BUY, price=-10**9, qty=3, ts=4.0, type=OrderType.LIMIT))
+        book.add_order(Order(id=5, side=Side.BUY, price=10**6, qty=1, ts=5.0, type=OrderType.LIMIT))
+        self.assertLessEqual(book.capacity, 256)
+        self.assertEqual(book.best_bid(), (10**6, 1))
+        self.assertEqual(book.best_ask(), (101, 5))
+        self.assertEqual(book.depth(k=5), {'bids': [(10**6, 1), (100, 10), (-10**9, 3)],
+                                           'asks': [(101, 5), (10**9, 2)]})
+        self.assertEqual([o.id for o in book.get_orders_at_price(Side.SELL, 10**9)], [3])
+        self.assertTrue(book.cancel_order(5))
+        self.assertEqual(book.best_bid(), (100, 10))
+        self.assertEqual(book.match(), [])
+        self.assertTrue(book.execute_order(2, 5))
+        self.assertEqual(book.best_ask(), (10**9, 2))
+        # Drift within max_capacity still recenters onto the ladder
+        book.add_order(Order(id=6, side=Side.SELL, price=200, qty=4, ts=6.0, type=OrderType.LIMIT))
+        self.assertEqual(book.best_ask(), (200, 4))
+        self.assertEqual(len(book.ask_overflow), 1)
+        self.assertTrue(book.cancel_order(3))
+        self.assertTrue(book.cancel_order(4))
+        self.assertEqual((len(book.bid_overflow), len(book.ask_overflow)), (0, 0))
+
+    def test_overflow_levels_move_onto_a_recentered_ladder(self):
+        book = CustomOrderBook(capacity=64, max_capacity=256, check_consistency=True)
+        book.add_order(self.order1)
+        book.add_order(Order(id=3, side=Side.SELL, price=400, qty=2, ts=3.0, type=OrderType.LIMIT))
+        self.assertEqual(list(book.ask_overflow), [400])
+        book.cancel_order(1)
+        book.add_order(Order(id=4, side=Side.SELL, price=380, qty=1, ts=4.0, type=OrderType.LIMIT))
+        self.assertEqual(len(book.ask_overflow), 0)
+        self.assertEqual(book.depth(k=5)['asks'], [(380, 1), (400, 2)])
+
+    def test_rejects_fractional_price(self):
+        with self.assertRaises(ValueError):
+            self.book.add_order(Order(id=7, side=Side.BUY, price=100.5, qty=1, ts=7.0, type=OrderType.LIMIT))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import random
 import unittest
-from order_book.book_heap import HeapOrderBook
+from order_book.book_heap import HeapOrderBook, COMPACT_MIN_STALE
 from order_book.order import Order, Side, OrderType
 
 class TestHeapOrderBook(unittest.TestCase):
@@ -25,5 +26,65 @@ class TestHeapOrderBook(unittest.TestCase):
         trades = self.book.match()
         self.assertTrue(len(trades) > 0)
 
+    def test_level_aggregates_checked(self):
+        book = HeapOrderBook(check_consistency=True)
+        book.add_order(Order(id=1, side=Side.BUY, price=100.0, qty=10, ts=1.0, type=OrderType.LIMIT))
+        book.add_order(Order(id=2, side=Side.BUY, price=100.0, qty=4, ts=2.0, type=OrderType.LIMIT))
+        self.assertEqual(book.best_bid(), (100.0, 14))
+        book.add_order(Order(id=3, side=Side.SELL, price=100.0, qty=12, ts=3.0, type=OrderType.LIMIT))
+        book.match()
+        self.assertEqual(book.best_bid(), (100.0, 2))
+        self.assertEqual(len(book.bids[100.0]), 1)
+        self.assertTrue(book.execute_order(2, 1))
+        self.assertEqual(book.best_bid(), (100.0, 1))
+        self.assertTrue(book.cancel_order(2))
+        self.assertIsNone(book.best_bid())
+
+    def test_churn_at_one_price_reuses_its_heap_entry(self):
+        book = HeapOrderBook(check_consistency=True)
+        book.add_order(Order(id=0, side=Side.BUY, price=99, qty=1, ts=0.0, type=OrderType.LIMIT))
+        for i in range(1, 500):
+            book.add_order(Order(id=i, side=Side.BUY, price=100, qty=1, ts=float(i), type=OrderType.LIMIT))
+            book.cancel_order(i)
+        self.assertEqual(len(book.bid_heap), 2)
+        self.assertEqual(book.best_bid(), (99, 1))
+        self.assertEqual(book.heap_stats()['stale'], 0)
+
+    def test_stale_entries_stay_bounded(self):
+        book = HeapOrderBook(compact_ratio=0.5)
+        rng = random.Random(1)
+        live = []
+        for i in range(20000):
+            if live and rng.random() < 0.5:
+                book.cancel_order(live.pop(rng.randrange(len(live))))
+            else:
+                # Drifting prices: most levels empty and are never seen again
+                price = 10000 + i // 20 + rng.randint(-30, 30)
+                side = Side.BUY if rng.random() < 0.5 else Side.SELL
+                book.add_order(Order(id=i, side=side, price=price - 40 if side == Side.BUY else price + 40,
+                                     qty=1, ts=float(i), type=OrderType.LIMIT))
+                live.append(i)
+            stats = book.heap_stats()
+            for side in ('bid', 'ask'):
+                self.assertLessEqual(stats[f'{side}_heap'] - stats[f'{side}_levels'],
+                                     0.5 * stats[f'{side}_levels'] + COMPACT_MIN_STALE)
+        self.assertGreater(book.heap_stats()['compactions'], 0)
+        book.verify()
+        self.assertEqual(book.best_bid()[0], max(book.bids))
+        self.assertEqual(book.best_ask()[0], min(book.asks))
+
+    def test_mass_cancel_compacts_only_past_the_threshold(self):
+        book = HeapOrderBook(check_consistency=True)
+        for i in range(400):
+            book.add_order(Order(id=i, side=Side.BUY, price=1000 - i, qty=1, ts=float(i), type=OrderType.LIMIT,
+                                 owner='a' if i % 20 == 0 else 'b'))
+        book.mass_cancel('a')  # 20 emptied levels: left as stale entries, no rebuild
+        self.assertEqual(book.heap_stats()['stale'], 20)
+        self.assertEqual(book.compactions, 0)
+        book.mass_cancel('b', price_range=(None, 900))
+        self.assertGreater(book.compactions, 0)
+        self.assertLessEqual(book.heap_stats()['stale'], 0.5 * len(book.bids) + COMPACT_MIN_STALE)
+        self.assertEqual(book.best_bid(), (999, 1))
+
 if __name__ == "__main__":
     unittest.main()
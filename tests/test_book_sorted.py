@@ -20,13 +20,27 @@ class TestSortedOrderBook(unittest.TestCase):
         self.assertTrue(len(self.book.bids) == 0)
 
     def test_match(self):
-        # Use float prices for both orders to ensure matching
-        buy_order = Order(id=1, side=Side.BUY, price=100.0, qty=10, ts=1.0, type=OrderType.LIMIT)
-        sell_order = Order(id=2, side=Side.SELL, price=100.0, qty=10, ts=2.0, type=OrderType.LIMIT)
+        # Integer tick prices match like any other
+        buy_order = Order(id=1, side=Side.BUY, price=100, qty=10, ts=1.0, type=OrderType.LIMIT)
+        sell_order = Order(id=2, side=Side.SELL, price=100, qty=10, ts=2.0, type=OrderType.LIMIT)
         self.book.add_order(buy_order)
         self.book.add_order(sell_order)
         trades = self.book.match()
         self.assertTrue(len(trades) > 0)
 
+    def test_level_aggregates_checked(self):
+        book = SortedOrderBook(check_consistency=True)
+        book.add_order(Order(id=1, side=Side.BUY, price=100.0, qty=10, ts=1.0, type=OrderType.LIMIT))
+        book.add_order(Order(id=2, side=Side.BUY, price=100.0, qty=4, ts=2.0, type=OrderType.LIMIT))
+        self.assertEqual(book.best_bid(), (100.0, 14))
+        book.add_order(Order(id=3, side=Side.SELL, price=100.0, qty=12, ts=3.0, type=OrderType.LIMIT))
+        book.match()
+        self.assertEqual(book.best_bid(), (100.0, 2))
+        self.assertEqual(len(book.bids[100.0]), 1)
+        self.assertTrue(book.execute_order(2, 1))
+        self.assertEqual(book.best_bid(), (100.0, 1))
+        self.assertTrue(book.cancel_order(2))
+        self.assertIsNone(book.best_bid())
+
 if __name__ == "__main__":
     unittest.main()
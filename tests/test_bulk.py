@@ -0,0 +1,93 @@
+import random
+import unittest
+import numpy as np
+from lob.events import EventBlock, EV_LIMIT, EV_MARKET
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import Order, Side, OrderType
+
+BULK_BACKENDS = [HeapOrderBook, SortedOrderBook]
+
+def resting_orders(n, seed, crossed=False):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(n):
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        offset = rng.randrange(-5, 40) if crossed else rng.randrange(1, 40)
+        price = 1000 - offset if side == Side.BUY else 1000 + offset
+        orders.append(Order(i, float(i), side, OrderType.LIMIT, price, rng.randint(1, 10)))
+    return orders
+
+def copies(orders):
+    return [Order(o.id, o.ts, o.side, o.type, o.price, o.qty) for o in orders]
+
+def l3(book):
+    return {side: [[(o.id, o.ts, o.price, o.qty) for o in level] for level in book.levels_from_touch(side)]
+            for side in (Side.BUY, Side.SELL)}
+
+def as_block(orders):
+    return EventBlock(np.full(len(orders), EV_LIMIT), np.array([o.id for o in orders]),
+                      np.array([o.ts for o in orders]), np.array([int(o.side) for o in orders]),
+                      np.array([o.price for o in orders]), np.array([o.qty for o in orders]))
+
+class TestBulkLoad(unittest.TestCase):
+    def test_same_book_as_add_order(self):
+        orders = resting_orders(3000, seed=1)
+        for cls in BULK_BACKENDS:
+            expected = cls()
+            for o in copies(orders):
+                expected.add_order(o)
+            for source in (copies(orders), as_block(orders)):
+                with self.subTest(cls=cls.__name__, source=type(source).__name__):
+                    book = cls.from_orders(source, check_consistency=True)
+                    self.assertEqual(l3(book), l3(expected))
+                    self.assertEqual(list(book.order_map), list(expected.order_map))
+                    self.assertEqual(book.top_of_book(), expected.top_of_book())
+                    self.assertEqual(book.depth(k=10), expected.depth(k=10))
+
+    def test_crossed_input_rejected_or_matched_once(self):
+        orders = resting_orders(2000, seed=2, crossed=True)
+        for cls in BULK_BACKENDS:
+            with self.assertRaises(ValueError):
+                cls.from_orders(copies(orders))
+            expected = cls()
+            for o in copies(orders):
+                expected.add_order(o)
+            expected_trades = expected.match()
+            book = cls(check_consistency=True)
+            trades = book.bulk_load(copies(orders), match=True)
+            self.assertTrue(trades)
+            self.assertEqual(trades, expected_trades)
+            self.assertEqual(l3(book), l3(expected))
+            bid, ask = book.best_bid(), book.best_ask()
+            self.assertLess(bid[0], ask[0])
+
+    def test_icebergs_split_by_peak(self):
+        orders = [Order(1, 0.0, Side.SELL, OrderType.LIMIT, 100, 10, peak=3),
+                  Order(2, 1.0, Side.SELL, OrderType.LIMIT, 100, 2, peak=3),
+                  Order(3, 2.0, Side.BUY, OrderType.LIMIT, 99, 4)]
+        for cls in BULK_BACKENDS:
+            book = cls.from_orders([Order(o.id, o.ts, o.side, o.type, o.price, o.qty, peak=o.peak) for o in orders],
+                                   check_consistency=True)
+            self.assertEqual(book.best_ask(), (100, 5))
+            self.assertEqual(book.ask_qty, 5)
+            self.assertEqual([(o.id, o.qty, o.reserve) for o in next(book.levels_from_touch(Side.SELL))],
+                             [(1, 3, 7), (2, 2, 0)])
+
+    def test_rejects_bad_input(self):
+        market = Order(1, 0.0, Side.BUY, OrderType.MARKET, None, 5)
+        block = EventBlock([EV_LIMIT, EV_MARKET], [1, 2], [0.0, 0.0], [1, 1], [99, 0], [5, 5])
+        dup = [Order(1, 0.0, Side.BUY, OrderType.LIMIT, 99, 5), Order(1, 1.0, Side.SELL, OrderType.LIMIT, 101, 5)]
+        empty = [Order(1, 0.0, Side.BUY, OrderType.LIMIT, 99, 5), Order(2, 1.0, Side.SELL, OrderType.LIMIT, 101, 0)]
+        short = EventBlock([EV_LIMIT, EV_LIMIT], [1, 2], [0.0, 0.0], [1, 2], [99, 101], [5, -5])
+        for cls in BULK_BACKENDS:
+            for bad in ([market], block, dup, empty, short):
+                with self.assertRaises(ValueError):
+                    cls.from_orders(bad)
+            book = cls.from_orders(dup[:1])
+            with self.assertRaises(ValueError):
+                book.bulk_load(resting_orders(10, seed=3))
+            self.assertEqual(cls.from_orders([]).top_of_book().depth, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from lob.book_custom import CustomOrderBook
+from lob.events import EventBlock
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+from sim.depth_recorder import DepthRecorder
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+
+def random_block(n, seed):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        if i > 20 and rng.random() < 0.3:
+            events.append(('cancel', rng.randrange(i)))
+        else:
+            side = Side.BUY if rng.random() < 0.5 else Side.SELL
+            events.append(('add', Order(i, float(i), side, OrderType.LIMIT, rng.randint(90, 110), rng.randint(1, 9))))
+    return EventBlock.from_events(events)
+
+def counts(book, side):
+    return [level.count for level in book.levels_from_touch(side)]
+
+class TestDepthArrays(unittest.TestCase):
+    def test_matches_depth_on_every_backend(self):
+        block = random_block(2000, seed=1)
+        for cls in BACKENDS:
+            matcher = Matcher(cls(check_consistency=True))
+            matcher.submit_batch(block)
+            book = matcher.book
+            for k in (1, 5, 1000, None):
+                arrays = book.depth_arrays(k)
+                expected = book.depth(k=10 ** 6 if k is None else k)
+                self.assertEqual(list(zip(arrays.bid_price.tolist(), arrays.bid_qty.tolist())), expected['bids'])
+                self.assertEqual(list(zip(arrays.ask_price.tolist(), arrays.ask_qty.tolist())), expected['asks'])
+                self.assertEqual(arrays.bid_count.tolist(), counts(book, Side.BUY)[:k])
+                self.assertEqual(arrays.ask_count.tolist(), counts(book, Side.SELL)[:k])
+                self.assertEqual(arrays.bid_price.dtype, np.int64)
+
+    def test_empty_book(self):
+        for cls in BACKENDS:
+            arrays = cls().depth_arrays(5)
+            self.assertTrue(all(len(a) == 0 for a in arrays))
+            with self.assertRaises(ValueError):
+                cls().depth_arrays(-1)
+
+class TestDepthRecorder(unittest.TestCase):
+    def test_records_padded_matrix(self):
+        book = LimitOrderBook()
+        recorder = DepthRecorder(levels=3, capacity=2)
+        book.add_order(Order(1, 0.0, Side.BUY, OrderType.LIMIT, 99, 5))
+        recorder.record(book, ts=1.0)
+        for i, price in enumerate((99, 98, 97, 96), start=2):
+            book.add_order(Order(i, 0.0, Side.BUY, OrderType.LIMIT, price, 2))
+        recorder.record(book, ts=2.0)
+        self.assertEqual(recorder.matrix('ts').tolist(), [1.0, 2.0])
+        self.assertEqual(recorder.matrix('bid_price').tolist(), [[99, 0, 0], [99, 98, 97]])
+        self.assertEqual(recorder.matrix('bid_qty').tolist(), [[5, 0, 0], [7, 2, 2]])
+        self.assertEqual(recorder.matrix('bid_count').tolist(), [[1, 0, 0], [2, 1, 1]])
+        self.assertEqual(recorder.matrix('ask_qty').tolist(), [[0, 0, 0], [0, 0, 0]])
+        with self.assertRaises(ValueError):
+            recorder.record(book)
+        with self.assertRaises(ValueError):
+            recorder.matrix('mid')
+
+    def test_replay_to_memmap(self):
+        block = random_block(1000, seed=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'depth.npy')
+            recorder = DepthRecorder(levels=5, capacity=20, path=path)
+            self.assertEqual(recorder.replay(Matcher(CustomOrderBook()), block, every=100), 10)
+            recorder.flush()
+            columns = (block.kind, block.order_id, block.ts, block.side, block.price, block.qty)
+            expected = Matcher(SortedOrderBook())
+            for row, lo in enumerate(range(0, 1000, 100)):
+                expected.submit_batch(EventBlock(*(col[lo:lo + 100] for col in columns)))
+                asks = expected.book.depth_arrays(5).ask_qty.tolist()
+                self.assertEqual(recorder.matrix('ask_qty')[row].tolist(), asks + [0] * (5 - len(asks)))
+            on_disk = np.load(path, mmap_mode='r')
+            self.assertEqual(on_disk.shape, (20,))
+            self.assertEqual(on_disk['bid_price'][:10].tolist(), recorder.matrix('bid_price').tolist())
+            self.assertEqual(on_disk['ts'][9], max(block.ts[900:]))
+            del on_disk, recorder
+
+if __name__ == "__main__":
+    unittest.main()
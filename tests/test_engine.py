@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from lob.engine import MultiSymbolEngine, ShardedEngine, TRADE_DTYPE
+from lob.events import EV_CANCEL, EventBlock
+from lob.matcher import Matcher
+from order_book.book_heap import HeapOrderBook
+from sim.event_stream import MultiSymbolEventStream
+
+SYMBOLS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+
+def per_symbol(trades):
+    return {int(s): trades[trades['symbol'] == s][['ts', 'price', 'qty', 'maker_id', 'taker_id']].tolist()
+            for s in np.unique(trades['symbol'])}
+
+class TestMultiSymbolEngine(unittest.TestCase):
+    def setUp(self):
+        self.blocks = list(MultiSymbolEventStream(SYMBOLS, n_events=6000, seed=3).blocks(block_size=1000))
+
+    def test_stream_interleaves_symbols_in_ts_order(self):
+        symbol, block = self.blocks[0]
+        self.assertEqual(set(symbol.tolist()), set(range(len(SYMBOLS))))
+        self.assertTrue(np.all(np.diff(block.ts) >= 0))
+        self.assertEqual(sum(len(b) for _, b in self.blocks), 6000)
+
+    def test_ts_never_decreases_across_blocks(self):
+        ts = np.concatenate([b.ts for _, b in self.blocks])
+        self.assertTrue(np.all(np.diff(ts) >= 0))
+        for sid in range(len(SYMBOLS)):
+            ids = np.concatenate([b.order_id[(s == sid) & (b.kind != EV_CANCEL)] for s, b in self.blocks])
+            self.assertTrue(np.all(np.diff(ids) > 0))  # each symbol's adds keep their own order
+
+    def test_matches_one_matcher_per_symbol(self):
+        engine = MultiSymbolEngine(HeapOrderBook)
+        trades = np.concatenate([engine.submit_block(s, b) for s, b in self.blocks])
+        for sid in range(len(SYMBOLS)):
+            matcher = Matcher(HeapOrderBook())
+            expected = []
+            for symbol, block in self.blocks:
+                rows = symbol == sid
+                only = EventBlock(*(col[rows] for col in (block.kind, block.order_id, block.ts,
+                                                          block.side, block.price, block.qty)))
+                expected.extend((t.ts, t.price, t.qty, t.maker_id, t.taker_id) for t in matcher.submit_batch(only))
+            self.assertEqual(per_symbol(trades).get(sid, []), expected)
+            self.assertEqual(engine.matchers[sid].book.depth(k=10), matcher.book.depth(k=10))
+
+    def test_sharded_engine_agrees_with_in_process(self):
+        local = MultiSymbolEngine()
+        expected = np.concatenate([local.submit_block(s, b) for s, b in self.blocks])
+        with ShardedEngine(n_workers=2) as engine:
+            engine.register(SYMBOLS)
+            trades = np.concatenate([engine.submit_block(s, b) for s, b in self.blocks])
+            depth = engine.depth()
+        self.assertEqual(trades.dtype, TRADE_DTYPE)
+        self.assertEqual(per_symbol(trades), per_symbol(expected))
+        self.assertEqual(depth, {SYMBOLS[sid]: m.book.depth(k=10) for sid, m in local.matchers.items()})
+
+if __name__ == "__main__":
+    unittest.main()
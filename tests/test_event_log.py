@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from lob.event_log import EventLogWriter, EventLogReader, replay, RECORD_DTYPE
+from lob.events import EventBlock, EV_TRADE
+from lob.matcher import Matcher
+from lob.book_custom import CustomOrderBook
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from sim.event_stream import SyntheticEventStream
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'tape.evt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_preserves_events_and_order(self):
+        events = list(SyntheticEventStream(n_events=3000, seed=4))
+        with EventLogWriter(self.path, chunk_size=500) as writer:
+            writer.write_events(events[:1000])
+            writer.write_block(EventBlock.from_events(events[1000:2000]))
+            writer.write_events(events[2000:])
+        reader = EventLogReader(self.path)
+        self.assertIsInstance(reader.records, np.memmap)
+        self.assertEqual(len(reader), 3000)
+        self.assertEqual(os.path.getsize(self.path), 16 + 3000 * RECORD_DTYPE.itemsize)
+        replayed = [e for block in reader.blocks(block_size=700) for e in block.to_events()]
+        self.assertEqual(replayed, events)
+
+    def test_replay_matches_direct_submission(self):
+        stream = SyntheticEventStream(n_events=5000, seed=6)
+        with EventLogWriter(self.path) as writer:
+            for block in stream.blocks(block_size=1000, track_live=False):
+                writer.write_block(block)
+        reader = EventLogReader(self.path)
+        direct = Matcher(HeapOrderBook())
+        expected = []
+        for block in reader.blocks(block_size=1000):
+            expected.extend(direct.submit_batch(block).to_trades())
+        trades_path = os.path.join(self.tmp.name, 'trades.evt')
+        matcher = Matcher(CustomOrderBook())
+        with EventLogWriter(trades_path) as recorder:
+            n_fills = replay(reader, matcher, block_size=333, recorder=recorder)
+        self.assertEqual(n_fills, len(expected))
+        self.assertEqual(matcher.book.depth(k=50), direct.book.depth(k=50))
+        trades = EventLogReader(trades_path).trades()
+        self.assertEqual(list(zip(trades['price'].tolist(), trades['qty'].tolist(),
+                                  trades['order_id'].tolist(), trades['aux'].tolist())),
+                         [(t.price, t.qty, t.maker_id, t.taker_id) for t in expected])
+
+    def test_trade_records_are_skipped_on_replay(self):
+        matcher = Matcher(CustomOrderBook())
+        with EventLogWriter(self.path) as writer:
+            for i, side in enumerate((Side.SELL, Side.BUY)):
+                order = Order(i, float(i), side, OrderType.LIMIT, 100, 5)
+                writer.write_event(('add', order))
+                writer.write_trades(matcher.submit_fills(order))
+        reader = EventLogReader(self.path)
+        self.assertEqual(reader.records['kind'].tolist(), [1, 1, EV_TRADE])
+        self.assertEqual([len(b) for b in reader.blocks()], [2])
+        self.assertEqual(len(list(reader.blocks(trades=True))[0]), 3)
+
+    def test_rejects_foreign_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not an event log at all')
+        with self.assertRaises(ValueError):
+            EventLogReader(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
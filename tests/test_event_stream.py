@@ -1,6 +1,6 @@
 import unittest
 from sim.event_stream import SyntheticEventStream
-from order_book.order import Order, Side, OrderType
+from lob.order import Order, Side, OrderType
 
 class TestSyntheticEventStream(unittest.TestCase):
     def test_stream_generation(self):
@@ -13,5 +13,73 @@ class TestSyntheticEventStream(unittest.TestCase):
                 from lob.order import Order
                 self.assertIsInstance(event[1], Order)
 
+    def test_prices_are_integer_ticks(self):
+        stream = SyntheticEventStream(n_events=200)
+        for etype, payload in stream:
+            if etype == 'add' and payload.type == OrderType.LIMIT:
+                self.assertIsInstance(payload.price, int)
+                self.assertEqual(stream.instrument.to_ticks(stream.instrument.to_price(payload.price)), payload.price)
+
+    def test_seed_reproduces_stream(self):
+        def snapshot(stream):
+            return [(e, p) if e == 'cancel' else (e, p.id, p.ts, p.side, p.price, p.qty) for e, p in stream]
+        self.assertEqual(snapshot(SyntheticEventStream(n_events=300, seed=9)),
+                         snapshot(SyntheticEventStream(n_events=300, seed=9)))
+
+    def test_blocks_columnar(self):
+        import numpy as np
+        from lob.events import EV_CANCEL
+        blocks = list(SyntheticEventStream(n_events=2500, seed=4).blocks(block_size=1000))
+        self.assertEqual([len(b) for b in blocks], [1000, 1000, 500])
+        again = list(SyntheticEventStream(n_events=2500, seed=4).blocks(block_size=1000))
+        self.assertTrue(all(np.array_equal(a.order_id, b.order_id) and np.array_equal(a.price, b.price)
+                            for a, b in zip(blocks, again)))
+        seen = 0
+        for block in blocks:
+            for kind, oid, ts, side, price, qty in block.rows():
+                if kind == EV_CANCEL:
+                    self.assertTrue(1 <= oid <= seen)
+                else:
+                    seen += 1
+                    self.assertEqual(oid, seen)
+                    self.assertGreaterEqual(qty, 1)
+        self.assertTrue(np.all(np.diff(np.concatenate([b.ts for b in blocks])) > 0))
+
+    def test_fill_feedback_keeps_live_set_exact(self):
+        from lob.matcher import Matcher
+        from lob.book_custom import CustomOrderBook
+        stream = SyntheticEventStream(n_events=5000, seed=2, cancel_prob=0.3)
+        matcher = Matcher(CustomOrderBook())
+        for etype, payload in stream:
+            if etype == 'cancel':
+                self.assertTrue(matcher.book.cancel_order(payload))
+            else:
+                stream.on_fills(matcher.submit_fills(payload))
+        self.assertEqual(sorted(stream.active_orders.ids), sorted(matcher.book.order_map))
+
+    def test_blocks_track_live_orders(self):
+        from lob.matcher import Matcher
+        from lob.book_custom import CustomOrderBook
+        stream = SyntheticEventStream(n_events=20000, seed=6, cancel_prob=0.4)
+        matcher = Matcher(CustomOrderBook())
+        for block in stream.blocks(block_size=500, track_live=True):
+            stream.on_fills(matcher.submit_batch(block))
+        live, resting = set(stream.active_orders.ids), set(matcher.book.order_map)
+        self.assertLessEqual(resting, live)
+        self.assertLess(len(live - resting), 500)
+
+    def test_default_blocks_stay_vectorized(self):
+        import time
+        def best_time(**kwargs):
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in SyntheticEventStream(n_events=200000, seed=3).blocks(**kwargs):
+                    pass
+                times.append(time.perf_counter() - start)
+            return min(times)
+        # No per-row Python loop on the default path: well ahead of live tracking
+        self.assertLess(2 * best_time(), best_time(track_live=True))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+import numpy as np
+from lob.events import EventBlock, EV_LIMIT, EV_MARKET, EV_CANCEL
+from lob.order import Order, Side, OrderType
+
+class TestEventBlock(unittest.TestCase):
+    def test_round_trip(self):
+        events = [
+            ('add', Order(1, 0.5, Side.BUY, OrderType.LIMIT, 10000, 3)),
+            ('add', Order(2, 0.7, Side.SELL, OrderType.MARKET, None, 4)),
+            ('cancel', 1),
+        ]
+        block = EventBlock.from_events(events)
+        self.assertEqual(block.kind, [EV_LIMIT, EV_MARKET, EV_CANCEL])
+        self.assertEqual(list(block.to_events()), events)
+
+    def test_numpy_columns(self):
+        block = EventBlock(np.array([EV_LIMIT, EV_CANCEL]), np.array([7, 7]), np.array([1.0, 2.0]),
+                           np.array([1, 0]), np.array([101, 0]), np.array([5, 0]))
+        rows = list(block.rows())
+        self.assertEqual(rows[0], (EV_LIMIT, 7, 1.0, 1, 101, 5))
+        self.assertIs(type(rows[0][1]), int)
+
+    def test_rejects_ragged_columns(self):
+        with self.assertRaises(ValueError):
+            EventBlock([1], [1, 2], [0.0], [1], [1], [1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+from lob.book_custom import CustomOrderBook
+from lob.events import EV_LIMIT, EV_MARKET, EV_CANCEL
+from lob.gateway import (OrderGateway, GatewayClient, pack_orders, ER_ACK, ER_FILL, ER_CANCELLED,
+                         ER_REJECT, ER_EXPIRED, REJ_INVALID, REJ_DUPLICATE_ID, REJ_UNKNOWN_ORDER)
+from lob.matcher import Matcher
+from order_book.book_heap import HeapOrderBook
+from sim.event_stream import SyntheticEventStream
+
+BUY, SELL = 1, 2
+
+def rows(reports):
+    return [(int(r['kind']), int(r['order_id']), int(r['price']), int(r['qty']), int(r['aux'])) for r in reports]
+
+class TestOrderGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.gateway = OrderGateway(Matcher(HeapOrderBook()))
+        self.server = await self.gateway.serve_tcp('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_fills_are_routed_to_maker_and_taker(self):
+        maker = await GatewayClient.connect_tcp('127.0.0.1', self.port)
+        taker = await GatewayClient.connect_tcp('127.0.0.1', self.port)
+        maker.send(EV_LIMIT, 7, SELL, 101, 10, ts=1.5)
+        self.assertEqual(rows(await maker.reports(1)), [(ER_ACK, 7, 101, 10, 0)])
+        taker.send(EV_LIMIT, 7, BUY, 102, 4, ts=2.5)  # same client id, different session
+        taker.send(EV_MARKET, 8, BUY, 0, 10, ts=3.5)
+        got = await taker.reports(5)
+        self.assertEqual(rows(got), [(ER_ACK, 7, 102, 4, 0), (ER_FILL, 7, 101, 4, 0),
+                                     (ER_ACK, 8, 0, 10, 0), (ER_FILL, 8, 101, 6, 4), (ER_EXPIRED, 8, 0, 4, 0)])
+        self.assertEqual(got['ts'][[0, 2]].tolist(), [2.5, 3.5])
+        self.assertEqual(rows(await maker.reports(2)), [(ER_FILL, 7, 101, 4, 6), (ER_FILL, 7, 101, 6, 0)])
+        self.assertEqual(self.gateway.live, {})
+        maker.close()
+        taker.close()
+
+    async def test_cancels_and_rejects(self):
+        client = await GatewayClient.connect_tcp('127.0.0.1', self.port)
+        client.send(EV_LIMIT, 1, BUY, 99, 5)
+        client.send(EV_LIMIT, 1, BUY, 98, 5)
+        client.send(EV_LIMIT, 2, BUY, 98, 0)
+        client.send(EV_CANCEL, 1)
+        client.send(EV_CANCEL, 1)
+        client.send(EV_CANCEL, 42)
+        self.assertEqual(rows(await client.reports(6)), [
+            (ER_ACK, 1, 99, 5, 0), (ER_REJECT, 1, 0, 0, REJ_DUPLICATE_ID), (ER_REJECT, 2, 0, 0, REJ_INVALID),
+            (ER_CANCELLED, 1, 99, 5, 0), (ER_REJECT, 1, 0, 0, REJ_UNKNOWN_ORDER),
+            (ER_REJECT, 42, 0, 0, REJ_UNKNOWN_ORDER)])
+        self.assertIsNone(self.gateway.matcher.book.best_bid())
+        client.close()
+
+    async def test_disconnect_cancels_resting_orders(self):
+        client = await GatewayClient.connect_tcp('127.0.0.1', self.port)
+        client.send(EV_LIMIT, 1, BUY, 99, 5)
+        await client.reports(1)
+        client.close()
+        for _ in range(100):
+            if self.gateway.matcher.book.best_bid() is None:
+                break
+            await asyncio.sleep(0.01)
+        self.assertIsNone(self.gateway.matcher.book.best_bid())
+        self.assertEqual(self.gateway.live, {})
+
+    async def test_batched_flow_matches_direct_matcher(self):
+        block = next(SyntheticEventStream(n_events=20000, seed=5).blocks(block_size=20000))
+        direct = Matcher(CustomOrderBook())
+        expected = direct.submit_batch(block).to_trades()
+        self.gateway.matcher = Matcher(CustomOrderBook())
+        self.gateway.max_pending = 100  # forces reads to pause between batches
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'gw.sock')
+            server = await self.gateway.serve_unix(path)
+            client = await GatewayClient.connect_unix(path)
+            client.send_messages(pack_orders(block))
+            got = await client.reports(1)
+            while (np.isin(got['kind'], (ER_ACK, ER_CANCELLED, ER_REJECT))).sum() < len(block):
+                got = np.concatenate([got, await client.reports(1)])
+            client.close()
+            server.close()
+            await server.wait_closed()
+        fills = got[got['kind'] == ER_FILL]
+        self.assertEqual(2 * len(expected), len(fills))  # taker and maker side of each trade
+        self.assertEqual(sum(t.qty for t in expected) * 2, int(fills['qty'].sum()))
+        self.assertEqual(self.gateway.matcher.book.depth(k=10), direct.book.depth(k=10))
+        self.assertGreater(self.gateway.batches, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from lob.instrument import Instrument
+from benchmarks.trader_strategies import MomentumTrader
+
+class TestInstrument(unittest.TestCase):
+    def test_tick_round_trip(self):
+        inst = Instrument('XYZ', tick_size=0.01)
+        self.assertEqual(inst.to_ticks(100.07), 10007)
+        self.assertEqual(inst.to_ticks(0.1 + 0.2), 30)
+        self.assertEqual(inst.to_price(10007), 100.07)
+
+    def test_coarse_tick(self):
+        inst = Instrument('FUT', tick_size=0.25)
+        self.assertEqual(inst.to_ticks(100.3), 401)
+        self.assertEqual(inst.to_price(401), 100.25)
+
+    def test_invalid_tick_size(self):
+        with self.assertRaises(ValueError):
+            Instrument('BAD', tick_size=0)
+
+    def test_trader_prices_snap_to_ticks(self):
+        trader = MomentumTrader(1, Instrument('XYZ', tick_size=0.05))
+        prices = {trader.generate_order(i, 1.0).price for i in range(200)}
+        self.assertTrue(all(isinstance(p, int) for p in prices))
+        self.assertLessEqual(len(prices), 21)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,20 @@
+import random
 import unittest
-from sim.latency import LatencyBench
+import numpy as np
+from sim.latency import LatencyBench, SampleBuffer, LogHistogram
 import time
 
 class TestLatencyBench(unittest.TestCase):
     def test_latency_measurement(self):
         # Minimal stub book and event stream
+        from lob.order import Order, Side, OrderType
         class DummyBook:
-            def add_order(self, order): pass
-            def match(self): pass
+            def match_incoming(self, order, fills): pass
             def cancel_order(self, order_id): pass
         class DummyEventStream:
             def __iter__(self):
                 for i in range(10):
-                    yield ('add', None)
+                    yield ('add', Order(i, float(i), Side.BUY, OrderType.LIMIT, 100, 1))
         bench = LatencyBench(DummyBook(), DummyEventStream())
         bench.run(warmup=2)
         stats = bench.stats()
@@ -20,5 +22,66 @@ class TestLatencyBench(unittest.TestCase):
         self.assertIn('median', stats)
         self.assertIn('throughput', stats)
 
+    def test_histogram_and_overhead_modes(self):
+        from sim.event_stream import SyntheticEventStream
+        from order_book.order import LimitOrderBook
+        for histogram in (False, True):
+            bench = LatencyBench(LimitOrderBook(), SyntheticEventStream(n_events=2000, seed=1),
+                                 histogram=histogram, subtract_overhead=True)
+            bench.run(warmup=100)
+            stats = bench.stats()
+            self.assertEqual(stats['total_events'], 1900)
+            self.assertGreater(stats['timer_overhead_ns'], 0)
+            self.assertEqual(len(bench.latencies), 1900)
+            self.assertEqual(len(bench.insert_latencies) + len(bench.match_latencies) + len(bench.cancel_latencies),
+                             1900)
+            self.assertGreater(len(bench.match_latencies), 0)
+            self.assertGreaterEqual(stats['overall']['min'], 0)
+            self.assertLessEqual(stats['overall']['p99'], stats['overall']['p99.9'])
+
+    def test_orders_go_through_the_matcher(self):
+        from lob.book_custom import CustomOrderBook
+        from lob.order import Order, Side, OrderType
+        events = [('add', Order(1, 1.0, Side.SELL, OrderType.LIMIT, 100, 10, peak=3)),
+                  ('add', Order(2, 2.0, Side.BUY, OrderType.MARKET, None, 5))]
+        book = CustomOrderBook()
+        bench = LatencyBench(book, events)
+        bench.run(warmup=0)
+        self.assertEqual((len(bench.insert_latencies), len(bench.match_latencies)), (1, 1))
+        self.assertEqual([(o.id, o.qty, o.reserve) for o in book.get_orders_at_price(Side.SELL, 100)], [(1, 1, 4)])
+
+class TestRecorders(unittest.TestCase):
+    def test_sample_buffer_grows_and_matches_numpy(self):
+        rng = random.Random(3)
+        samples = [rng.randrange(10**6) for _ in range(1000)]
+        buf = SampleBuffer(capacity=3)
+        for v in samples:
+            buf.record(v)
+        self.assertEqual(buf.values().tolist(), samples)
+        stats = buf.summary()
+        self.assertAlmostEqual(stats['p99.9'], np.percentile(samples, 99.9))
+        self.assertEqual(stats['max'], max(samples))
+
+    def test_sample_buffer_extend(self):
+        buf = SampleBuffer(capacity=4)
+        buf.record(7)
+        buf.extend(np.arange(10))
+        buf.extend([])
+        buf.record(9)
+        self.assertEqual(buf.values().tolist(), [7] + list(range(10)) + [9])
+
+    def test_histogram_relative_error(self):
+        rng = random.Random(4)
+        samples = [int(rng.lognormvariate(8, 2)) for _ in range(20000)]
+        hist = LogHistogram(precision_bits=8)
+        for v in samples:
+            hist.record(v)
+        stats = hist.summary()
+        self.assertEqual(len(hist), len(samples))
+        self.assertAlmostEqual(stats['mean'], sum(samples) / len(samples))
+        for p in (50, 90, 99, 99.9):
+            exact = np.percentile(samples, p, method='inverted_cdf')
+            self.assertLessEqual(abs(stats[f'p{p:g}'] - exact), exact / 2**7 + 1)
+
 if __name__ == "__main__":
     unittest.main()
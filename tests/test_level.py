@@ -0,0 +1,57 @@
+import unittest
+from order_book.level import PriceLevel
+from order_book.order import Order, Side, OrderType
+
+class TestPriceLevel(unittest.TestCase):
+    def setUp(self):
+        self.level = PriceLevel(100.0)
+        self.orders = [Order(id=i, side=Side.BUY, price=100.0, qty=1, ts=float(i), type=OrderType.LIMIT) for i in range(5)]
+        for o in self.orders:
+            self.level.append(o)
+
+    def test_fifo_order(self):
+        self.assertEqual([o.id for o in self.level], [0, 1, 2, 3, 4])
+        self.assertEqual(len(self.level), 5)
+        self.assertEqual(self.level.popleft().id, 0)
+        self.assertEqual(self.level.head.id, 1)
+
+    def test_remove_middle_head_tail(self):
+        self.level.remove(self.orders[2])
+        self.level.remove(self.orders[0])
+        self.level.remove(self.orders[4])
+        self.assertEqual([o.id for o in self.level], [1, 3])
+        self.assertIs(self.level.head, self.orders[1])
+        self.assertIs(self.level.tail, self.orders[3])
+        self.assertEqual(len(self.level), 2)
+
+    def test_cached_aggregates(self):
+        self.assertEqual(self.level.total_qty, 5)
+        self.level.fill(self.orders[1], 1)
+        self.level.remove(self.orders[3])
+        self.assertEqual((self.level.count, self.level.total_qty), (4, 3))
+        self.level.verify()
+        self.orders[0].qty = 7  # bypasses the level
+        with self.assertRaises(AssertionError):
+            self.level.verify()
+
+    def test_drain(self):
+        for o in self.orders:
+            self.level.remove(o)
+        self.assertFalse(self.level)
+        self.assertIsNone(self.level.head)
+        self.assertIsNone(self.level.tail)
+        with self.assertRaises(IndexError):
+            self.level.popleft()
+
+    def test_book_cancel_keeps_priority(self):
+        from order_book.book_heap import HeapOrderBook
+        book = HeapOrderBook()
+        for o in self.orders:
+            self.level.remove(o)
+            book.add_order(o)
+        self.assertTrue(book.cancel_order(2))
+        self.assertFalse(book.cancel_order(2))
+        self.assertEqual([o.id for o in book.bids[100.0]], [0, 1, 3, 4])
+
+if __name__ == "__main__":
+    unittest.main()
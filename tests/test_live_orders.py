@@ -0,0 +1,34 @@
+import random
+import unittest
+from sim.live_orders import LiveOrderSet
+
+class TestLiveOrderSet(unittest.TestCase):
+    def test_add_remove_swap(self):
+        live = LiveOrderSet()
+        for i in range(5):
+            live.add(i, 10)
+        self.assertTrue(live.remove(1))
+        self.assertFalse(live.remove(1))
+        self.assertEqual(sorted(live.ids), [0, 2, 3, 4])
+        self.assertEqual({i: live.ids[p] for i, p in live.index.items()}, {i: i for i in live.ids})
+
+    def test_reduce_removes_when_filled(self):
+        live = LiveOrderSet()
+        live.add(7, 5)
+        live.reduce(7, 3)
+        self.assertIn(7, live)
+        live.reduce(7, 2)
+        self.assertNotIn(7, live)
+        self.assertFalse(live.reduce(7, 1))
+
+    def test_pop_random_is_uniform_and_drains(self):
+        live = LiveOrderSet()
+        for i in range(100):
+            live.add(i, 1)
+        rng = random.Random(0)
+        popped = [live.pop_random(rng.random()) for _ in range(100)]
+        self.assertEqual(sorted(popped), list(range(100)))
+        self.assertEqual(len(live), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import random
+import unittest
+from lob.matcher import Matcher
+from lob.market_data import (MarketDataPublisher, L2BookView, MD_ADD, MD_MODIFY, MD_DELETE, MD_EXECUTE)
+from lob.book_custom import CustomOrderBook
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+
+BACKENDS = (HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook)
+
+def drive(publisher, n=500, seed=9, icebergs=False):
+    rng = random.Random(seed)
+    for i in range(n):
+        r = rng.random()
+        if i > 20 and r < 0.2:
+            publisher.cancel(rng.randrange(i))
+        elif i > 20 and r < 0.3:
+            order = publisher.book.order_map.get(rng.randrange(i))
+            if order is not None:
+                publisher.modify(order.id, rng.randint(0, order.qty + 3),
+                                 rng.choice((None, None, order.price - 1, order.price + 1)))
+        elif r < 0.37:
+            publisher.submit(Order(i, float(i), Side.BUY if rng.random() < 0.5 else Side.SELL,
+                                   OrderType.MARKET, None, rng.randint(1, 9)))
+        else:
+            peak = rng.choice((0, 0, 2, 3)) if icebergs else 0
+            publisher.submit(Order(i, float(i), Side.BUY if rng.random() < 0.5 else Side.SELL,
+                                   OrderType.LIMIT, rng.randint(95, 105), rng.randint(1, 9), peak=peak))
+
+def replay_l3(events):
+    """Resting orders as {order_id: [side, price, qty]} rebuilt from L3 events alone."""
+    orders = {}
+    for e in events:
+        if e.kind == MD_ADD:
+            orders[e.order_id] = [e.side, e.price, e.qty]
+        elif e.kind == MD_MODIFY:
+            orders[e.order_id][2] = e.qty
+        elif e.kind == MD_DELETE:
+            del orders[e.order_id]
+        elif e.kind == MD_EXECUTE:
+            orders[e.order_id][2] -= e.qty
+            if orders[e.order_id][2] == 0:
+                del orders[e.order_id]
+    return orders
+
+class TestMarketDataPublisher(unittest.TestCase):
+    def test_l2_and_l3_rebuild_book(self):
+        for backend in BACKENDS:
+            publisher = MarketDataPublisher(Matcher(backend(check_consistency=True)))
+            view = L2BookView()
+            l3 = []
+            publisher.subscribe_l2(view.apply)
+            publisher.subscribe_l3(l3.append)
+            drive(publisher)
+            self.assertEqual(view.depth(k=100), publisher.book.depth(k=100))
+            self.assertEqual([e.seq for e in l3], list(range(1, len(l3) + 1)))
+            self.assertEqual(replay_l3(l3), {o.id: [int(o.side), o.price, o.qty]
+                                             for o in publisher.book.order_map.values()})
+            self.assertEqual(publisher.snapshot().orders,
+                             [(o.id, int(o.side), o.price, o.qty) for side in (Side.BUY, Side.SELL)
+                              for level in publisher.book.levels_from_touch(side) for o in level])
+
+    def test_iceberg_refills_are_published(self):
+        publisher = MarketDataPublisher(Matcher(HeapOrderBook()))
+        publisher.submit(Order(1, 0.0, Side.SELL, OrderType.LIMIT, 100, 30, peak=10))
+        publisher.submit(Order(2, 0.0, Side.SELL, OrderType.LIMIT, 100, 5))
+        events, deltas = [], []
+        publisher.subscribe_l3(events.append)
+        publisher.subscribe_l2(deltas.append)
+        publisher.submit(Order(3, 1.0, Side.BUY, OrderType.LIMIT, 100, 10))
+        self.assertEqual([(e.kind, e.order_id, e.qty) for e in events], [(MD_EXECUTE, 1, 10), (MD_ADD, 1, 10)])
+        self.assertEqual([(d.price, d.qty) for d in deltas], [(100, 15)])
+        self.assertEqual(publisher.snapshot().orders, [(2, int(Side.SELL), 100, 5), (1, int(Side.SELL), 100, 10)])
+        publisher.modify(1, 15)  # total 20 -> 15: only the hidden reserve shrinks
+        self.assertEqual(len(events), 2)
+        publisher.submit(Order(4, 2.0, Side.BUY, OrderType.MARKET, None, 19))
+        self.assertEqual([(e.kind, e.order_id, e.qty) for e in events[2:]],
+                         [(MD_EXECUTE, 2, 5), (MD_EXECUTE, 1, 10), (MD_ADD, 1, 5), (MD_EXECUTE, 1, 4)])
+        self.assertEqual(publisher.snapshot().asks, [(100, 1)])
+        self.assertEqual(publisher.book.depth(k=5)['asks'], [(100, 1)])
+
+    def test_l2_and_l3_track_icebergs(self):
+        for backend in BACKENDS:
+            publisher = MarketDataPublisher(Matcher(backend(check_consistency=True)))
+            view = L2BookView()
+            l3 = []
+            publisher.subscribe_l2(view.apply)
+            publisher.subscribe_l3(l3.append)
+            drive(publisher, n=1500, seed=12, icebergs=True)
+            self.assertTrue(any(o.reserve for o in publisher.book.order_map.values()))
+            self.assertEqual(view.depth(k=100), publisher.book.depth(k=100))
+            self.assertEqual(replay_l3(l3), {o.id: [int(o.side), o.price, o.qty]
+                                             for o in publisher.book.order_map.values()})
+
+    def test_late_joiner_uses_periodic_snapshot(self):
+        publisher = MarketDataPublisher(Matcher(CustomOrderBook()), snapshot_interval=100)
+        snapshots, deltas = [], []
+        publisher.subscribe_snapshots(snapshots.append)
+        publisher.subscribe_l2(deltas.append)
+        drive(publisher, n=450)
+        self.assertEqual(len(snapshots), publisher.operations // 100)
+        self.assertGreaterEqual(len(snapshots), 3)
+        view = L2BookView()
+        view.apply_snapshot(snapshots[1])
+        for delta in deltas:
+            view.apply(delta)  # deltas already in the snapshot are skipped
+        self.assertEqual(view.depth(k=100), publisher.book.depth(k=100))
+        with self.assertRaises(ValueError):
+            view.apply(deltas[-1]._replace(seq=view.seq + 2))
+
+    def test_one_delta_per_level_touched(self):
+        publisher = MarketDataPublisher(Matcher(HeapOrderBook()))
+        for i, price in enumerate((101, 101, 102)):
+            publisher.submit(Order(i, 0.0, Side.SELL, OrderType.LIMIT, price, 2))
+        deltas = []
+        publisher.subscribe_l2(deltas.append)
+        publisher.submit(Order(9, 1.0, Side.BUY, OrderType.LIMIT, 102, 7))
+        self.assertEqual([(d.side, d.price, d.qty) for d in deltas],
+                         [(int(Side.SELL), 101, 0), (int(Side.SELL), 102, 0), (int(Side.BUY), 102, 1)])
+        with self.assertRaises(ValueError):
+            publisher.modify(9, -1)
+
+    def test_modify_requeues_on_increase_or_price_change(self):
+        publisher = MarketDataPublisher(Matcher(SortedOrderBook()))
+        for i in range(3):
+            publisher.submit(Order(i, 0.0, Side.BUY, OrderType.LIMIT, 99, 2))
+        publisher.submit(Order(3, 0.0, Side.SELL, OrderType.LIMIT, 101, 4))
+        events = []
+        publisher.subscribe_l3(events.append)
+        publisher.modify(0, 1)
+        publisher.modify(1, 5)
+        publisher.modify(2, 6, 101)  # crosses: takes the whole ask, rests 2 at 101
+        self.assertEqual([(e.kind, e.order_id, e.price, e.qty) for e in events], [
+            (MD_MODIFY, 0, 99, 1),
+            (MD_DELETE, 1, 99, 2), (MD_ADD, 1, 99, 5),
+            (MD_DELETE, 2, 99, 2), (MD_EXECUTE, 3, 101, 4), (MD_ADD, 2, 101, 2),
+        ])
+        self.assertEqual([o.id for o in publisher.book.bids[99]], [0, 1])
+        self.assertEqual(publisher.book.depth(k=5), {'bids': [(101, 2), (99, 6)], 'asks': []})
+        self.assertEqual(publisher.snapshot().bids, [(101, 2), (99, 6)])
+
+if __name__ == "__main__":
+    unittest.main()
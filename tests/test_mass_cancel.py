@@ -0,0 +1,82 @@
+import random
+import unittest
+from lob.book_custom import CustomOrderBook
+from lob.market_data import MarketDataPublisher, MD_DELETE
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook, COMPACT_MIN_STALE
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+OWNERS = ('mm1', 'mm2', 'taker', None)
+
+def busy_book(cls, n=3000, seed=3, check=False):
+    """Random adds, cancels, amends and crossing flow from several owners."""
+    rng = random.Random(seed)
+    matcher = Matcher(cls(check_consistency=check))
+    for i in range(n):
+        r = rng.random()
+        if r < 0.15 and matcher.book.order_map:
+            matcher.book.cancel_order(rng.choice(list(matcher.book.order_map)))
+        elif r < 0.25 and matcher.book.order_map:
+            order = matcher.book.order_map[rng.choice(list(matcher.book.order_map))]
+            matcher.modify(order.id, rng.randint(0, order.qty + 2), rng.choice((None, order.price + rng.choice((-1, 1)))))
+        else:
+            side = Side.BUY if rng.random() < 0.5 else Side.SELL
+            matcher.submit(Order(i, float(i), side, OrderType.LIMIT, rng.randint(90, 110), rng.randint(1, 9),
+                                 owner=rng.choice(OWNERS)))
+    return matcher.book
+
+class TestMassCancel(unittest.TestCase):
+    def test_index_follows_fills_cancels_and_amends(self):
+        for cls in BACKENDS:
+            book = busy_book(cls, n=1000, check=True)  # verifies the index after every mutation
+            for owner in OWNERS[:3]:
+                self.assertEqual(set(book.owners.orders(owner)),
+                                 {o.id for o in book.order_map.values() if o.owner == owner})
+
+    def test_filters(self):
+        cases = [('mm1', None, None), ('mm2', Side.BUY, None), ('mm1', None, (95, 100)),
+                 ('taker', Side.SELL, (None, 104)), ('nobody', None, None)]
+        for cls in BACKENDS:
+            for owner, side, price_range in cases:
+                book = busy_book(cls)
+                lo, hi = price_range or (None, None)
+                expected = {o.id for o in book.order_map.values()
+                            if o.owner == owner and (side is None or o.side == side)
+                            and (lo is None or o.price >= lo) and (hi is None or o.price <= hi)}
+                survivors = set(book.order_map) - expected
+                cancelled = book.mass_cancel(owner, side, price_range)
+                self.assertEqual({o.id for o in cancelled}, expected)
+                self.assertEqual(set(book.order_map), survivors)
+                book.verify()
+                levels = {s: [lvl.price for lvl in book.levels_from_touch(s)] for s in (Side.BUY, Side.SELL)}
+                self.assertEqual(book.best_bid()[0] if book.best_bid() else None, max(levels[Side.BUY], default=None))
+                self.assertEqual(book.best_ask()[0] if book.best_ask() else None, min(levels[Side.SELL], default=None))
+
+    def test_heap_entries_cleaned_in_bulk(self):
+        book = HeapOrderBook(check_consistency=True)
+        for i in range(200):
+            book.add_order(Order(i, 0.0, Side.BUY, OrderType.LIMIT, 1000 - i, 1, owner='mm' if i % 2 else 'x'))
+        self.assertEqual(len(book.mass_cancel('mm')), 100)
+        # Emptied levels go through the lazy-deletion threshold, not a rebuild per call
+        self.assertTrue(book.bid_entries.issuperset(book.bids))
+        self.assertLessEqual(book.heap_stats()['stale'], book.compact_ratio * len(book.bids) + COMPACT_MIN_STALE)
+        self.assertEqual(book.best_bid(), (1000, 1))
+        self.assertEqual(book.mass_cancel('mm'), [])
+
+    def test_publisher_emits_deletes(self):
+        publisher = MarketDataPublisher(Matcher(SortedOrderBook()))
+        for i in range(6):
+            publisher.submit(Order(i, 0.0, Side.BUY, OrderType.LIMIT, 99 - i % 2, 2, owner='mm' if i < 4 else None))
+        events, deltas = [], []
+        publisher.subscribe_l3(events.append)
+        publisher.subscribe_l2(deltas.append)
+        self.assertEqual(publisher.mass_cancel('mm'), 4)
+        self.assertEqual([(e.kind, e.order_id) for e in events], [(MD_DELETE, i) for i in range(4)])
+        self.assertEqual([(d.price, d.qty) for d in deltas], [(99, 2), (98, 2)])
+        self.assertEqual(publisher.snapshot().bids, [(99, 2), (98, 2)])
+
+if __name__ == "__main__":
+    unittest.main()
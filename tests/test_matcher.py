@@ -0,0 +1,116 @@
+import random
+import unittest
+from lob.matcher import Matcher
+from lob.trade_buffer import TradeBuffer
+from lob.book_custom import CustomOrderBook
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+
+BACKENDS = (HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook)
+
+def limit(id, side, price, qty, ts=0.0):
+    return Order(id=id, side=side, price=price, qty=qty, ts=ts, type=OrderType.LIMIT)
+
+class TestMatcher(unittest.TestCase):
+    def test_partial_fill_rests_remainder(self):
+        for backend in BACKENDS:
+            matcher = Matcher(backend(check_consistency=True))
+            matcher.submit(limit(1, Side.SELL, 101, 5))
+            matcher.submit(limit(2, Side.SELL, 102, 5))
+            taker = limit(3, Side.BUY, 101, 8, ts=1.0)
+            trades = matcher.submit(taker)
+            self.assertEqual([(t.price, t.qty, t.maker_id, t.taker_id) for t in trades], [(101, 5, 1, 3)])
+            self.assertEqual(taker.qty, 3)
+            self.assertEqual(matcher.book.best_bid(), (101, 3))
+            self.assertEqual(matcher.book.best_ask(), (102, 5))
+
+    def test_fills_at_maker_price_across_levels(self):
+        for backend in BACKENDS:
+            matcher = Matcher(backend(check_consistency=True))
+            for i, price in enumerate((100, 99, 98)):
+                matcher.submit(limit(i, Side.BUY, price, 2))
+            fills = matcher.submit_fills(limit(9, Side.SELL, 99, 5))
+            self.assertEqual(fills.price[:len(fills)], [100, 99])
+            self.assertEqual(fills.qty[:len(fills)], [2, 2])
+            self.assertEqual(matcher.book.best_ask(), (99, 1))
+            self.assertEqual(matcher.book.best_bid(), (98, 2))
+
+    def test_market_sweep_and_remainder(self):
+        for backend in BACKENDS:
+            matcher = Matcher(backend(check_consistency=True))
+            for i, price in enumerate((101, 102, 103)):
+                matcher.submit(limit(i, Side.SELL, price, 3))
+            market = Order(id=9, side=Side.BUY, price=None, qty=10, ts=1.0, type=OrderType.MARKET)
+            trades = matcher.submit(market)
+            self.assertEqual([(t.price, t.qty) for t in trades], [(101, 3), (102, 3), (103, 3)])
+            self.assertEqual(market.qty, 1)
+            self.assertIsNone(matcher.book.best_ask())
+            self.assertIsNone(matcher.book.best_bid())
+
+    def test_market_price_protection(self):
+        for backend in BACKENDS:
+            matcher = Matcher(backend(check_consistency=True), protection_ticks=1)
+            for i, price in enumerate((100, 99, 97)):
+                matcher.submit(limit(i, Side.BUY, price, 2))
+            market = Order(id=9, side=Side.SELL, price=None, qty=10, ts=1.0, type=OrderType.MARKET)
+            fills = matcher.submit_fills(market)
+            self.assertEqual(fills.price[:len(fills)], [100, 99])
+            self.assertEqual(market.qty, 6)
+            self.assertEqual(matcher.book.best_bid(), (97, 2))
+
+    def test_backends_agree_on_random_flow(self):
+        results = []
+        for backend in BACKENDS:
+            rng = random.Random(3)
+            matcher = Matcher(backend(check_consistency=True))
+            fills = []
+            for i in range(400):
+                side = Side.BUY if rng.random() < 0.5 else Side.SELL
+                trades = matcher.submit(limit(i, side, rng.randint(95, 105), rng.randint(1, 9), ts=float(i)))
+                fills.extend((t.price, t.qty, t.maker_id, t.taker_id) for t in trades)
+            results.append((fills, matcher.book.depth(k=20)))
+        for other in results[1:]:
+            self.assertEqual(other, results[0])
+
+    def test_submit_batch_matches_sequential(self):
+        from lob.events import EventBlock
+        def flow():
+            rng = random.Random(5)
+            events = []
+            for i in range(300):
+                if i > 10 and rng.random() < 0.3:
+                    events.append(('cancel', rng.randrange(i)))
+                elif rng.random() < 0.1:
+                    events.append(('add', Order(i, float(i), Side.BUY if rng.random() < 0.5 else Side.SELL, OrderType.MARKET, None, rng.randint(1, 9))))
+                else:
+                    events.append(('add', limit(i, Side.BUY if rng.random() < 0.5 else Side.SELL, rng.randint(95, 105), rng.randint(1, 9), ts=float(i))))
+            return events
+        for backend in BACKENDS:
+            sequential = Matcher(backend())
+            expected = []
+            for etype, payload in flow():
+                if etype == 'cancel':
+                    sequential.book.cancel_order(payload)
+                else:
+                    expected.extend(sequential.submit(payload))
+            for events in (flow(), EventBlock.from_events(flow())):
+                batched = Matcher(backend(check_consistency=True))
+                self.assertEqual(batched.submit_batch(events).to_trades(), expected)
+                self.assertEqual(batched.book.depth(k=20), sequential.book.depth(k=20))
+
+class TestTradeBuffer(unittest.TestCase):
+    def test_grow_and_reuse(self):
+        fills = TradeBuffer(capacity=2)
+        for i in range(5):
+            fills.append(float(i), 100 + i, 1, i, 99)
+        self.assertEqual(len(fills), 5)
+        self.assertEqual(fills[-1].price, 104)
+        fills.clear()
+        self.assertEqual(fills.to_trades(), [])
+        with self.assertRaises(IndexError):
+            fills[0]
+
+if __name__ == "__main__":
+    unittest.main()
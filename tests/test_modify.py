@@ -0,0 +1,93 @@
+import random
+import unittest
+from lob.book_custom import CustomOrderBook
+from lob.events import EventBlock
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+
+def limit(oid, side, price, qty):
+    return Order(oid, float(oid), side, OrderType.LIMIT, price, qty)
+
+def queue(book, side, price):
+    for level in book.levels_from_touch(side):
+        if level.price == price:
+            return [(o.id, o.qty) for o in level]
+    return []
+
+class TestModifyOrder(unittest.TestCase):
+    def seeded(self, cls):
+        book = cls(check_consistency=True)
+        for i, (side, price) in enumerate([(Side.BUY, 99)] * 3 + [(Side.SELL, 101)] * 2):
+            book.add_order(limit(i, side, price, 5))
+        return book
+
+    def test_reduce_keeps_priority(self):
+        for cls in BACKENDS:
+            book = self.seeded(cls)
+            self.assertTrue(book.modify_order(0, 2))
+            self.assertTrue(book.modify_order(1, 5, 99))  # unchanged
+            self.assertEqual(queue(book, Side.BUY, 99), [(0, 2), (1, 5), (2, 5)])
+            self.assertEqual(book.bid_qty, 12)
+            self.assertEqual(book.best_bid(), (99, 12))
+            self.assertTrue(book.modify_order(1, 0))
+            self.assertNotIn(1, book.order_map)
+            self.assertFalse(book.modify_order(1, 3))
+            with self.assertRaises(ValueError):
+                book.modify_order(0, -1)
+
+    def test_increase_or_price_change_requeues(self):
+        for cls in BACKENDS:
+            book = self.seeded(cls)
+            book.modify_order(0, 6)
+            self.assertEqual(queue(book, Side.BUY, 99), [(1, 5), (2, 5), (0, 6)])
+            book.modify_order(1, 5, 98)
+            book.modify_order(3, 1, 102)
+            self.assertEqual(queue(book, Side.BUY, 99), [(2, 5), (0, 6)])
+            self.assertEqual(queue(book, Side.BUY, 98), [(1, 5)])
+            self.assertEqual(book.best_ask(), (101, 5))
+            self.assertEqual(book.depth(k=5), {'bids': [(99, 11), (98, 5)], 'asks': [(101, 5), (102, 1)]})
+            self.assertEqual(list(book.order_map), [2, 4, 0, 1, 3])
+            book.modify_order(2, 4, 100)  # amend to a new best price, off the old best level
+            self.assertEqual(book.best_bid(), (100, 4))
+
+    def test_crossing_amend_goes_through_matcher(self):
+        for cls in BACKENDS:
+            book = self.seeded(cls)
+            with self.assertRaises(ValueError):
+                book.modify_order(2, 8, 101)
+            self.assertEqual(queue(book, Side.BUY, 99), [(0, 5), (1, 5), (2, 5)])
+            trades = Matcher(book).modify(2, 8, 101)
+            self.assertEqual([(t.maker_id, t.taker_id, t.price, t.qty) for t in trades],
+                             [(3, 2, 101, 5), (4, 2, 101, 3)])
+            self.assertEqual(book.best_bid(), (99, 10))
+            self.assertEqual(book.best_ask(), (101, 2))
+            self.assertNotIn(2, book.order_map)
+
+    def test_batched_amends_match_one_by_one(self):
+        rng = random.Random(4)
+        events = []
+        for i in range(3000):
+            if i > 50 and rng.random() < 0.4:
+                events.append(('modify', (rng.randrange(i), rng.randint(0, 9),
+                                          rng.choice((None, rng.randint(95, 105))))))
+            else:
+                side = Side.BUY if rng.random() < 0.5 else Side.SELL
+                events.append(('add', limit(i, side, rng.randint(95, 105), rng.randint(1, 9))))
+        block = EventBlock.from_events(events)
+        for cls in BACKENDS:
+            one = Matcher(cls(check_consistency=True))
+            trades = []
+            for etype, payload in block.to_events():
+                trades.extend(one.modify(*payload) if etype == 'modify' else one.submit(payload))
+            batch = Matcher(cls())
+            self.assertEqual(batch.submit_batch(block).to_trades(), trades)
+            self.assertEqual(batch.book.depth(k=20), one.book.depth(k=20))
+            self.assertEqual(list(batch.book.order_map), list(one.book.order_map))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,6 +16,26 @@ class TestOrder(unittest.TestCase):
         self.assertEqual(trade.maker_id, 1)
         self.assertEqual(trade.taker_id, 2)
 
+    def test_order_is_slotted(self):
+        order = Order(id=1, side=Side.BUY, price=100, qty=10, ts=1.0, type=OrderType.LIMIT)
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertEqual(order, Order(1, 1.0, Side.BUY, OrderType.LIMIT, 100, 10))
+        self.assertEqual(int(order.side), 1)
+
+    def test_codes_shared_with_lob(self):
+        import lob.order
+        self.assertEqual(lob.order.Side.SELL, Side.SELL)
+        self.assertEqual(lob.order.OrderType.MARKET, OrderType.MARKET)
+
+    def test_pickle_drops_queue_links(self):
+        import pickle
+        a = Order(id=1, side=Side.BUY, price=100, qty=10, ts=1.0, type=OrderType.LIMIT)
+        b = Order(id=2, side=Side.BUY, price=100, qty=10, ts=2.0, type=OrderType.LIMIT)
+        a.next, b.prev = b, a
+        restored = pickle.loads(pickle.dumps(a))
+        self.assertEqual(restored, a)
+        self.assertIsNone(restored.next)
+
 class TestLimitOrderBook(unittest.TestCase):
     def setUp(self):
         from order_book.order import LimitOrderBook
@@ -66,6 +86,8 @@ class TestLimitOrderBook(unittest.TestCase):
         depth = self.book.depth(k=2)
         self.assertEqual(len(depth['bids']), 2)
         self.assertEqual(len(depth['asks']), 2)
+        self.assertEqual(depth['bids'][0], (100, 10))
+        self.assertEqual(depth['asks'][1], (102, 3))
 
     def test_match_no_cross(self):
         self.book.add_order(self.buy1)
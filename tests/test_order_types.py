@@ -0,0 +1,164 @@
+import pickle
+import random
+import unittest
+from lob.book_custom import CustomOrderBook
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType, TimeInForce
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+
+def l3(book):
+    return {side: [[(o.id, o.qty, o.reserve) for o in level] for level in book.levels_from_touch(side)]
+            for side in (Side.BUY, Side.SELL)}
+
+def limit(oid, side, price, qty, **kwargs):
+    return Order(oid, float(oid), side, OrderType.LIMIT, price, qty, **kwargs)
+
+class TestTimeInForce(unittest.TestCase):
+    def seeded(self, cls):
+        matcher = Matcher(cls(check_consistency=True))
+        for i, price in enumerate((101, 101, 102, 104)):
+            matcher.submit(limit(i, Side.SELL, price, 5))
+        matcher.submit(limit(4, Side.BUY, 99, 5))
+        return matcher
+
+    def test_ioc_never_rests(self):
+        for cls in BACKENDS:
+            matcher = self.seeded(cls)
+            trades = matcher.submit(limit(10, Side.BUY, 101, 12, tif=TimeInForce.IOC))
+            self.assertEqual([(t.maker_id, t.qty) for t in trades], [(0, 5), (1, 5)])
+            self.assertNotIn(10, matcher.book.order_map)
+            self.assertEqual(matcher.book.best_bid(), (99, 5))
+            before = l3(matcher.book)
+            order = limit(11, Side.SELL, 100, 3, tif=TimeInForce.IOC)
+            self.assertEqual(matcher.submit(order), [])
+            self.assertEqual(order.qty, 3)
+            self.assertEqual(l3(matcher.book), before)
+
+    def test_fok_all_or_nothing(self):
+        for cls in BACKENDS:
+            matcher = self.seeded(cls)
+            before = l3(matcher.book)
+            order = limit(10, Side.BUY, 102, 16, tif=TimeInForce.FOK)
+            self.assertEqual(matcher.submit(order), [])
+            self.assertEqual(order.qty, 16)
+            self.assertEqual(l3(matcher.book), before)
+            trades = matcher.submit(limit(11, Side.BUY, 102, 15, tif=TimeInForce.FOK))
+            self.assertEqual(sum(t.qty for t in trades), 15)
+            self.assertEqual(matcher.book.best_ask(), (104, 5))
+            market = Order(12, 12.0, Side.BUY, OrderType.MARKET, None, 6, tif=TimeInForce.FOK)
+            self.assertEqual(matcher.submit(market), [])
+            self.assertEqual(matcher.book.best_ask(), (104, 5))
+            market.qty = 5
+            self.assertEqual(len(matcher.submit(market)), 1)
+
+    def test_post_only(self):
+        for cls in BACKENDS:
+            matcher = self.seeded(cls)
+            before = l3(matcher.book)
+            self.assertEqual(matcher.submit(limit(10, Side.BUY, 101, 3, tif=TimeInForce.POST_ONLY)), [])
+            self.assertEqual(l3(matcher.book), before)
+            matcher.submit(limit(11, Side.BUY, 100, 3, tif=TimeInForce.POST_ONLY))
+            self.assertEqual(matcher.book.best_bid(), (100, 3))
+            self.assertEqual(matcher.submit(Order(12, 0.0, Side.SELL, OrderType.MARKET, None, 3,
+                                                  tif=TimeInForce.POST_ONLY)), [])
+            self.assertEqual(matcher.book.best_bid(), (100, 3))
+
+    def test_iceberg_refills_at_the_back(self):
+        for cls in BACKENDS:
+            matcher = Matcher(cls(check_consistency=True))
+            matcher.submit(limit(0, Side.SELL, 101, 10, peak=3))
+            matcher.submit(limit(1, Side.SELL, 101, 2))
+            self.assertEqual(matcher.book.best_ask(), (101, 5))
+            self.assertEqual(matcher.book.ask_qty, 5)
+            trades = matcher.submit(limit(2, Side.BUY, 101, 7))
+            self.assertEqual([(t.maker_id, t.qty) for t in trades], [(0, 3), (1, 2), (0, 2)])
+            self.assertEqual(l3(matcher.book)[Side.SELL], [[(0, 1, 4)]])
+            trades = matcher.submit(Order(3, 3.0, Side.BUY, OrderType.MARKET, None, 9))
+            self.assertEqual(sum(t.qty for t in trades), 5)
+            self.assertEqual(matcher.book.order_map, {})
+            self.assertEqual((matcher.book.ask_qty, matcher.book.bid_qty), (0, 0))
+
+    def test_iceberg_refills_in_match_and_execute(self):
+        for cls in BACKENDS:
+            book = cls(check_consistency=True)
+            book.add_order(limit(0, Side.SELL, 100, 10, peak=3))
+            book.add_order(limit(1, Side.BUY, 100, 5))
+            trades = book.match()
+            self.assertEqual([(t.maker_id, t.qty) for t in trades], [(0, 3), (0, 2)])
+            self.assertEqual(l3(book)[Side.SELL], [[(0, 1, 4)]])
+            self.assertEqual(book.best_ask(), (100, 1))
+            self.assertTrue(book.execute_order(0, 1))
+            self.assertEqual(l3(book)[Side.SELL], [[(0, 3, 1)]])
+            self.assertEqual(book.best_ask(), (100, 3))
+            self.assertTrue(book.execute_order(0, 3))
+            self.assertEqual(book.best_ask(), (100, 1))
+            self.assertTrue(book.execute_order(0, 1))
+            self.assertIsNone(book.best_ask())
+            self.assertEqual((book.order_map, book.ask_qty), ({}, 0))
+
+    def test_iceberg_amend_applies_to_the_total(self):
+        for cls in BACKENDS:
+            book = cls(check_consistency=True)
+            book.add_order(limit(1, Side.SELL, 101, 100, peak=10))
+            book.add_order(limit(2, Side.SELL, 101, 5))
+            self.assertTrue(book.modify_order(1, 20))  # comes out of the reserve, keeps priority
+            self.assertEqual(l3(book)[Side.SELL], [[(1, 10, 10), (2, 5, 0)]])
+            self.assertTrue(book.modify_order(1, 5))
+            self.assertEqual(l3(book)[Side.SELL], [[(1, 5, 0), (2, 5, 0)]])
+            self.assertTrue(book.modify_order(1, 30))  # increase: re-queued and split by its peak again
+            self.assertEqual(l3(book)[Side.SELL], [[(2, 5, 0), (1, 10, 20)]])
+            self.assertTrue(book.modify_order(1, 25, 102))
+            self.assertEqual(l3(book)[Side.SELL], [[(2, 5, 0)], [(1, 10, 15)]])
+            self.assertEqual(book.ask_qty, 15)
+
+    def test_post_only_amend_never_crosses(self):
+        for cls in BACKENDS:
+            matcher = Matcher(cls(check_consistency=True))
+            book = matcher.book
+            matcher.submit(limit(1, Side.SELL, 105, 5))
+            matcher.submit(limit(2, Side.BUY, 100, 10, tif=TimeInForce.POST_ONLY))
+            before = l3(book)
+            self.assertFalse(book.modify_order(2, 10, 105, matcher.fills))
+            self.assertFalse(book.modify_order(2, 10, 106))
+            self.assertEqual(matcher.modify(2, 10, 105), [])
+            self.assertEqual(l3(book), before)
+            self.assertEqual(book.best_bid(), (100, 10))
+            self.assertTrue(book.modify_order(2, 8, 104))
+            self.assertEqual(book.best_bid(), (104, 8))
+
+    def test_can_fill_matches_a_scan_of_the_levels(self):
+        rng = random.Random(5)
+        for cls in BACKENDS:
+            matcher = Matcher(cls())
+            book = matcher.book
+            for i in range(3000):
+                if rng.random() < 0.3 and book.order_map:
+                    book.cancel_order(rng.choice(list(book.order_map)))  # leaves stale heap entries
+                    continue
+                side = Side.BUY if rng.random() < 0.5 else Side.SELL
+                matcher.submit(limit(i, side, rng.randint(90, 110), rng.randint(1, 9)))
+                if i % 50:
+                    continue
+                for taker in (Side.BUY, Side.SELL):
+                    opposite = Side.SELL if taker == Side.BUY else Side.BUY
+                    for _ in range(5):
+                        px, qty = rng.randint(85, 115), rng.randint(1, 120)
+                        available = sum(lvl.total_qty for lvl in book.levels_from_touch(opposite)
+                                        if (lvl.price <= px if taker == Side.BUY else lvl.price >= px))
+                        self.assertEqual(book.can_fill(taker, qty, px), available >= qty)
+                    self.assertEqual(book.can_fill(taker, 1), bool(list(book.levels_from_touch(opposite))))
+
+    def test_order_fields_round_trip(self):
+        order = limit(1, Side.BUY, 99, 10, tif=TimeInForce.POST_ONLY, peak=4)
+        HeapOrderBook().add_order(order)
+        self.assertEqual((order.qty, order.reserve), (4, 6))
+        copy = pickle.loads(pickle.dumps(order))
+        self.assertEqual(copy, order)
+        self.assertEqual((copy.tif, copy.peak, copy.reserve), (TimeInForce.POST_ONLY, 4, 6))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from lob.book_custom import CustomOrderBook
+from lob.matcher import Matcher
+from lob.order import Order, Side, OrderType, TimeInForce
+from lob.snapshot import HEADER_SIZE, RECORD_DTYPE, save_snapshot, load_snapshot
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+from sim.event_stream import SyntheticEventStream
+
+BACKENDS = [HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook]
+
+def l3(book):
+    return {side: [[(o.id, o.ts, o.price, o.qty, o.owner, o.flags) for o in level]
+                   for level in book.levels_from_touch(side)] for side in (Side.BUY, Side.SELL)}
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'book.snap')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def warm_book(self, book_cls):
+        matcher = Matcher(book_cls())
+        for block in SyntheticEventStream(n_events=5000, seed=8).blocks(block_size=1000):
+            matcher.submit_batch(block)
+        return matcher.book
+
+    def test_round_trip_across_backends(self):
+        for saved_cls in BACKENDS:
+            book = self.warm_book(saved_cls)
+            self.assertEqual(save_snapshot(book, self.path), len(book.order_map))
+            for loaded_cls in BACKENDS:
+                with self.subTest(saved=saved_cls.__name__, loaded=loaded_cls.__name__):
+                    restored = load_snapshot(self.path, lambda: loaded_cls(check_consistency=True))
+                    restored.verify()
+                    self.assertEqual(l3(restored), l3(book))
+                    self.assertEqual(restored.top_of_book(), book.top_of_book())
+                    self.assertEqual(set(restored.order_map), set(book.order_map))
+
+    def test_restored_book_matches_like_the_original(self):
+        book = self.warm_book(HeapOrderBook)
+        save_snapshot(book, self.path)
+        restored = load_snapshot(self.path, HeapOrderBook)
+        flow = list(SyntheticEventStream(n_events=2000, seed=9))
+        trades = []
+        for b in (book, restored):
+            matcher = Matcher(b)
+            fills = []
+            for etype, payload in flow:
+                if etype == 'cancel':
+                    b.cancel_order(payload)
+                else:
+                    payload = Order(payload.id + 10**6, payload.ts, payload.side, payload.type, payload.price, payload.qty)
+                    fills.extend(matcher.submit(payload))
+            trades.append(fills)
+        self.assertEqual(trades[0], trades[1])
+        self.assertEqual(l3(book), l3(restored))
+
+    def test_owner_flags_and_empty_book(self):
+        book = SortedOrderBook()
+        book.add_order(Order(1, 1.0, Side.BUY, OrderType.LIMIT, 99, 5, owner='mm1'))
+        book.add_order(Order(2, 2.0, Side.BUY, OrderType.LIMIT, 99, 3, flags='post'))
+        book.add_order(Order(3, 3.0, Side.SELL, OrderType.LIMIT, 101, 4, owner='mm1', flags=''))
+        save_snapshot(book, self.path)
+        self.assertEqual(l3(load_snapshot(self.path, LimitOrderBook)), l3(book))
+        save_snapshot(CustomOrderBook(), self.path)
+        empty = load_snapshot(self.path)
+        self.assertEqual(empty.order_map, {})
+        self.assertIsNone(empty.best_bid())
+
+    def test_iceberg_and_tif_survive(self):
+        book = HeapOrderBook()
+        book.add_order(Order(1, 1.0, Side.SELL, OrderType.LIMIT, 101, 10, peak=3))
+        book.add_order(Order(2, 2.0, Side.BUY, OrderType.LIMIT, 99, 4, tif=TimeInForce.POST_ONLY))
+        save_snapshot(book, self.path)
+        restored = load_snapshot(self.path, lambda: CustomOrderBook(check_consistency=True))
+        iceberg, post = restored.order_map[1], restored.order_map[2]
+        self.assertEqual((iceberg.qty, iceberg.peak, iceberg.reserve), (3, 3, 7))
+        self.assertEqual(post.tif, TimeInForce.POST_ONLY)
+        self.assertEqual(restored.best_ask(), (101, 3))
+        trades = Matcher(restored).submit(Order(3, 3.0, Side.BUY, OrderType.LIMIT, 101, 10))
+        self.assertEqual(sum(t.qty for t in trades), 10)
+
+    def test_rejects_bad_input(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot at all')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+        book = self.warm_book(CustomOrderBook)
+        save_snapshot(book, self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+        with self.assertRaises(ValueError):
+            book.load_levels([], [], {})  # only into an empty book
+        for field, value in (('qty', 0), ('qty', -5), ('reserve', -1)):
+            save_snapshot(book, self.path)
+            records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r+', offset=HEADER_SIZE)
+            records[field][0] = value
+            records.flush()
+            del records
+            with self.assertRaises(ValueError):
+                load_snapshot(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.suite import (BACKENDS, make_workload, sweep_configs, run_suite, write_json, write_csv,
+                              compare, _build, _materialize, _throughput, ADD, CANCEL, MODIFY)
+
+SMALL = {'n_events': 300, 'depth': 5, 'orders_per_level': 2, 'cancel_ratio': 0.3}
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_workload_is_seeded(self):
+        self.assertEqual(make_workload(seed=4, **SMALL), make_workload(seed=4, **SMALL))
+        setup, flow = make_workload(seed=4, **SMALL)
+        self.assertEqual(len(setup), 2 * 5 * 2)
+        self.assertEqual(len(flow), 300)
+
+    def test_backends_end_in_same_state(self):
+        setup, flow = make_workload(seed=2, **SMALL)
+        depths = []
+        for book_cls in BACKENDS.values():
+            matcher = _build(book_cls, setup)
+            for op, payload in _materialize(flow):
+                if op == ADD:
+                    matcher.submit_fills(payload)
+                else:
+                    matcher.book.cancel_order(payload)
+            depths.append(matcher.book.depth(k=50))
+        for other in depths[1:]:
+            self.assertEqual(other, depths[0])
+
+    def test_amend_workload(self):
+        amend = dict(SMALL, amend_ratio=0.4)
+        self.assertEqual(make_workload(seed=2, **dict(SMALL, amend_ratio=0.0)), make_workload(seed=2, **SMALL))
+        setup, flow = make_workload(seed=2, **amend)
+        self.assertGreater(sum(op == MODIFY for op, *_ in flow), 60)
+        books = []
+        for book_cls in BACKENDS.values():
+            matcher = _build(book_cls, setup)
+            for op, payload in _materialize(flow):
+                if op == ADD:
+                    matcher.submit_fills(payload)
+                elif op == CANCEL:
+                    matcher.book.cancel_order(payload)
+                else:
+                    matcher.modify_fills(*payload[:3])
+            books.append((matcher.book.depth(k=50), list(matcher.book.order_map)))
+        for other in books[1:]:
+            self.assertEqual(other, books[0])
+        self.assertGreater(_throughput(BACKENDS['HeapOrderBook'], setup, flow, cancel_replace=True), 0)
+        row = run_suite([amend], backends=['SortedOrderBook'], memory=False, verbose=False)['results'][0]
+        self.assertGreater(row['cancel_replace_eps'], 0)
+        self.assertLessEqual(row['modify_p50_ns'], row['modify_p99_ns'])
+
+    def test_sweep_configs_vary_one_parameter(self):
+        configs = sweep_configs(base=SMALL, sweeps={'depth': (5, 10), 'cancel_ratio': (0.3, 0.5)}, scale=0.5)
+        self.assertEqual([(c['depth'], c['cancel_ratio'], c['n_events']) for c in configs],
+                         [(5, 0.3, 150), (10, 0.3, 150), (5, 0.5, 150)])
+
+    def test_report_output_and_compare(self):
+        report = run_suite([SMALL], backends=['CustomOrderBook', 'HeapOrderBook'], verbose=False)
+        self.assertEqual([row['backend'] for row in report['results']], ['CustomOrderBook', 'HeapOrderBook'])
+        row = report['results'][0]
+        self.assertGreater(row['throughput_eps'], 0)
+        self.assertGreater(row['peak_mem_bytes'], 0)
+        self.assertLessEqual(row['add_p50_ns'], row['add_p99_ns'])
+        with tempfile.TemporaryDirectory() as tmp:
+            write_json(report, os.path.join(tmp, 'r.json'))
+            write_csv(report, os.path.join(tmp, 'r.csv'))
+            with open(os.path.join(tmp, 'r.json')) as f:
+                self.assertEqual(json.load(f)['results'], report['results'])
+            with open(os.path.join(tmp, 'r.csv')) as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 2)
+        self.assertEqual(compare(report, report), [])
+        slower = {'results': [dict(r, throughput_eps=r['throughput_eps'] / 2) for r in report['results']]}
+        self.assertEqual(len(compare(report, slower)), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from lob.matcher import Matcher
+from lob.book_custom import CustomOrderBook
+from lob.order import Order, Side, OrderType
+from order_book.book_heap import HeapOrderBook
+from order_book.book_sorted import SortedOrderBook
+from order_book.order import LimitOrderBook
+from order_book.top_of_book import TopOfBook
+
+BACKENDS = (HeapOrderBook, SortedOrderBook, LimitOrderBook, CustomOrderBook)
+
+def recomputed(book):
+    depth = book.depth(k=10**6)
+    bids, asks = depth['bids'], depth['asks']
+    return TopOfBook(bids[0][0] if bids else None, asks[0][0] if asks else None,
+                     sum(q for _, q in bids), sum(q for _, q in asks))
+
+class TestTopOfBook(unittest.TestCase):
+    def test_sample_properties(self):
+        top = TopOfBook(99, 101, 5, 7)
+        self.assertEqual((top.spread, top.depth), (2, 12))
+        self.assertIsNone(TopOfBook(None, 101, 0, 7).spread)
+
+    def test_samples_track_book_on_random_flow(self):
+        for backend in BACKENDS:
+            rng = random.Random(8)
+            book = backend(check_consistency=True)
+            matcher = Matcher(book)
+            samples = []
+            book.subscribe(samples.append)
+            for i in range(600):
+                before = len(samples)
+                if i > 20 and rng.random() < 0.3:
+                    book.cancel_order(rng.randrange(i))
+                elif rng.random() < 0.1:
+                    matcher.submit(Order(i, float(i), Side.BUY if rng.random() < 0.5 else Side.SELL,
+                                         OrderType.MARKET, None, rng.randint(1, 9)))
+                else:
+                    matcher.submit(Order(i, float(i), Side.BUY if rng.random() < 0.5 else Side.SELL,
+                                         OrderType.LIMIT, rng.randint(95, 105), rng.randint(1, 9)))
+                self.assertLessEqual(len(samples) - before, 1)
+                self.assertEqual(book.top_of_book(), recomputed(book))
+                if samples:
+                    self.assertEqual(samples[-1], book.top_of_book())
+
+    def test_no_sample_without_change(self):
+        for backend in BACKENDS:
+            book = backend()
+            samples = []
+            book.subscribe(samples.append)
+            book.add_order(Order(1, 0.0, Side.BUY, OrderType.LIMIT, 100, 5))
+            self.assertEqual(samples, [TopOfBook(100, None, 5, 0)])
+            self.assertFalse(book.cancel_order(42))
+            book.match()
+            self.assertEqual(len(samples), 1)
+            book.unsubscribe(samples.append)
+            book.cancel_order(1)
+            self.assertEqual(len(samples), 1)
+            self.assertEqual(book.top_of_book(), TopOfBook(None, None, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()